@@ -0,0 +1,106 @@
+import os
+import time
+
+import pandas as pd
+import requests
+
+# Base URL of the extraction service; when unset the Streamlit app processes documents in-process
+API_URL = os.environ.get("BFSI_API_URL")
+# Seconds each request asks the service to hold the response while the job runs
+POLL_WAIT = float(os.environ.get("BFSI_API_POLL_WAIT", 20))
+# Overall seconds to wait for a job before giving up
+CLIENT_TIMEOUT = float(os.environ.get("BFSI_API_CLIENT_TIMEOUT", 600))
+MAX_RETRIES = 5
+
+
+def _to_dataframe(result):
+    if isinstance(result, dict) and set(result) == {"columns", "records"}:
+        return pd.DataFrame(result["records"], columns=result["columns"])
+    return result
+
+
+class ExtractionClient:
+    """
+    Client of the extraction service (api.server), with the same call signatures as
+    the in-process processors so the Streamlit app can use either.
+
+    Jobs are long-polled: each request waits up to POLL_WAIT seconds server-side, so
+    short jobs come back in one round trip. Busy (429) responses are retried after
+    the Retry-After delay.
+    """
+    def __init__(self, base_url=None, timeout=CLIENT_TIMEOUT, poll_wait=POLL_WAIT):
+        self.base_url = (base_url or API_URL or "http://127.0.0.1:8000").rstrip("/")
+        self.timeout = timeout
+        self.poll_wait = poll_wait
+        self.session = requests.Session()
+
+    def _request(self, method, path, **kwargs):
+        for attempt in range(MAX_RETRIES + 1):
+            response = self.session.request(method, self.base_url + path, timeout=self.poll_wait + 30, **kwargs)
+            if response.status_code != 429 or attempt == MAX_RETRIES:
+                break
+            time.sleep(float(response.headers.get("Retry-After", 1)))
+            # Re-send uploads from the start
+            for _, file in (kwargs.get("files") or {}).items():
+                file[1].seek(0)
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise ValueError(f"Extraction service error {response.status_code}: {detail}")
+        return response.json()
+
+    def run(self, path, files=None, params=None, json=None):
+        """
+        Submits a job and polls until it finishes. Returns the job result, or raises
+        ValueError when the job failed, was cancelled or timed out.
+        """
+        deadline = time.monotonic() + self.timeout
+        params = {**(params or {}), "wait": self.poll_wait}
+        job = self._request("POST", path, files=files, params=params, json=json)
+        while job["status"] not in ("done", "failed", "timeout", "cancelled"):
+            if time.monotonic() > deadline:
+                raise ValueError(f"Job {job['id']} did not finish within {self.timeout:g}s")
+            job = self._request("GET", f"/jobs/{job['id']}", params={"wait": self.poll_wait})
+        if job["status"] != "done":
+            raise ValueError(job["error"] or f"Job {job['status']}")
+        return job["result"]
+
+    def _document(self, path, file):
+        file.seek(0)
+        name = getattr(file, "name", None) or "upload"
+        return _to_dataframe(self.run(path, files={"file": (os.path.basename(name), file)}))
+
+    def process_invoice(self, file):
+        return self._document("/invoice", file)
+
+    def process_payslips(self, file):
+        return self._document("/payslip", file)
+
+    def process_profit_loss(self, file):
+        return self._document("/profit-loss", file)
+
+    def classify_data(self, file, transaction_id=None, backend="bart", return_stats=False):
+        file.seek(0)
+        params = {"backend": backend}
+        if transaction_id is not None:
+            params["transaction_id"] = transaction_id
+        name = os.path.basename(getattr(file, "name", None) or "upload.csv")
+        result = self.run("/classify", files={"file": (name, file)}, params=params)
+        return (result["records"], result["stats"]) if return_stats else result["records"]
+
+    def fetch_financial_data(self, filing_url, use_cache=True):
+        try:
+            return self.run("/filing", json={"url": filing_url, "use_cache": use_cache})["data"]
+        except (ValueError, requests.RequestException) as e:
+            return {"error": str(e)}
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def metrics(self):
+        """
+        Returns the service's instrumentation snapshot (see instrumentation.snapshot).
+        """
+        return self._request("GET", "/metrics", params={"format": "json"})
@@ -0,0 +1,265 @@
+import io
+import math
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+from preload import PRELOAD, preload
+
+# Heavy CPU work (OCR, classification) runs on a bounded process pool; filing fetches are I/O and use threads
+API_WORKERS = int(os.environ.get("BFSI_API_WORKERS", os.cpu_count() or 1))
+IO_WORKERS = int(os.environ.get("BFSI_API_IO_WORKERS", 8))
+# Jobs accepted but not finished; beyond this new submissions are refused (HTTP 429)
+MAX_PENDING_JOBS = int(os.environ.get("BFSI_API_MAX_PENDING", API_WORKERS * 4))
+# Seconds a job may wait in the queue before it is dropped as timed out; running jobs are never interrupted
+JOB_TIMEOUT = float(os.environ.get("BFSI_API_JOB_TIMEOUT", 600))
+# Seconds finished jobs are kept for status polling
+JOB_TTL = float(os.environ.get("BFSI_API_JOB_TTL", 3600))
+
+FINISHED_STATUSES = ("done", "failed", "timeout", "cancelled")
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a job is submitted while MAX_PENDING_JOBS jobs are still unfinished.
+    """
+
+
+def to_jsonable(value):
+    """
+    Converts processor output (DataFrames, numpy scalars, NaN) into plain JSON values.
+    DataFrames become {"columns": [...], "records": [...]}.
+    """
+    if isinstance(value, pd.DataFrame):
+        return {"columns": [str(c) for c in value.columns],
+                "records": to_jsonable(value.to_dict(orient="records"))}
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _upload(data, filename):
+    # The supervised processors read upload-like objects, which carry a name
+    file = io.BytesIO(data)
+    file.name = filename
+    return file
+
+
+def run_document(doc_type, data, filename):
+    """
+    Worker task: runs the supervised processor of a document type on uploaded bytes.
+    """
+    from supervised.batch import get_processor
+
+    result = get_processor(doc_type)(_upload(data, filename))
+    if isinstance(result, dict) and "error" in result:
+        raise ValueError(result["error"])
+    return to_jsonable(result)
+
+
+def run_classify(data, filename, backend="bart", transaction_id=None):
+    """
+    Worker task: classifies the transactions of an uploaded CSV/JSON file.
+    """
+    from unsupervised.bart_classification import classify_data
+
+    records, stats = classify_data(_upload(data, filename), transaction_id, backend=backend, return_stats=True)
+    return to_jsonable({"records": records, "stats": stats})
+
+
+def run_filing(filing_url, use_cache=True):
+    """
+    Worker task: fetches the XBRL JSON of a filing and loads its facts into the fact store.
+    """
+    from semi_supervised.fact_store import get_fact_store
+    from semi_supervised.fetcher import fetch_filing
+
+    data = fetch_filing(filing_url, use_cache=use_cache)
+    if "error" in data:
+        raise ValueError(data["error"])
+    fact_store = get_fact_store()
+    facts = fact_store.add_filing(filing_url, data)
+    return to_jsonable({"facts": facts, "statements": fact_store.statements(filing_url), "data": data})
+
+
+class JobQueue:
+    """
+    In-memory job registry in front of a bounded process pool (CPU work) and thread
+    pool (I/O work). Workers preload the backends in `preload_backends` (see preload.py).
+
+    Submissions beyond `max_pending` unfinished jobs are refused instead of queued
+    without limit. A job counts as unfinished until its future completes, so jobs
+    still holding a pool worker keep counting. A job that is still queued after
+    `job_timeout` seconds is cancelled and reported as timed out; a running one is
+    left to finish, since pool workers can't be interrupted. Finished jobs are
+    dropped after `job_ttl`.
+    """
+    def __init__(self, workers=API_WORKERS, io_workers=IO_WORKERS, max_pending=MAX_PENDING_JOBS,
+                 job_timeout=JOB_TIMEOUT, job_ttl=JOB_TTL, preload_backends=PRELOAD):
+        # Workers load and warm up the BFSI_PRELOAD backends when they start, not on their first job
+        self.cpu_executor = ProcessPoolExecutor(max_workers=workers, initializer=preload if preload_backends else None,
+                                                initargs=(preload_backends,) if preload_backends else ())
+        self.io_executor = ThreadPoolExecutor(max_workers=io_workers)
+        self.workers = workers
+        self.max_pending = max_pending
+        self.job_timeout = job_timeout
+        self.job_ttl = job_ttl
+        self.jobs = {}
+        # Reentrant: Future.cancel() runs the done callback, which takes the lock, on the calling thread
+        self.lock = threading.RLock()
+
+    def _pending(self):
+        return sum(1 for job in self.jobs.values() if not job["_future"].done())
+
+    def _expire(self, now):
+        for job_id, job in list(self.jobs.items()):
+            if job["status"] in FINISHED_STATUSES:
+                if now - job["finished_at"] > self.job_ttl:
+                    del self.jobs[job_id]
+            elif now - job["submitted_at"] > self.job_timeout and not job["_future"].running():
+                # cancel() fails once a worker has picked the job up; the done callback reports the timeout
+                job["_timed_out"] = True
+                job["_future"].cancel()
+
+    @staticmethod
+    def _set_finished(job, status, result=None, error=None, now=None):
+        # cancel() and the done callback it triggers can both finish a job; record it once
+        if job["status"] in FINISHED_STATUSES:
+            return
+        job.update(status=status, result=result, error=error, finished_at=now or time.time())
+        job["_event"].set()
+        instrumentation.observe("job_seconds", job["finished_at"] - job["submitted_at"], kind=job["kind"])
+        instrumentation.inc("jobs_total", kind=job["kind"], status=status)
+
+    def submit(self, kind, fn, *args, io=False):
+        """
+        Queues fn(*args) and returns the job's public view. Raises QueueFullError under backpressure.
+        """
+        with self.lock:
+            now = time.time()
+            self._expire(now)
+            if self._pending() >= self.max_pending:
+                instrumentation.inc("jobs_rejected_total", kind=kind)
+                raise QueueFullError(f"{self.max_pending} jobs are already pending")
+            job = {
+                "id": uuid.uuid4().hex, "kind": kind, "status": "queued", "submitted_at": now,
+                "finished_at": None, "result": None, "error": None, "_event": threading.Event(),
+            }
+            # I/O jobs record metrics in this process; process pool workers send theirs back with the result
+            if io:
+                job["_future"] = self.io_executor.submit(fn, *args)
+            else:
+                job["_future"] = self.cpu_executor.submit(instrumentation.run_collecting, fn, *args)
+            job["_collecting"] = not io
+            self.jobs[job["id"]] = job
+        job["_future"].add_done_callback(lambda future: self._on_done(job, future))
+        return self._view(job)
+
+    def _on_done(self, job, future):
+        with self.lock:
+            if job["status"] in FINISHED_STATUSES:
+                return
+            try:
+                result = future.result()
+                if job["_collecting"]:
+                    result, metrics = result
+                    instrumentation.merge(metrics)
+                self._set_finished(job, "done", result=result)
+            except CancelledError:
+                if job.get("_timed_out"):
+                    self._set_finished(job, "timeout", error=f"Job was queued for over {self.job_timeout:g}s")
+                else:
+                    self._set_finished(job, "cancelled")
+            except Exception as e:
+                if getattr(e, "metrics", None) is not None:
+                    instrumentation.merge(e.metrics)
+                self._set_finished(job, "failed", error=str(e))
+
+    def _view(self, job):
+        view = {key: value for key, value in job.items() if not key.startswith("_")}
+        if view["status"] == "queued" and job["_future"].running():
+            view["status"] = "running"
+        return view
+
+    def get(self, job_id):
+        """
+        Returns the public view of a job, or None when it is unknown or expired.
+        """
+        with self.lock:
+            self._expire(time.time())
+            job = self.jobs.get(job_id)
+            return None if job is None else self._view(job)
+
+    def wait(self, job_id, timeout):
+        """
+        Blocks up to `timeout` seconds for a job to finish and returns its view.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is not None:
+            if not job["_future"].running():
+                # Wake up when a queued job is due to time out, so get() expires it
+                timeout = min(timeout, max(0.0, job["submitted_at"] + self.job_timeout - time.time()))
+            job["_event"].wait(timeout)
+        return self.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancels a job that has not started yet. Returns its view, or None when unknown.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] not in FINISHED_STATUSES and job["_future"].cancel():
+                # Usually a no-op: the done callback has already finished the job on this thread
+                self._set_finished(job, "cancelled")
+            return self._view(job)
+
+    def stats(self):
+        with self.lock:
+            self._expire(time.time())
+            counts = {}
+            for job in self.jobs.values():
+                status = self._view(job)["status"]
+                counts[status] = counts.get(status, 0) + 1
+        return {"workers": self.workers, "max_pending": self.max_pending, "jobs": counts}
+
+    def shutdown(self):
+        self.cpu_executor.shutdown(wait=False, cancel_futures=True)
+        self.io_executor.shutdown(wait=False, cancel_futures=True)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """
+    Returns the process-wide job queue, creating its worker pools on first use.
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+
+def shutdown_job_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is not None:
+            _queue.shutdown()
+            _queue = None
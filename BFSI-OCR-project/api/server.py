@@ -0,0 +1,137 @@
+"""
+Headless HTTP extraction service.
+
+Every endpoint queues a job and answers 202 with the job id, or 200 with the result
+when the job finishes within `wait` seconds. Poll GET /jobs/{id} for status. When too
+many jobs are pending the service answers 429 with a Retry-After header.
+
+Run from the BFSI-OCR-project directory:
+    python -m api.server --port 8000
+"""
+import argparse
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+
+import instrumentation
+from api.jobs import (
+    FINISHED_STATUSES, QueueFullError, get_job_queue, run_classify, run_document, run_filing, shutdown_job_queue,
+)
+
+# Longest a request may block waiting for its job; longer jobs are polled
+MAX_WAIT = float(os.environ.get("BFSI_API_MAX_WAIT", 60))
+MAX_UPLOAD_BYTES = int(os.environ.get("BFSI_API_MAX_UPLOAD_BYTES", 50 * 1024 * 1024))
+RETRY_AFTER_SECONDS = 5
+
+
+@asynccontextmanager
+async def lifespan(app):
+    get_job_queue()
+    yield
+    shutdown_job_queue()
+
+
+app = FastAPI(title="BFSI OCR extraction service", lifespan=lifespan)
+
+
+class FilingRequest(BaseModel):
+    url: str
+    use_cache: bool = True
+
+
+def _read_upload(upload):
+    data = upload.file.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload larger than {MAX_UPLOAD_BYTES} bytes")
+    return data
+
+
+def _submit(kind, fn, *args, io=False, wait=0.0):
+    queue = get_job_queue()
+    try:
+        job = queue.submit(kind, fn, *args, io=io)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=f"Job queue is full: {e}",
+                            headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+    if wait > 0:
+        job = queue.wait(job["id"], min(wait, MAX_WAIT))
+    status_code = 200 if job["status"] in FINISHED_STATUSES else 202
+    return JSONResponse(job, status_code=status_code, headers={"Location": f"/jobs/{job['id']}"})
+
+
+# Endpoints are plain functions, so FastAPI runs them on its thread pool and waiting never blocks the event loop
+
+@app.post("/invoice")
+def invoice(file: UploadFile = File(...), wait: float = Query(0.0, ge=0)):
+    return _submit("invoice", run_document, "invoice", _read_upload(file), file.filename, wait=wait)
+
+
+@app.post("/payslip")
+def payslip(file: UploadFile = File(...), wait: float = Query(0.0, ge=0)):
+    return _submit("payslip", run_document, "payslip", _read_upload(file), file.filename, wait=wait)
+
+
+@app.post("/profit-loss")
+def profit_loss(file: UploadFile = File(...), wait: float = Query(0.0, ge=0)):
+    return _submit("profit_loss", run_document, "profit_loss", _read_upload(file), file.filename, wait=wait)
+
+
+@app.post("/classify")
+def classify(file: UploadFile = File(...), backend: str = Query("bart"), transaction_id: str = Query(None),
+             wait: float = Query(0.0, ge=0)):
+    return _submit("classify", run_classify, _read_upload(file), file.filename, backend, transaction_id, wait=wait)
+
+
+@app.post("/filing")
+def filing(request: FilingRequest, wait: float = Query(0.0, ge=0)):
+    return _submit("filing", run_filing, request.url, request.use_cache, io=True, wait=wait)
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, wait: float = Query(0.0, ge=0)):
+    queue = get_job_queue()
+    job = queue.wait(job_id, min(wait, MAX_WAIT)) if wait > 0 else queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = get_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", **get_job_queue().stats()}
+
+
+@app.get("/metrics")
+def metrics(format: str = Query("prometheus", pattern="^(prometheus|json)$")):
+    """
+    Per-stage timings and counters of the service and its workers.
+    """
+    if format == "json":
+        return instrumentation.snapshot()
+    return PlainTextResponse(instrumentation.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the BFSI OCR extraction service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
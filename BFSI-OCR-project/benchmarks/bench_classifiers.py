@@ -0,0 +1,85 @@
+"""
+Compares throughput (rows/sec) and label agreement of the transaction classifier
+backends on a synthetic transaction dataset.
+
+The linear model is trained on keyword labels from a separate synthetic sample.
+BART only runs on a small sample (--bart-rows) since it is orders of magnitude slower;
+when it runs, agreement is measured against it, otherwise against the keyword backend.
+
+With --bart-runtimes, each BART runtime (fp32, int8, onnx) runs at the classification
+length cap and is compared, for speed and label agreement, with the previous path:
+fp32 generating up to MAX_OUTPUT_LENGTH tokens. Load times include building the int8
+or ONNX artifact when it is not cached yet.
+
+Run from the BFSI-OCR-project directory:
+    python -m benchmarks.bench_classifiers --rows 100000 --bart-rows 0
+    python -m benchmarks.bench_classifiers --rows 10000 --bart-rows 200 --bart-runtimes fp32 int8 onnx
+"""
+import argparse
+import json
+import time
+
+from benchmarks.synthetic import make_transactions, text_inputs
+from unsupervised.classifiers import BartClassifier, KeywordClassifier, LinearClassifier
+
+
+def timed_predict(classifier, texts):
+    """
+    Returns (labels, rows/sec) for one prediction pass.
+    """
+    start = time.perf_counter()
+    labels = classifier.predict(texts)
+    return labels, len(texts) / (time.perf_counter() - start)
+
+
+def agreement(labels, reference):
+    """
+    Fraction of rows on which two label lists agree.
+    """
+    return sum(a == b for a, b in zip(labels, reference)) / max(len(reference), 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark transaction classifier backends.")
+    parser.add_argument("--rows", type=int, default=100000, help="Rows classified by the fast backends")
+    parser.add_argument("--bart-rows", type=int, default=0, help="Rows classified by BART (0 to skip)")
+    parser.add_argument("--bart-runtimes", nargs="+", choices=["fp32", "int8", "onnx"], default=["fp32"],
+                        help="BART runtimes compared against the uncapped fp32 reference")
+    args = parser.parse_args(argv)
+
+    texts = text_inputs(make_transactions(args.rows, seed=1))
+    keyword = KeywordClassifier()
+    train_texts = text_inputs(make_transactions(20000, seed=2))
+    linear = LinearClassifier(model_path="").fit(train_texts, keyword.predict(train_texts))
+
+    results = {}
+    keyword_labels, results["keyword_rows_per_sec"] = timed_predict(keyword, texts)
+    linear_labels, results["linear_rows_per_sec"] = timed_predict(linear, texts)
+    results["linear_vs_keyword_agreement"] = agreement(linear_labels, keyword_labels)
+
+    if args.bart_rows:
+        from unsupervised.bart_classification import MAX_OUTPUT_LENGTH, load_bart_model
+
+        sample = texts[:args.bart_rows]
+        start = time.perf_counter()
+        load_bart_model(runtime="fp32")
+        results["bart_fp32_load_s"] = time.perf_counter() - start
+        bart_labels, results["bart_rows_per_sec"] = timed_predict(
+            BartClassifier(runtime="fp32", max_length=MAX_OUTPUT_LENGTH), sample)
+        results["keyword_vs_bart_agreement"] = agreement(keyword_labels[:args.bart_rows], bart_labels)
+        results["linear_vs_bart_agreement"] = agreement(linear_labels[:args.bart_rows], bart_labels)
+
+        for runtime in args.bart_runtimes:
+            start = time.perf_counter()
+            load_bart_model(runtime=runtime)
+            results[f"bart_{runtime}_load_s"] = time.perf_counter() - start
+            labels, results[f"bart_{runtime}_rows_per_sec"] = timed_predict(BartClassifier(runtime=runtime), sample)
+            results[f"bart_{runtime}_speedup"] = results[f"bart_{runtime}_rows_per_sec"] / results["bart_rows_per_sec"]
+            results[f"bart_{runtime}_vs_bart_agreement"] = agreement(labels, bart_labels)
+
+    print(json.dumps({k: round(v, 4) for k, v in results.items()}, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Microbenchmark of field extraction over the OCR text samples in img/*_extractedtext.csv.
+
+Compares the original per-field re.search loops against the compiled single-pass
+extractors of supervised.fields and checks that both return the same values, on the
+samples as stored and with their lines shuffled (so labels that contain other labels,
+such as "YTD NET PAY" and "NET PAY", appear in every order).
+
+    python -m benchmarks.bench_field_extraction --repeat 2000 --shuffles 50
+"""
+import argparse
+import glob
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+from supervised.fields import get_extractor
+from supervised.invoices import clean_text
+
+IMG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "img")
+
+# Sample file prefix -> document type
+SAMPLE_TYPES = {
+    "invoices": "invoice",
+    "payslips": "payslip",
+    "profit_loss": "profit_loss",
+}
+
+# Baseline: the regexes as the modules applied them before the field spec engine
+LEGACY_PAYSLIP_PATTERNS = {
+    "Employee Name": r'EMPLOYEE NAME\s+([A-Za-z\s.]+)',
+    "Employee ID": r'EMPLOYEE ID\s+(\d+)',
+    "Check No": r'CHECK NO\.\s+(\d+)',
+    "Pay Period": r'PAY PERIOD\s+([\d/-]+)',
+    "Pay Date": r'PAY DATE\s+([\d/-]+)',
+    "Gross Wages": r'GROSS WAGES\s+([\d,.]+)',
+    "Net Pay": r'NET PAY\s+([\d,.]+)',
+    "FICA MED Tax": r'FICA MED TAX\s+([\d,.]+)',
+    "FICA SS Tax": r'FICA SS TAX\s+([\d,.]+)',
+    "Federal Tax": r'FED TAX\s+([\d,.]+)',
+    "YTD Gross": r'YTD GROSS\s+([\d,.]+)',
+    "YTD Deductions": r'YTD DEDUCTIONS\s+([\d,.]+)',
+    "YTD Net Pay": r'YTD NET PAY\s+([\d,.]+)',
+}
+LEGACY_PAYSLIP_NUMERIC = ["Gross Wages", "Net Pay", "FICA MED Tax", "FICA SS Tax", "Federal Tax",
+                          "YTD Gross", "YTD Deductions", "YTD Net Pay"]
+
+LEGACY_PROFIT_LOSS_PATTERNS = {
+    "Gross Profit": r"Gross profit\s+([\d,]+)",
+    "Dividends Received": r"Dividends received\s+([\d,]+)",
+    "Profit on Sale of Machine": r"Profit on sale of machine\s+([\d,]+)",
+    "Depreciation": r"Depreciation\s+\(?([\d,]+)\)?",
+    "Interest Expense": r"Interest expense\s+\(?([\d,]+)\)?",
+    "Distribution and Admin Expenses": r"Distribution, administration and other expenses\s+\(?([\d,]+)\)?",
+    "Taxation": r"Taxation\s+\(?([\d,]+)\)?",
+    "Net Profit": r"Profit for the year after taxation\s+([\d,]+)",
+}
+
+
+def legacy_payslip(text):
+    data = {key: re.search(pattern, text) for key, pattern in LEGACY_PAYSLIP_PATTERNS.items()}
+    for key, match in data.items():
+        data[key] = match.group(1).strip() if match else None
+    for field in LEGACY_PAYSLIP_NUMERIC:
+        if data[field]:
+            data[field] = float(data[field].replace(',', ''))
+    return data
+
+
+def legacy_profit_loss(text):
+    data = {}
+    for key, pattern in LEGACY_PROFIT_LOSS_PATTERNS.items():
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            value = match.group(1).replace(",", "")
+            if "(" in match.group(0) and ")" in match.group(0):
+                value = f"-{value}"
+            data[key] = int(value)
+        else:
+            data[key] = None
+    return data
+
+
+def legacy_invoice(text):
+    lines = [clean_text(line) for line in text.split('\n') if line.strip()]
+    pattern = re.compile(r'([A-Za-z0-9\-\(\)]+)\s+\$?([\d,]+\.\d{2})\s+(\d+)\s+\$?([\d,]+\.\d{2})')
+    rows = []
+    for line in lines:
+        match = pattern.search(line)
+        if match:
+            rows.append([match.group(1).strip(), float(clean_text(match.group(2))), int(match.group(3).strip()),
+                         float(clean_text(match.group(4)))])
+    return rows
+
+
+def engine_invoice(text):
+    lines = [clean_text(line) for line in text.split('\n') if line.strip()]
+    return get_extractor("invoice").extract_rows(lines)
+
+
+LEGACY = {"invoice": legacy_invoice, "payslip": legacy_payslip, "profit_loss": legacy_profit_loss}
+ENGINE = {
+    "invoice": engine_invoice,
+    "payslip": lambda text: get_extractor("payslip").extract(text),
+    "profit_loss": lambda text: get_extractor("profit_loss").extract(text),
+}
+
+
+def load_samples(img_dir=IMG_DIR):
+    """
+    Returns (doc_type, text) pairs from the *_extractedtext.csv files.
+    """
+    samples = []
+    for path in sorted(glob.glob(os.path.join(img_dir, "*_extractedtext.csv"))):
+        prefix = os.path.basename(path)[:-len("_extractedtext.csv")]
+        if prefix in SAMPLE_TYPES:
+            for text in pd.read_csv(path)["ExtractedText"].dropna():
+                samples.append((SAMPLE_TYPES[prefix], text))
+    return samples
+
+
+def shuffled_samples(samples, shuffles, seed=0):
+    """
+    Returns `shuffles` copies of every sample with its lines in a random order.
+    """
+    rng = random.Random(seed)
+    variants = []
+    for doc_type, text in samples:
+        lines = text.split("\n")
+        for _ in range(shuffles):
+            rng.shuffle(lines)
+            variants.append((doc_type, "\n".join(lines)))
+    return variants
+
+
+def check_parity(samples):
+    """
+    Returns the number of samples on which the legacy and compiled extractors disagree.
+    """
+    return sum(LEGACY[doc_type](text) != ENGINE[doc_type](text) for doc_type, text in samples)
+
+
+def bench(functions, samples, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for doc_type, text in samples:
+            functions[doc_type](text)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark legacy vs compiled field extraction.")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--img-dir", default=IMG_DIR)
+    parser.add_argument("--shuffles", type=int, default=20, help="Line-shuffled variants per sample checked for parity")
+    args = parser.parse_args(argv)
+
+    samples = load_samples(args.img_dir)
+    variants = shuffled_samples(samples, args.shuffles)
+    mismatches = check_parity(samples) + check_parity(variants)
+    print(f"parity: {mismatches} mismatches over {len(samples)} samples and {len(variants)} shuffled variants")
+
+    # Warm up the regex caches and compiled extractors before timing
+    bench(LEGACY, samples, 1)
+    bench(ENGINE, samples, 1)
+    documents = len(samples) * args.repeat
+    for name, functions in (("legacy", LEGACY), ("engine", ENGINE)):
+        for doc_type in SAMPLE_TYPES.values():
+            subset = [sample for sample in samples if sample[0] == doc_type]
+            seconds = bench(functions, subset, args.repeat)
+            print(f"{name:7s} {doc_type:12s} {len(subset) * args.repeat / seconds:12,.0f} docs/s")
+        seconds = bench(functions, samples, args.repeat)
+        print(f"{name:7s} {'all':12s} {documents / seconds:12,.0f} docs/s")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
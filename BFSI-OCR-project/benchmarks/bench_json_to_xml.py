@@ -0,0 +1,97 @@
+"""
+Compares the streaming JSON -> XML serializer (and the matching reader) with the
+previous recursive string-concatenation json_to_xml on the bundled financial_data.json,
+reporting wall time and peak traced memory.
+
+Run from the BFSI-OCR-project directory:
+    python -m benchmarks.bench_json_to_xml
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from semi_supervised.xml_stream import read_xml, write_xml
+
+
+def legacy_json_to_xml(json_obj, line_padding=""):
+    """
+    The original recursive implementation, kept here as the baseline.
+    """
+    result_list = []
+    json_obj_type = type(json_obj)
+
+    if json_obj_type is list:
+        for sub_elem in json_obj:
+            result_list.append(legacy_json_to_xml(sub_elem, line_padding))
+        return "\n".join(result_list)
+
+    if json_obj_type is dict:
+        for tag_name in json_obj:
+            sub_obj = json_obj[tag_name]
+            result_list.append(
+                f"{line_padding}<{tag_name}>"
+                f"{legacy_json_to_xml(sub_obj, line_padding + '  ')}"
+                f"</{tag_name}>"
+            )
+        return "\n".join(result_list)
+
+    return f"{line_padding}{json_obj}"
+
+
+def measure(func):
+    """
+    Runs func once and returns (result, seconds, peak traced MiB).
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark JSON -> XML conversion.")
+    parser.add_argument("--input", default="financial_data.json")
+    args = parser.parse_args(argv)
+
+    with open(args.input) as f:
+        data = json.load(f)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.xml")
+        stream_path = os.path.join(tmp, "stream.xml")
+
+        def legacy():
+            with open(legacy_path, "w") as xml_file:
+                xml_file.write(f"<root>\n{legacy_json_to_xml(data)}\n</root>")
+
+        def stream():
+            with open(stream_path, "w", encoding="utf-8") as xml_file:
+                write_xml(data, xml_file)
+
+        def read_back():
+            with open(stream_path, "rb") as xml_file:
+                return read_xml(xml_file)
+
+        for name, func in [("legacy_write", legacy), ("stream_write", stream), ("stream_read", read_back)]:
+            result, seconds, peak = measure(func)
+            results[name] = {"seconds": round(seconds, 4), "peak_mib": round(peak, 2)}
+        results["round_trip_equal"] = result == data
+
+    # Memory of an in-memory conversion, for comparison with the file-backed stream
+    _, seconds, peak = measure(lambda: write_xml(data, io.StringIO()))
+    results["stream_write_to_string"] = {"seconds": round(seconds, 4), "peak_mib": round(peak, 2)}
+
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Measures region-of-interest OCR on the sample images in img/: regions found, share of
+page pixels sent to Tesseract, layout detection time and, with --ocr, OCR time of the
+regions against the full page.
+
+Run from the BFSI-OCR-project directory:
+    python -m benchmarks.bench_layout --ocr
+"""
+import argparse
+import json
+import os
+import time
+
+from benchmarks.bench_ocr_engines import SAMPLES
+from supervised.image_io import load_image
+from supervised.layout import LAYOUT_PROFILES, detect_regions, ocr_regions
+from supervised.ocr_engine import get_engine
+
+# Layout profile of each sample, by its directory under img/
+SAMPLE_PROFILES = {
+    "invoices": "invoice",
+    "payslips": "payslip",
+    "profit_loss": "profit_loss",
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark layout detection and region-of-interest OCR.")
+    parser.add_argument("--ocr", action="store_true", help="Also time Tesseract on the regions vs the full page")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for path, preprocess, params, config in SAMPLES:
+        profile = SAMPLE_PROFILES[os.path.basename(os.path.dirname(path))]
+        binary = preprocess(load_image(path), **params)
+        start = time.perf_counter()
+        regions = detect_regions(binary, **LAYOUT_PROFILES[profile])
+        detect_seconds = time.perf_counter() - start
+        result = {
+            "regions": len(regions),
+            "kinds": sorted({region["kind"] for region in regions}),
+            "pixel_share": round(sum(r["box"][2] * r["box"][3] for r in regions) / binary.size, 3),
+            "detect_ms": round(1000 * detect_seconds, 1),
+        }
+        if args.ocr:
+            start = time.perf_counter()
+            get_engine().image_to_string(binary, config=config)
+            result["full_page_ocr_s"] = round(time.perf_counter() - start, 3)
+            start = time.perf_counter()
+            ocr_regions(binary, regions, config)
+            result["region_ocr_s"] = round(time.perf_counter() - start, 3)
+        results[path] = result
+        print(f"{path}: {result}")
+    print(json.dumps(results))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares OCR throughput (pages/sec) of the pytesseract and tesserocr engines on the
+sample images in img/, using each document type's own preprocessing and config.
+
+Run from the BFSI-OCR-project directory:
+    python -m benchmarks.bench_ocr_engines --repeat 5
+"""
+import argparse
+import json
+import time
+
+from supervised import invoices, payslips, profit_loss
+from supervised.image_io import load_image
+from supervised.ocr_engine import ENGINES
+
+# Sample image, preprocessing function, parameters and Tesseract config per document type
+SAMPLES = [
+    ("img/invoices/invoice.png", invoices.preprocess_invoice, invoices.PREPROCESS_PARAMS, invoices.TESSERACT_CONFIG),
+    ("img/payslips/payslips.png", payslips.preprocess_payslip, payslips.PREPROCESS_PARAMS, payslips.TESSERACT_CONFIG),
+    ("img/profit_loss/profit_loss.jpg", profit_loss.preprocess_profit_loss, profit_loss.PREPROCESS_PARAMS,
+     profit_loss.TESSERACT_CONFIG),
+]
+
+
+def bench_engine(engine, pages, repeat):
+    """
+    OCRs every preprocessed page `repeat` times (after one warm-up pass) and returns pages/sec.
+    """
+    for img, config in pages:
+        engine.image_to_string(img, config=config)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for img, config in pages:
+            engine.image_to_string(img, config=config)
+    elapsed = time.perf_counter() - start
+    return len(pages) * repeat / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark OCR engines on the sample images.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the sample pages")
+    parser.add_argument("--engines", nargs="+", default=sorted(ENGINES), choices=sorted(ENGINES))
+    args = parser.parse_args(argv)
+
+    # Preprocess once up front so only the OCR call is timed
+    pages = [(preprocess(load_image(path), **params), config) for path, preprocess, params, config in SAMPLES]
+
+    results = {}
+    for name in args.engines:
+        try:
+            engine = ENGINES[name]()
+        except ValueError as e:
+            print(f"{name}: skipped ({e})")
+            continue
+        results[name] = round(bench_engine(engine, pages, args.repeat), 3)
+        print(f"{name}: {results[name]} pages/sec")
+    print(json.dumps(results))
+    return results
+
+
+if __name__ == "__main__":
+    main()
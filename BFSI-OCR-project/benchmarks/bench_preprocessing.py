@@ -0,0 +1,49 @@
+"""
+Times the shared preprocessing pipeline per stage on the sample images in img/,
+at their own size and enlarged to mimic high-resolution phone photos.
+
+Run from the BFSI-OCR-project directory:
+    python -m benchmarks.bench_preprocessing --repeat 5 --scales 1 3
+"""
+import argparse
+import json
+import time
+
+import cv2
+
+from benchmarks.bench_ocr_engines import SAMPLES
+from supervised.image_io import load_image
+from supervised.preprocessing import reset_stage_timings, stage_timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the OCR preprocessing pipeline.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 3.0],
+                        help="Sample enlargement factors (3 ~ a 12MP photo of a page)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scale in args.scales:
+        reset_stage_timings()
+        pixels = 0
+        start = time.perf_counter()
+        for path, preprocess, params, _ in SAMPLES:
+            img = load_image(path)
+            if scale != 1.0:
+                img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+            for _ in range(args.repeat):
+                out = preprocess(img, **params)
+            print(f"x{scale:g} {path}: {img.shape[1]}x{img.shape[0]} -> {out.shape[1]}x{out.shape[0]}")
+            pixels += out.size
+        elapsed = time.perf_counter() - start
+        results[f"x{scale:g}"] = {
+            "pages_per_sec": round(len(SAMPLES) * args.repeat / elapsed, 3),
+            "stages": stage_timings(),
+        }
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Reproducible benchmark suite: throughput and peak RSS of the OCR, classification,
+clustering and XML export paths over synthetic inputs of growing size.
+
+Every case and size runs in a fresh process, so peak RSS is that of the case alone.
+Results are written as a JSON baseline that later runs are compared against; a
+throughput drop or RSS growth beyond --tolerance is reported as a regression and
+makes the run exit with status 1.
+
+The OCR cases need the tesseract binary; the OCR cache is turned off so every page
+is OCRed. Classification uses the keyword backend, so the suite runs offline.
+
+Run from the BFSI-OCR-project directory:
+    python -m benchmarks.suite --preset quick --save benchmarks/baseline.json
+    python -m benchmarks.suite --preset quick --compare benchmarks/baseline.json
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+from benchmarks.synthetic import make_documents, make_filing, make_transactions
+
+# Input sizes per preset: documents for the OCR cases, rows (or facts) for the others
+PRESETS = {
+    "quick": {"docs": [1, 10], "rows": [1000, 10000]},
+    "standard": {"docs": [1, 10, 100], "rows": [1000, 10000, 100000]},
+    "full": {"docs": [1, 10, 100, 1000, 10000], "rows": [1000, 10000, 100000, 1000000]},
+}
+# Distinct pages rendered per OCR case; larger runs cycle through them
+DISTINCT_PAGES = 20
+DEFAULT_TOLERANCE = 0.2
+# Cases are re-run until they have taken this long in total (at most MAX_REPEATS runs); the best run is reported
+MIN_SECONDS = 1.0
+MAX_REPEATS = 5
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def _extracted(result):
+    """
+    Whether a processor found anything: line items, or at least one field value.
+    """
+    if isinstance(result, dict):
+        return "error" not in result and any(value is not None for value in result.values())
+    if "Value" in result.columns:
+        return bool(result["Value"].notna().any())
+    return len(result) > 0
+
+
+def _document_case(doc_type):
+    def setup(size):
+        from supervised import ocr_cache
+
+        ocr_cache.CACHE_ENABLED = False
+        return [image for image, _ in make_documents(doc_type, min(size, DISTINCT_PAGES))]
+
+    def run(pages, size):
+        from supervised.invoices import extract_invoice_data
+        from supervised.payslips import extract_payslip_data
+        from supervised.profit_loss import process_profit_loss
+
+        extract = {"invoice": extract_invoice_data, "payslip": extract_payslip_data,
+                   "profit_loss": process_profit_loss}[doc_type]
+        succeeded = 0
+        for i in range(size):
+            if _extracted(extract(pages[i % len(pages)])):
+                succeeded += 1
+        return succeeded
+
+    return "docs", setup, run
+
+
+def _classify_setup(size):
+    buffer = io.StringIO()
+    make_transactions(size, seed=size).to_csv(buffer, index=False)
+    return buffer.getvalue().encode()
+
+
+def _classify_run(data, size):
+    from unsupervised.bart_classification import classify_data
+
+    file = io.BytesIO(data)
+    file.name = "transactions.csv"
+    return len(classify_data(file, backend="keyword"))
+
+
+def _kmeans_setup(size):
+    from preload import load_backend
+
+    # Import sklearn outside the timed runs
+    load_backend("kmeans", warm=True)
+    return make_transactions(size, seed=size)
+
+
+def _kmeans_run(data, size):
+    from unsupervised import clustering
+    from unsupervised.bart_classification import categorize_data_with_kmeans
+
+    # Fits are memoized by data hash; every run must fit
+    with clustering._cache_lock:
+        clustering._cache.clear()
+
+    return len(categorize_data_with_kmeans(data, n_clusters=5, features=("log_amount", "day_of_week")))
+
+
+def _json_to_xml_run(filing, size):
+    from semi_supervised.xml_stream import json_to_xml
+
+    json_to_xml(filing)
+    return size
+
+
+def _write_xml_run(filing, size):
+    from semi_supervised.xml_stream import write_xml
+
+    with open(os.devnull, "w", encoding="utf-8") as fp:
+        write_xml(filing, fp)
+    return size
+
+
+# name -> (size kind, setup(size) -> payload, run(payload, size) -> items that succeeded); setup is not timed
+CASES = {
+    "extract_invoice_data": _document_case("invoice"),
+    "extract_payslip_data": _document_case("payslip"),
+    "process_profit_loss": _document_case("profit_loss"),
+    "classify_data": ("rows", _classify_setup, _classify_run),
+    "categorize_data_with_kmeans": ("rows", _kmeans_setup, _kmeans_run),
+    "json_to_xml": ("rows", make_filing, _json_to_xml_run),
+    "write_xml": ("rows", make_filing, _write_xml_run),
+}
+
+
+def run_case(name, size):
+    """
+    Runs one case at one size in the current process and returns its measurements.
+    """
+    kind, setup, run = CASES[name]
+    result = {"case": name, "size": size, "unit": kind}
+    try:
+        payload = setup(size)
+        result["setup_rss_mb"] = _peak_rss_mb()
+        runs, total, seconds = 0, 0.0, None
+        while runs == 0 or (runs < MAX_REPEATS and total < MIN_SECONDS):
+            start = time.perf_counter()
+            succeeded = run(payload, size)
+            elapsed = time.perf_counter() - start
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+            total += elapsed
+            runs += 1
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+    result.update(
+        runs=runs,
+        seconds=round(seconds, 4),
+        throughput=round(size / seconds, 3),
+        succeeded=succeeded,
+        peak_rss_mb=_peak_rss_mb(),
+    )
+    if succeeded < size:
+        result["error"] = f"{size - succeeded} of {size} items failed"
+    return result
+
+
+def run_isolated(name, size):
+    """
+    Runs a case in a fresh interpreter, so imports, caches and peak RSS don't leak between cases.
+    """
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_case, (name, size))
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares results with a baseline of the same format.
+
+    Returns:
+        list: Regression messages for cases that now fail, or whose throughput fell or
+        peak RSS grew by more than `tolerance` (a fraction).
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if "error" in current and "error" not in previous:
+            regressions.append(f"{key}: now failing ({current['error']})")
+            continue
+        if "error" in previous or "throughput" not in current:
+            continue
+        if current["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {current['throughput']} < baseline {previous['throughput']}")
+        if current.get("peak_rss_mb") and previous.get("peak_rss_mb") \
+                and current["peak_rss_mb"] > previous["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{key}: peak RSS {current['peak_rss_mb']} MB > baseline {previous['peak_rss_mb']} MB")
+    return regressions
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite over synthetic inputs.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=sorted(CASES))
+    parser.add_argument("--save", help="Write the results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="Compare against a JSON baseline written by --save")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed throughput drop / RSS growth before a regression is reported")
+    args = parser.parse_args(argv)
+
+    sizes = PRESETS[args.preset]
+    results = {}
+    for name in args.cases:
+        for size in sizes[CASES[name][0]]:
+            result = run_isolated(name, size)
+            results[f"{name}/{size}"] = result
+            print(json.dumps(result))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"environment": environment(), "preset": args.preset, "results": results}, f, indent=2)
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        print(f"{len(regressions)} regression(s) against {args.compare}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
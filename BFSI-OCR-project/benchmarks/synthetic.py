@@ -0,0 +1,172 @@
+"""
+Synthetic transactions, filings and rendered document pages used by the benchmarks.
+"""
+import cv2
+import numpy as np
+import pandas as pd
+
+# Merchant strings, roughly as they appear on card and bank statements
+MERCHANTS = [
+    "STARBUCKS", "MCDONALD'S", "DOMINO'S PIZZA", "SWIGGY ORDER", "ZOMATO ONLINE", "UBER TRIP", "UBER EATS",
+    "LYFT RIDE", "SHELL OIL", "CHEVRON FUEL", "WALMART SUPERCENTER", "COSTCO WHOLESALE", "WHOLE FOODS MARKET",
+    "TRADER JOE'S", "AMAZON MKTPLACE", "FLIPKART INTERNET", "TARGET STORE", "BEST BUY", "NETFLIX.COM",
+    "SPOTIFY USA", "DISNEY PLUS", "CVS PHARMACY", "WALGREENS", "APOLLO PHARMACY", "GEICO INSURANCE",
+    "LIC PREMIUM", "RENT PAYMENT", "MORTGAGE PMT", "PAYROLL ACME CORP SALARY", "DIVIDEND CREDIT",
+    "NEFT TRANSFER", "UPI TRANSFER", "ZELLE TRANSFER", "ATM CASH WITHDRAWAL", "OVERDRAFT FEE",
+    "SERVICE CHARGE", "COMCAST CABLE INTERNET", "ELECTRICITY BILL", "AIRTEL MOBILE RECHARGE",
+    "DELTA AIRLINES", "MARRIOTT HOTEL", "AIRBNB", "IRCTC TICKET", "ACME HARDWARE", "JOE'S BARBER SHOP",
+]
+
+
+def make_transactions(n_rows, n_merchants=None, seed=42):
+    """
+    Generates a transaction DataFrame with the columns classify_data expects.
+
+    Descriptions combine a merchant with a reference number drawn from a small pool,
+    so, like real feeds, the same strings recur many times.
+    """
+    rng = np.random.default_rng(seed)
+    merchants = MERCHANTS[:n_merchants] if n_merchants else MERCHANTS
+    merchant = rng.choice(merchants, size=n_rows)
+    reference = rng.integers(1000, 1050, size=n_rows)
+    description = pd.Series(merchant).str.cat(pd.Series(reference).astype(str), sep=" #")
+    amount = np.round(rng.lognormal(mean=3.5, sigma=1.2, size=n_rows), 2)
+    date = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, size=n_rows), unit="D")
+    return pd.DataFrame({
+        "Transaction_ID": np.arange(1, n_rows + 1),
+        "Description": description,
+        "Amount": amount,
+        "Date": date.strftime("%Y-%m-%d"),
+    })
+
+
+def text_inputs(transactions):
+    """
+    Builds the Text_Input strings classify_data feeds to the classifier backends.
+    """
+    return (transactions["Description"] + " - " + transactions["Amount"].astype(str)).tolist()
+
+
+# Page size of the rendered documents: US letter at 150 dpi
+PAGE_SIZE = (1650, 1275)
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+ITEMS = ["Consulting", "Hosting", "License", "Support", "Training", "Hardware", "Cabling", "Audit", "Design"]
+NAMES = ["JOHN SMITH", "PRIYA SHARMA", "MARIA GARCIA", "CHEN WEI", "AMIT PATEL", "SARAH JONES"]
+
+
+def _page(lines, columns=(80, 700)):
+    """
+    Renders rows of cell texts onto a blank page, one cell per column position.
+    """
+    img = np.full(PAGE_SIZE + (3,), 255, np.uint8)
+    y = 120
+    for cells in lines:
+        for x, cell in zip(columns, cells):
+            cv2.putText(img, cell, (x, y), FONT, 0.9, (0, 0, 0), 2, cv2.LINE_AA)
+        y += 48
+    return img
+
+
+def render_invoice(seed=0, n_items=6):
+    """
+    Renders an invoice page with a line-item table.
+
+    Returns:
+        tuple: (BGR image, expected [description, rate, qty, line total] rows)
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for description in rng.choice(ITEMS, size=n_items, replace=False):
+        rate = round(float(rng.uniform(10, 900)), 2)
+        qty = int(rng.integers(1, 20))
+        rows.append([str(description), rate, qty, round(rate * qty, 2)])
+    lines = [["INVOICE #" + str(rng.integers(10000, 99999))], [], ["Description", "Rate", "Qty", "Line Total"]]
+    lines += [[d, f"${r:,.2f}", str(q), f"${t:,.2f}"] for d, r, q, t in rows]
+    lines += [[], ["Total", "", "", f"${sum(row[3] for row in rows):,.2f}"]]
+    return _page(lines, columns=(80, 520, 800, 950)), rows
+
+
+def render_payslip(seed=0):
+    """
+    Renders a payslip page of label/value lines.
+
+    Returns:
+        tuple: (BGR image, expected {label: value})
+    """
+    rng = np.random.default_rng(seed)
+    gross = round(float(rng.uniform(2000, 9000)), 2)
+    med, ss, fed = round(gross * 0.0145, 2), round(gross * 0.062, 2), round(gross * 0.12, 2)
+    fields = {
+        "EMPLOYEE NAME": str(rng.choice(NAMES)),
+        "EMPLOYEE ID": str(rng.integers(100000, 999999)),
+        "CHECK NO.": str(rng.integers(1000, 9999)),
+        "PAY PERIOD": "01/01/2024-01/15/2024",
+        "PAY DATE": "01/20/2024",
+        "GROSS WAGES": f"{gross:,.2f}",
+        "FICA MED TAX": f"{med:,.2f}",
+        "FICA SS TAX": f"{ss:,.2f}",
+        "FED TAX": f"{fed:,.2f}",
+        "NET PAY": f"{gross - med - ss - fed:,.2f}",
+    }
+    return _page([[label, value] for label, value in fields.items()]), fields
+
+
+def render_profit_loss(seed=0):
+    """
+    Renders a Profit & Loss statement page; expenses are shown in parentheses.
+
+    Returns:
+        tuple: (BGR image, expected {label: signed value})
+    """
+    rng = np.random.default_rng(seed)
+    values = {
+        "Gross profit": int(rng.integers(100000, 900000)),
+        "Dividends received": int(rng.integers(1000, 50000)),
+        "Profit on sale of machine": int(rng.integers(1000, 20000)),
+        "Depreciation": -int(rng.integers(5000, 50000)),
+        "Interest expense": -int(rng.integers(1000, 20000)),
+        "Taxation": -int(rng.integers(10000, 90000)),
+    }
+    values["Profit for the year after taxation"] = sum(values.values())
+    lines = [["Profit and Loss Statement"], []]
+    lines += [[label, f"({-value:,})" if value < 0 else f"{value:,}"] for label, value in values.items()]
+    return _page(lines), values
+
+
+DOCUMENT_RENDERERS = {
+    "invoice": render_invoice,
+    "payslip": render_payslip,
+    "profit_loss": render_profit_loss,
+}
+
+
+def make_documents(doc_type, n_docs, seed=42):
+    """
+    Lazily yields `n_docs` rendered (image, expected) pairs of a document type, each
+    with different contents, so large runs don't hold every page in memory.
+    """
+    render = DOCUMENT_RENDERERS[doc_type]
+    for i in range(n_docs):
+        yield render(seed + i)
+
+
+def make_filing(n_facts, n_statements=10, seed=42):
+    """
+    Generates an XBRL-to-JSON style filing, {statement: {concept: [fact, ...]}},
+    shaped like financial_data.json, with `n_facts` facts in total.
+    """
+    rng = np.random.default_rng(seed)
+    filing = {}
+    for i in range(n_facts):
+        statement = filing.setdefault(f"Statement{i % n_statements}", {})
+        concept = statement.setdefault(f"Concept{(i // n_statements) % 50}", [])
+        fact = {
+            "decimals": "-6",
+            "unitRef": "usd",
+            "period": {"startDate": "2023-01-01", "endDate": "2023-12-31"},
+            "value": str(int(rng.integers(1, 10 ** 9)) * 1000),
+        }
+        if i % 3 == 0:
+            fact["segment"] = {"dimension": "srt:ProductOrServiceAxis", "value": f"us-gaap:Product{i % 7}Member"}
+        concept.append(fact)
+    return filing
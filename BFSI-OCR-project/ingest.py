@@ -0,0 +1,432 @@
+"""
+Resumable, incremental ingestion of documents and SEC filings.
+
+A SQLite ledger records every source (document path or filing URL) with its
+content hash, type, status, attempts, timings and output location. Each run only
+processes what is new or changed since the last one:
+
+- documents whose size and mtime match the ledger are not even re-hashed;
+- documents whose content hash is unchanged and whose output exists are skipped;
+- a document with the same content and type as one already processed (a copy)
+  reuses that output;
+- failed documents are retried until they have failed MAX_ATTEMPTS times (or always
+  with retry_failed); editing the file resets the count.
+
+Sources are marked "running" before processing and finished one at a time, so a
+run killed halfway resumes where it stopped: the next run retries whatever is
+still marked running. Only failures count as attempts, so sources a killed run
+never got to are not charged for it. Document outputs are JSON files named by content hash under
+the output directory; filings go to the fact store.
+
+Run from the BFSI-OCR-project directory:
+    python -m ingest img/ out/                  # one incremental run
+    python -m ingest manifest.csv out/          # repeated manifests work the same way
+    python -m ingest img/ out/ --watch --interval 60
+    python -m ingest --filings filings.csv      # CSV with a url column
+    python -m ingest --status
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+
+# Location of the ingestion ledger
+LEDGER_PATH = os.environ.get(
+    "BFSI_LEDGER_PATH", os.path.join(os.path.expanduser("~"), ".cache", "bfsi-ocr", "ingest_ledger.sqlite3")
+)
+# Failed attempts after which a source is left alone until it changes (or retry_failed is set)
+MAX_ATTEMPTS = int(os.environ.get("BFSI_INGEST_MAX_ATTEMPTS", 3))
+# Seconds between runs in watch mode
+WATCH_INTERVAL = float(os.environ.get("BFSI_INGEST_WATCH_INTERVAL", 60))
+# Files modified more recently than this may still be being written; watch mode leaves them for the next run
+SETTLE_SECONDS = 2.0
+
+class Ledger:
+    """
+    SQLite table of ingested sources, one row per document path or filing URL.
+    Safe to share between threads; separate processes each open their own connection.
+    """
+    def __init__(self, path=LEDGER_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                "source TEXT PRIMARY KEY, kind TEXT NOT NULL, doc_type TEXT, content_hash TEXT, size INTEGER, "
+                "mtime REAL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, error TEXT, "
+                "seconds REAL, output TEXT, updated_at REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS sources_hash ON sources (content_hash, doc_type)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS sources_status ON sources (status)")
+
+    def get(self, source):
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM sources WHERE source = ?", (source,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def find_output(self, content_hash, doc_type):
+        """
+        Returns the output of a succeeded source with this content and type, or None.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT output FROM sources WHERE content_hash = ? AND doc_type = ? AND status = 'ok'",
+                (content_hash, doc_type),
+            ).fetchall()
+        for row in rows:
+            if row["output"] and os.path.exists(row["output"]):
+                return row["output"]
+        return None
+
+    def start(self, entries):
+        """
+        Marks sources as running, in one transaction. `entries` are dicts with source,
+        kind, doc_type, content_hash, size and mtime; a changed content hash resets the
+        failed attempt count. Attempts are counted when a source fails (see finish()).
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            for entry in entries:
+                self.conn.execute(
+                    "INSERT INTO sources (source, kind, doc_type, content_hash, size, mtime, status, attempts, updated_at) "
+                    "VALUES (:source, :kind, :doc_type, :content_hash, :size, :mtime, 'running', 0, :now) "
+                    "ON CONFLICT (source) DO UPDATE SET "
+                    "attempts = CASE WHEN content_hash IS excluded.content_hash AND doc_type IS excluded.doc_type "
+                    "THEN attempts ELSE 0 END, "
+                    "kind = excluded.kind, doc_type = excluded.doc_type, content_hash = excluded.content_hash, "
+                    "size = excluded.size, mtime = excluded.mtime, status = 'running', error = NULL, "
+                    "updated_at = excluded.updated_at",
+                    {**entry, "now": now},
+                )
+
+    def finish(self, source, status, error=None, seconds=None, output=None, content_hash=None):
+        """
+        Records the outcome of a source; a failure counts one attempt, a success clears the count.
+        """
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE sources SET attempts = CASE WHEN ? = 'failed' THEN attempts + 1 ELSE 0 END, "
+                "status = ?, error = ?, seconds = ?, output = ?, "
+                "content_hash = COALESCE(?, content_hash), updated_at = ? WHERE source = ?",
+                (status, status, error, seconds, output, content_hash, time.time(), source),
+            )
+
+    def record(self, entry, status, output=None):
+        """
+        Inserts or replaces a source that finished without processing (e.g. a copy of a processed document).
+        """
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sources (source, kind, doc_type, content_hash, size, mtime, status, "
+                "attempts, seconds, output, updated_at) "
+                "VALUES (:source, :kind, :doc_type, :content_hash, :size, :mtime, :status, 0, 0, :output, :now)",
+                {**entry, "status": status, "output": output, "now": time.time()},
+            )
+
+    def status_counts(self):
+        """
+        Returns {(kind, status): number of sources}.
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT kind, status, COUNT(*) FROM sources GROUP BY kind, status").fetchall()
+        return {(kind, status): count for kind, status, count in rows}
+
+    def failures(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT source, doc_type, attempts, error FROM sources WHERE status != 'ok' ORDER BY source"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """
+    SHA-256 of a file's content, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json(path, data):
+    # Temp file and atomic rename, so an interrupted run never leaves a partial output behind
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _should_skip(row, content_hash, doc_type, max_attempts, retry_failed):
+    """
+    Reason to skip a source given its ledger row, or None when it must be processed.
+    """
+    if row is None or row["content_hash"] != content_hash or row["doc_type"] != doc_type:
+        return None
+    if row["status"] == "ok" and (row["output"] is None or os.path.exists(row["output"])):
+        return "unchanged"
+    # Rows left "running" by an interrupted run are always resumed
+    if row["status"] == "failed" and row["attempts"] >= max_attempts and not retry_failed:
+        return "gave_up"
+    return None
+
+
+def plan_documents(documents, ledger, max_attempts=MAX_ATTEMPTS, retry_failed=False, settle=0.0):
+    """
+    Splits (path, doc_type) pairs into work to do and work to skip.
+
+    Returns:
+        tuple: (entries to process, entries reusing another document's output,
+        {path: skip reason}).
+    """
+    now = time.time()
+    todo, copies, skipped = [], [], {}
+    for path, doc_type in documents:
+        source = os.path.abspath(path)
+        entry = {"source": source, "kind": "document", "doc_type": doc_type,
+                 "content_hash": None, "size": None, "mtime": None}
+        row = ledger.get(source)
+        try:
+            stat = os.stat(source)
+        except OSError:
+            # Processed anyway, so the missing file is recorded as a failure
+            todo.append(entry)
+            continue
+        if settle and now - stat.st_mtime < settle:
+            skipped[source] = "settling"
+            continue
+        entry.update(size=stat.st_size, mtime=stat.st_mtime)
+        if row is not None and row["content_hash"] and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+            # Same size and mtime as last time: trust the recorded hash instead of re-reading the file
+            entry["content_hash"] = row["content_hash"]
+        else:
+            entry["content_hash"] = file_hash(source)
+        reason = _should_skip(row, entry["content_hash"], doc_type, max_attempts, retry_failed)
+        if reason:
+            skipped[source] = reason
+        elif doc_type is not None and ledger.find_output(entry["content_hash"], doc_type):
+            copies.append(entry)
+        else:
+            todo.append(entry)
+    return todo, copies, skipped
+
+
+def output_path(output_dir, doc_type, content_hash):
+    return os.path.join(output_dir, doc_type or "unknown", f"{content_hash}.json")
+
+
+def ingest(input_path, output_dir, doc_type=None, workers=None, ledger=None, max_attempts=MAX_ATTEMPTS,
+           retry_failed=False, settle=0.0):
+    """
+    Processes the new, changed and retryable documents under a directory or manifest
+    (see supervised.batch.discover_documents) and records them in the ledger.
+
+    Args:
+        input_path (str): Directory, CSV manifest or single document path.
+        output_dir (str): Directory receiving one JSON output per document content.
+        doc_type (str): Forces a document type instead of inferring it per path.
+        workers (int): Size of the process pool (defaults to the number of cores).
+        ledger (Ledger): Ledger to use (defaults to one at LEDGER_PATH).
+        max_attempts (int): Failed attempts after which a document is skipped until it changes.
+        retry_failed (bool): Retry failed documents regardless of their attempts.
+        settle (float): Skip files modified less than this many seconds ago.
+
+    Returns:
+        dict: Run summary with totals, skip reasons and per-document failures.
+    """
+    from supervised.batch import discover_documents, iter_batch
+
+    ledger = ledger or Ledger()
+    todo, copies, skipped = plan_documents(discover_documents(input_path, doc_type), ledger,
+                                           max_attempts=max_attempts, retry_failed=retry_failed, settle=settle)
+    summary = {"total": len(todo) + len(copies) + len(skipped), "processed": 0, "succeeded": 0, "failed": 0,
+               "copied": len(copies), "skipped": {}, "failures": []}
+    for reason in skipped.values():
+        summary["skipped"][reason] = summary["skipped"].get(reason, 0) + 1
+        instrumentation.inc("ingest_skipped_total", reason=reason)
+
+    for entry in copies:
+        ledger.record(entry, "ok", output=ledger.find_output(entry["content_hash"], entry["doc_type"]))
+
+    entries = {entry["source"]: entry for entry in todo}
+    ledger.start(todo)
+    for outcome in iter_batch([(entry["source"], entry["doc_type"]) for entry in todo], workers=workers):
+        entry = entries[outcome["document"]]
+        summary["processed"] += 1
+        if outcome["status"] == "ok":
+            path = output_path(output_dir, entry["doc_type"], entry["content_hash"])
+            _write_json(path, {"document": entry["source"], "doc_type": entry["doc_type"],
+                               "content_hash": entry["content_hash"], "records": outcome["records"]})
+            ledger.finish(entry["source"], "ok", seconds=outcome["seconds"], output=path)
+            summary["succeeded"] += 1
+        else:
+            ledger.finish(entry["source"], "failed", error=outcome["error"], seconds=outcome["seconds"])
+            summary["failed"] += 1
+            summary["failures"].append({"document": entry["source"], "error": outcome["error"]})
+            logging.warning(f"Failed to process {entry['source']}: {outcome['error']}")
+    return summary
+
+
+def ingest_filings(filing_urls, ledger=None, store=None, max_attempts=MAX_ATTEMPTS, retry_failed=False,
+                   use_cache=True, max_concurrency=None):
+    """
+    Fetches the filings not yet in the ledger (or failed and retryable) and loads their
+    facts into the fact store. A filing's content hash is that of its XBRL JSON.
+
+    Returns:
+        dict: Run summary with totals and per-filing failures.
+    """
+    from semi_supervised.fact_store import get_fact_store
+    from semi_supervised.fetcher import MAX_CONCURRENCY, ResponseCache, fetch_filing
+
+    ledger = ledger or Ledger()
+    store = store or get_fact_store()
+    todo, skipped = [], {}
+    for url in dict.fromkeys(filing_urls):
+        row = ledger.get(url)
+        # Filings don't change once filed: a loaded filing is never fetched again
+        reason = _should_skip(row, row and row["content_hash"], "xbrl", max_attempts, retry_failed)
+        if reason:
+            skipped[reason] = skipped.get(reason, 0) + 1
+            instrumentation.inc("ingest_skipped_total", reason=reason)
+            continue
+        # Keep the recorded hash so earlier failures still count against the same content
+        todo.append({"source": url, "kind": "filing", "doc_type": "xbrl",
+                     "content_hash": row["content_hash"] if row else None, "size": None, "mtime": None})
+    summary = {"total": len(todo) + sum(skipped.values()), "processed": len(todo), "succeeded": 0, "failed": 0,
+               "skipped": skipped, "failures": []}
+
+    cache = ResponseCache() if use_cache else None
+
+    def fetch(url):
+        start = time.perf_counter()
+        return fetch_filing(url, use_cache=use_cache, cache=cache), time.perf_counter() - start
+
+    ledger.start(todo)
+    with ThreadPoolExecutor(max_workers=max_concurrency or MAX_CONCURRENCY) as executor:
+        for entry, (data, seconds) in zip(todo, executor.map(fetch, [entry["source"] for entry in todo])):
+            url = entry["source"]
+            if "error" in data:
+                ledger.finish(url, "failed", error=data["error"], seconds=round(seconds, 4))
+                summary["failed"] += 1
+                summary["failures"].append({"document": url, "error": data["error"]})
+                logging.warning(f"Failed to fetch {url}: {data['error']}")
+                continue
+            store.add_filing(url, data)
+            content_hash = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+            ledger.finish(url, "ok", seconds=round(seconds, 4), output=store.path, content_hash=content_hash)
+            summary["succeeded"] += 1
+    return summary
+
+
+def read_filing_manifest(path):
+    """
+    Reads filing URLs from a CSV with a "url" column.
+    """
+    with open(path, newline="") as manifest:
+        return [row["url"] for row in csv.DictReader(manifest) if row.get("url")]
+
+
+def watch(input_path, output_dir, interval=WATCH_INTERVAL, max_runs=None, **kwargs):
+    """
+    Runs ingest() every `interval` seconds until interrupted (or for `max_runs` runs),
+    leaving files that are still being written for the next run.
+    """
+    kwargs.setdefault("settle", SETTLE_SECONDS)
+    runs = 0
+    try:
+        while max_runs is None or runs < max_runs:
+            summary = ingest(input_path, output_dir, **kwargs)
+            runs += 1
+            if summary["processed"] or summary["copied"]:
+                logging.info(_format_summary(summary))
+            if max_runs is None or runs < max_runs:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    return runs
+
+
+def _format_summary(summary):
+    skipped = ", ".join(f"{count} {reason}" for reason, count in sorted(summary["skipped"].items())) or "none"
+    copied = f"{summary['copied']} copies reused, " if "copied" in summary else ""
+    return (f"{summary['total']} sources: {summary['processed']} processed ({summary['succeeded']} succeeded, "
+            f"{summary['failed']} failed), {copied}skipped: {skipped}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally ingest documents and filings, resuming from a ledger.")
+    parser.add_argument("input", nargs="?", help="Directory of documents or CSV manifest with path[,doc_type] columns")
+    parser.add_argument("output_dir", nargs="?", help="Directory for the per-document JSON outputs")
+    parser.add_argument("--doc-type", default=None, help="Force a document type for every input")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: number of cores)")
+    parser.add_argument("--ledger", default=LEDGER_PATH, help="Ledger database path")
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS,
+                        help="Skip sources that failed this many times until they change")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry failed sources regardless of attempts")
+    parser.add_argument("--filings", default=None, help="CSV manifest of SEC filing URLs (url column) to ingest")
+    parser.add_argument("--watch", action="store_true", help="Keep running, re-scanning the input every --interval seconds")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL)
+    parser.add_argument("--status", action="store_true", help="Print ledger counts and failures, then exit")
+    args = parser.parse_args(argv)
+
+    if args.input and not args.output_dir:
+        parser.error("an output directory is required with an input")
+    if not (args.input or args.filings or args.status):
+        parser.error("nothing to do: give an input and output directory, --filings or --status")
+
+    ledger = Ledger(args.ledger)
+    if args.status:
+        for (kind, status), count in sorted(ledger.status_counts().items()):
+            print(f"{kind:10} {status:8} {count}")
+        for failure in ledger.failures():
+            print(f"  {failure['source']} ({failure['attempts']} attempts): {failure['error']}")
+        return 0
+
+    failed = 0
+    if args.filings:
+        summary = ingest_filings(read_filing_manifest(args.filings), ledger=ledger, max_attempts=args.max_attempts,
+                                 retry_failed=args.retry_failed)
+        print(f"Filings: {_format_summary(summary)}")
+        failed += summary["failed"]
+    if args.input:
+        options = dict(doc_type=args.doc_type, workers=args.workers, ledger=ledger,
+                       max_attempts=args.max_attempts, retry_failed=args.retry_failed)
+        if args.watch:
+            logging.basicConfig(level=logging.INFO)
+            watch(args.input, args.output_dir, interval=args.interval, **options)
+            return 0
+        summary = ingest(args.input, args.output_dir, **options)
+        print(f"Documents: {_format_summary(summary)}")
+        for failure in summary["failures"]:
+            print(f"  {failure['document']}: {failure['error']}")
+        failed += summary["failed"]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
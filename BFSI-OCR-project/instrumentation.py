@@ -0,0 +1,286 @@
+"""
+Lightweight in-process metrics: counters and latency histograms, recorded with the
+timer() context manager or the timed() decorator and exported as Prometheus text or JSON.
+
+Recording is on unless BFSI_METRICS=0; when off, timer() hands back a shared no-op
+context manager and inc()/observe() return straight away.
+
+Metrics live in the process that recorded them. Work run on a process pool is
+wrapped with run_collecting(), and the parent merges the returned snapshot.
+"""
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+METRICS_ENABLED = os.environ.get("BFSI_METRICS", "1") != "0"
+# Prefix of exported Prometheus metric names
+METRICS_PREFIX = "bfsi_"
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_NULL_TIMER = nullcontext()
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Registry:
+    """
+    Thread-safe store of counters and fixed-bucket histograms, keyed by metric name and labels.
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        # (name, labels) -> [per-bucket counts (last one is +Inf), count, sum]
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name, value=1, labels=None):
+        key = _key(name, labels or {})
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=None):
+        key = _key(name, labels or {})
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            histogram[0][index] += 1
+            histogram[1] += 1
+            histogram[2] += value
+
+    def snapshot(self):
+        """
+        Returns all series as plain JSON-serializable data.
+        """
+        with self.lock:
+            return {
+                "buckets": list(self.buckets),
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in self.counters.items()],
+                "histograms": [{"name": name, "labels": dict(labels), "bucket_counts": list(counts),
+                                "count": count, "sum": total}
+                               for (name, labels), (counts, count, total) in self.histograms.items()],
+            }
+
+    def merge(self, snapshot):
+        """
+        Adds the series of a snapshot (e.g. from a worker process) into this registry.
+        """
+        if tuple(snapshot["buckets"]) != self.buckets:
+            raise ValueError("Cannot merge histograms recorded with different buckets.")
+        with self.lock:
+            for series in snapshot["counters"]:
+                key = _key(series["name"], series["labels"])
+                self.counters[key] = self.counters.get(key, 0) + series["value"]
+            for series in snapshot["histograms"]:
+                key = _key(series["name"], series["labels"])
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+                histogram[0] = [a + b for a, b in zip(histogram[0], series["bucket_counts"])]
+                histogram[1] += series["count"]
+                histogram[2] += series["sum"]
+
+    def reset(self, name=None):
+        """
+        Drops every series, or only those of metric `name`.
+        """
+        with self.lock:
+            if name is None:
+                self.counters.clear()
+                self.histograms.clear()
+                return
+            for series in (self.counters, self.histograms):
+                for key in [key for key in series if key[0] == name]:
+                    del series[key]
+
+
+_registry = Registry()
+_enabled = METRICS_ENABLED
+
+
+def get_registry():
+    return _registry
+
+
+def enabled():
+    return _enabled
+
+
+def set_enabled(flag):
+    """
+    Turns recording on or off for this process.
+    """
+    global _enabled
+    _enabled = bool(flag)
+
+
+def inc(name, value=1, **labels):
+    """
+    Adds `value` to a counter.
+    """
+    if _enabled:
+        _registry.inc(name, value, labels)
+
+
+def observe(name, value, **labels):
+    """
+    Records one observation (in seconds) into a histogram.
+    """
+    if _enabled:
+        _registry.observe(name, value, labels)
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _registry.observe(self.name, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+def timer(name, **labels):
+    """
+    Context manager recording the duration of its block into the `name` histogram.
+    """
+    return _Timer(name, labels) if _enabled else _NULL_TIMER
+
+
+def timed(name, **labels):
+    """
+    Decorator recording the duration of each call into the `name` histogram.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _registry.observe(name, time.perf_counter() - start, labels)
+        return wrapper
+    return decorator
+
+
+def run_collecting(fn, *args):
+    """
+    Runs fn(*args) in a process pool worker and returns (result, snapshot of the
+    metrics it recorded), for the parent to merge(). The worker's registry is
+    emptied first: each task reports only its own metrics. When fn raises, the
+    snapshot travels on the exception as its `metrics` attribute.
+    """
+    _registry.reset()
+    try:
+        result = fn(*args)
+    except Exception as e:
+        e.metrics = _registry.snapshot()
+        raise
+    return result, _registry.snapshot()
+
+
+def merge(snapshot):
+    _registry.merge(snapshot)
+
+
+def snapshot():
+    return _registry.snapshot()
+
+
+def reset(name=None):
+    _registry.reset(name)
+
+
+def _quantile(buckets, counts, count, q):
+    # Upper bound of the bucket holding the q-th observation; +Inf spills report the last bound
+    rank = q * count
+    seen = 0
+    for bound, bucket_count in zip(buckets, counts):
+        seen += bucket_count
+        if seen >= rank:
+            return bound
+    return buckets[-1]
+
+
+def summary(data=None):
+    """
+    Returns a flat, human-readable view of a snapshot (the current one by default):
+    one row per series with count, total and mean seconds and p50/p95 bucket bounds
+    for histograms, or the value for counters.
+    """
+    data = data or snapshot()
+    rows = []
+    for series in data["histograms"]:
+        count = series["count"]
+        rows.append({
+            "metric": series["name"],
+            "labels": ",".join(f"{k}={v}" for k, v in sorted(series["labels"].items())),
+            "count": count,
+            "total_s": round(series["sum"], 4),
+            "mean_ms": round(1000 * series["sum"] / count, 3) if count else None,
+            "p50_s": _quantile(data["buckets"], series["bucket_counts"], count, 0.5),
+            "p95_s": _quantile(data["buckets"], series["bucket_counts"], count, 0.95),
+        })
+    for series in data["counters"]:
+        rows.append({
+            "metric": series["name"],
+            "labels": ",".join(f"{k}={v}" for k, v in sorted(series["labels"].items())),
+            "count": series["value"],
+        })
+    return sorted(rows, key=lambda row: (row["metric"], row["labels"]))
+
+
+def _format_labels(labels, extra=None):
+    items = sorted(labels.items()) + (extra or [])
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def to_prometheus(data=None, prefix=METRICS_PREFIX):
+    """
+    Renders a snapshot in the Prometheus text exposition format.
+    """
+    data = data or snapshot()
+    lines = []
+    typed = set()
+    for series in sorted(data["counters"], key=lambda s: s["name"]):
+        name = prefix + series["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_format_labels(series['labels'])} {series['value']}")
+    for series in sorted(data["histograms"], key=lambda s: s["name"]):
+        name = prefix + series["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, count in zip(data["buckets"] + ["+Inf"], series["bucket_counts"]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(series['labels'], [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_count{_format_labels(series['labels'])} {series['count']}")
+        lines.append(f"{name}_sum{_format_labels(series['labels'])} {series['sum']}")
+    return "\n".join(lines) + "\n"
+
+
+def to_json(data=None):
+    return json.dumps(data or snapshot())
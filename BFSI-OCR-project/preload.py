@@ -0,0 +1,209 @@
+"""
+Lazy loading, warm-up and import-time reporting of the processing backends.
+
+The app imports a backend on first use of its page, so a user who only wants
+invoice OCR never pays for torch or sklearn. Production pods can instead load
+backends up front with BFSI_PRELOAD (comma-separated names, or "all").
+
+Import-time report, each backend in a fresh interpreter:
+    python -m preload --report --target 3
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import instrumentation
+
+# Functions each backend provides, as "module:attribute"
+BACKENDS = {
+    "ocr": {
+        "process_invoice": "supervised.invoices:process_invoice",
+        "process_payslips": "supervised.payslips:process_payslips",
+        "process_profit_loss": "supervised.profit_loss:process_profit_loss",
+    },
+    "classify": {
+        "classify_data": "unsupervised.bart_classification:classify_data",
+    },
+    "bart": {
+        "load_bart_model": "unsupervised.bart_classification:load_bart_model",
+    },
+    "kmeans": {
+        "categorize_data_with_kmeans": "unsupervised.bart_classification:categorize_data_with_kmeans",
+    },
+    "sec": {
+        "fetch_financial_data": "semi_supervised.api_data:fetch_financial_data",
+    },
+}
+
+# Backends to load at startup, e.g. "ocr,classify" or "all"
+PRELOAD = os.environ.get("BFSI_PRELOAD", "")
+# Seconds the app's own startup imports may take before the report flags them
+COLD_START_TARGET = float(os.environ.get("BFSI_COLD_START_TARGET", 3.0))
+# Modules every page needs; this is the cold start of the app before any backend loads
+APP_MODULES = ("pandas", "plotly.express", "streamlit", "instrumentation", "api.client")
+
+
+def _warm_ocr(backend):
+    from supervised.ocr_engine import get_engine
+
+    get_engine()
+
+
+def _warm_bart(backend):
+    backend.load_bart_model()
+
+
+def _warm_kmeans(backend):
+    import sklearn.cluster  # noqa: F401 -- the clustering module imports it on the first fit
+
+
+# Work beyond imports that a warm-up does, so the first request doesn't pay for it
+WARMUPS = {
+    "ocr": _warm_ocr,
+    "bart": _warm_bart,
+    "kmeans": _warm_kmeans,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def parse_backends(names):
+    """
+    Turns "a,b", "all" or a list into a list of backend names.
+    """
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(",") if name.strip()]
+    if "all" in names:
+        return list(BACKENDS)
+    unknown = sorted(set(names) - set(BACKENDS))
+    if unknown:
+        raise ValueError(f"Unknown backends: {unknown}. Choose from {sorted(BACKENDS)} or 'all'.")
+    return list(names)
+
+
+def load_backend(name, warm=False):
+    """
+    Imports a backend once per process and returns its functions as attributes.
+    With warm=True its models are loaded too (see WARMUPS).
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name}. Choose from {sorted(BACKENDS)}.")
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            with instrumentation.timer("backend_load_seconds", backend=name):
+                functions = {}
+                for attribute, target in BACKENDS[name].items():
+                    module, _, function = target.partition(":")
+                    functions[attribute] = getattr(importlib.import_module(module), function)
+            backend = _backends[name] = SimpleNamespace(warm=False, **functions)
+        if warm and not backend.warm and name in WARMUPS:
+            with instrumentation.timer("backend_warmup_seconds", backend=name):
+                WARMUPS[name](backend)
+            backend.warm = True
+    return backend
+
+
+def preload(names=PRELOAD, warm=True):
+    """
+    Loads (and by default warms up) backends ahead of their first use.
+    Failures are logged rather than raised, so a missing optional backend doesn't stop startup.
+
+    Returns:
+        dict: Seconds taken per backend (None for those that failed).
+    """
+    timings = {}
+    for name in parse_backends(names):
+        start = time.perf_counter()
+        try:
+            load_backend(name, warm=warm)
+            timings[name] = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            logging.warning(f"Preloading the {name} backend failed: {e}")
+            timings[name] = None
+    return timings
+
+
+_MEASURE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+errors = []
+for module in sys.argv[1:]:
+    try:
+        importlib.import_module(module)
+    except Exception as e:
+        errors.append(f"{module}: {type(e).__name__}: {e}")
+error = "; ".join(errors) or None
+seconds = time.perf_counter() - start
+try:
+    import resource
+    rss = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+except ImportError:  # Windows
+    rss = None
+print(json.dumps({"seconds": round(seconds, 3), "peak_rss_mb": rss, "error": error}))
+"""
+
+
+def measure_imports(modules):
+    """
+    Imports modules in a fresh interpreter and returns {"seconds", "peak_rss_mb", "error"}.
+    """
+    output = subprocess.run([sys.executable, "-c", _MEASURE, *modules], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if output.returncode != 0:
+        return {"seconds": None, "peak_rss_mb": None, "error": output.stderr.strip().splitlines()[-1]}
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def import_report(names=None):
+    """
+    Cold import time and peak RSS of the app's startup modules and of each backend on
+    top of them, each measured in a fresh interpreter.
+    """
+    app = measure_imports(APP_MODULES)
+    report = {"app": app}
+    for name in parse_backends(names or list(BACKENDS)):
+        modules = sorted({target.partition(":")[0] for target in BACKENDS[name].values()})
+        # Backend cost is what it adds on top of the app's own imports
+        if name == "bart":
+            modules += ["torch", "transformers"]
+        elif name == "kmeans":
+            modules += ["sklearn.cluster"]
+        total = measure_imports(list(APP_MODULES) + modules)
+        if total["seconds"] is not None and app["seconds"] is not None:
+            total["added_seconds"] = round(total["seconds"] - app["seconds"], 3)
+        report[name] = total
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preload backends or report their import cost.")
+    parser.add_argument("--report", action="store_true", help="Measure cold import time per backend")
+    parser.add_argument("--target", type=float, default=COLD_START_TARGET,
+                        help="Fail the report when the app's startup imports take longer (seconds)")
+    parser.add_argument("--preload", default=None, help="Backends to load and warm up, e.g. ocr,classify or all")
+    args = parser.parse_args(argv)
+
+    if args.preload:
+        print(json.dumps(preload(args.preload)))
+    if args.report:
+        report = import_report()
+        for name, row in report.items():
+            print(f"{name:10} {row}")
+        app_seconds = report["app"]["seconds"]
+        if app_seconds is not None and app_seconds > args.target:
+            print(f"App startup imports took {app_seconds}s, over the {args.target:g}s target")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
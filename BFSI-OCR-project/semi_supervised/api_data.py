@@ -1,26 +1,18 @@
-import requests
 import json
 import os
 from tornado.websocket import WebSocketClosedError
 
-# SEC API details
-API_KEY = "9a5063ede94c5e26056eff4e4163b1545653507f09f8282d15e83a50f1004441"
-XBRL_CONVERTER_API_ENDPOINT = "https://api.sec-api.io/xbrl-to-json"
+# SEC API details (configurable through BFSI_SEC_API_KEY / BFSI_XBRL_ENDPOINT)
+from semi_supervised.fetcher import API_KEY, XBRL_CONVERTER_API_ENDPOINT, fetch_filing, fetch_filings
+from semi_supervised.xml_stream import json_to_xml, read_xml, write_xml
 
-def fetch_financial_data(filing_url):
+def fetch_financial_data(filing_url, use_cache=True):
     """
     Fetch financial data from SEC API.
+    Uses the shared pooled session with retries, and the on-disk response cache.
     Handles timeouts and request exceptions.
     """
-    try:
-        final_url = f"{XBRL_CONVERTER_API_ENDPOINT}?htm-url={filing_url}&token={API_KEY}"
-        response = requests.get(final_url, timeout=10)  # Timeout for API call
-        response.raise_for_status()  # Raise exception for HTTP errors
-        return response.json()
-    except requests.exceptions.Timeout:
-        return {"error": "Request timed out"}
-    except requests.exceptions.RequestException as e:
-        return {"error": f"Failed to fetch data: {str(e)}"}
+    return fetch_filing(filing_url, use_cache=use_cache)
 
 def save_json(data, file_path="financial_data.json"):
     """
@@ -36,39 +28,13 @@ def save_json(data, file_path="financial_data.json"):
         print(error_message)
         return {"error": error_message}
 
-def json_to_xml(json_obj, line_padding=""):
-    """
-    Convert JSON to XML format.
-    Handles nested JSON structures recursively.
-    """
-    result_list = []
-    json_obj_type = type(json_obj)
-
-    if json_obj_type is list:
-        for sub_elem in json_obj:
-            result_list.append(json_to_xml(sub_elem, line_padding))
-        return "\n".join(result_list)
-
-    if json_obj_type is dict:
-        for tag_name in json_obj:
-            sub_obj = json_obj[tag_name]
-            result_list.append(
-                f"{line_padding}<{tag_name}>"
-                f"{json_to_xml(sub_obj, line_padding + '  ')}"
-                f"</{tag_name}>"
-            )
-        return "\n".join(result_list)
-
-    return f"{line_padding}{json_obj}"
-
 def save_xml(data, file_path="financial_data.xml"):
     """
-    Convert JSON to XML and save to a file with error handling.
+    Convert JSON to XML and stream it to a file with error handling.
     """
     try:
-        xml_content = json_to_xml(data)
-        with open(file_path, "w") as xml_file:
-            xml_file.write(f"<root>\n{xml_content}\n</root>")
+        with open(file_path, "w", encoding="utf-8") as xml_file:
+            write_xml(data, xml_file)
         print(f"XML data saved to {file_path}")
         return f"XML data saved to {file_path}"
     except Exception as e:
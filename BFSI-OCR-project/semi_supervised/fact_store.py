@@ -0,0 +1,190 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+# Location of the normalized XBRL fact store
+FACT_STORE_PATH = os.environ.get(
+    "BFSI_FACT_STORE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "bfsi-ocr", "xbrl_facts.sqlite3")
+)
+
+FACT_COLUMNS = ["filing", "statement", "concept", "period_start", "period_end", "unit", "decimals",
+                "segment", "value", "numeric_value"]
+
+
+def _segment_key(segment):
+    """
+    Canonical "dimension=member" string for a fact's segment (or list of segments).
+    """
+    if not segment:
+        return None
+    segments = segment if isinstance(segment, list) else [segment]
+    return ";".join(sorted(f"{s.get('dimension')}={s.get('value')}" for s in segments if isinstance(s, dict)))
+
+
+def _to_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def flatten_facts(data, filing):
+    """
+    Flattens the nested XBRL-to-JSON output into one row per fact.
+
+    Statement -> concept -> fact (or list of facts) becomes rows of
+    (filing, statement, concept, period_start, period_end, unit, decimals, segment,
+    value, numeric_value). Instant periods have no start date; plain string concepts
+    such as cover page entries have no period.
+    """
+    for statement, concepts in data.items():
+        if not isinstance(concepts, dict):
+            continue
+        for concept, facts in concepts.items():
+            for fact in facts if isinstance(facts, list) else [facts]:
+                if not isinstance(fact, dict):
+                    yield (filing, statement, concept, None, None, None, None, None, str(fact), _to_number(fact))
+                    continue
+                period = fact.get("period") or {}
+                value = fact.get("value")
+                yield (
+                    filing,
+                    statement,
+                    concept,
+                    period.get("startDate"),
+                    period.get("endDate") or period.get("instant"),
+                    fact.get("unitRef"),
+                    fact.get("decimals"),
+                    _segment_key(fact.get("segment")),
+                    value,
+                    _to_number(value),
+                )
+
+
+class FactStore:
+    """
+    SQLite-backed table of XBRL facts, indexed on concept and period so that
+    cross-filing queries don't re-parse JSON blobs.
+    """
+    def __init__(self, path=FACT_STORE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS filings ("
+                "filing TEXT PRIMARY KEY, document_type TEXT, period_end TEXT, registrant TEXT, loaded_at REAL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS facts ("
+                "filing TEXT NOT NULL, statement TEXT NOT NULL, concept TEXT NOT NULL, period_start TEXT, "
+                "period_end TEXT, unit TEXT, decimals TEXT, segment TEXT, value TEXT, numeric_value REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS facts_concept_period ON facts (concept, period_end)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS facts_period ON facts (period_end)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS facts_filing_statement ON facts (filing, statement)")
+
+    def add_filing(self, filing, data):
+        """
+        Replaces the stored facts of a filing with the facts flattened from its XBRL JSON.
+        Returns the number of facts stored.
+        """
+        cover = data.get("CoverPage", {}) if isinstance(data.get("CoverPage"), dict) else {}
+        rows = list(flatten_facts(data, filing))
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM facts WHERE filing = ?", (filing,))
+            self.conn.executemany(
+                f"INSERT INTO facts ({', '.join(FACT_COLUMNS)}) VALUES ({', '.join('?' * len(FACT_COLUMNS))})",
+                rows,
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO filings (filing, document_type, period_end, registrant, loaded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (filing, cover.get("DocumentType"), cover.get("DocumentPeriodEndDate"),
+                 cover.get("EntityRegistrantName"), time.time()),
+            )
+        return len(rows)
+
+    def has_filing(self, filing):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM filings WHERE filing = ?", (filing,)).fetchone() is not None
+
+    def query(self, concept=None, statement=None, filing=None, period_from=None, period_to=None,
+              include_segments=False):
+        """
+        Returns matching facts as a DataFrame. Segmented (dimensional) facts are
+        excluded unless include_segments is True.
+        """
+        clauses, params = [], []
+        for column, value in (("concept", concept), ("statement", statement), ("filing", filing)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if period_from is not None:
+            clauses.append("period_end >= ?")
+            params.append(period_from)
+        if period_to is not None:
+            clauses.append("period_end <= ?")
+            params.append(period_to)
+        if not include_segments:
+            clauses.append("segment IS NULL")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {', '.join(FACT_COLUMNS)} FROM facts {where} ORDER BY period_end, filing"
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=params)
+
+    def concept_series(self, concept):
+        """
+        Returns one value per filing and period for a concept (e.g. revenue across filings),
+        without dimensional breakdowns.
+        """
+        facts = self.query(concept=concept)
+        return facts.drop_duplicates(["filing", "period_start", "period_end"])[
+            ["filing", "period_start", "period_end", "unit", "numeric_value"]
+        ]
+
+    def statements(self, filing):
+        """
+        Returns the statement names stored for a filing.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT statement FROM facts WHERE filing = ? ORDER BY statement", (filing,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def statement_line_items(self, filing, statement):
+        """
+        Returns the numeric line items of a statement for its latest period as a
+        Field/Value DataFrame, ready for display_visualizations. When a concept has
+        several facts ending on that date (a 10-Q's quarter and year to date), the
+        shortest period wins, and totals win over dimensional breakdowns.
+        """
+        facts = self.query(statement=statement, filing=filing).dropna(subset=["numeric_value"])
+        if facts.empty:
+            return pd.DataFrame(columns=["Field", "Value"])
+        latest = facts[facts["period_end"] == facts["period_end"].max()]
+        latest = latest.assign(_segmented=latest["segment"].notna()).sort_values(
+            ["_segmented", "period_start"], ascending=[True, False], na_position="last", kind="stable"
+        ).drop_duplicates("concept").sort_index()
+        return pd.DataFrame({"Field": latest["concept"].to_numpy(), "Value": latest["numeric_value"].to_numpy()})
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_fact_store():
+    """
+    Returns the process-wide fact store.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FactStore()
+        return _store
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import instrumentation
+
+# SEC API details; the endpoint can point at a local stand-in server for testing
+API_KEY = os.environ.get("BFSI_SEC_API_KEY", "9a5063ede94c5e26056eff4e4163b1545653507f09f8282d15e83a50f1004441")
+XBRL_CONVERTER_API_ENDPOINT = os.environ.get("BFSI_XBRL_ENDPOINT", "https://api.sec-api.io/xbrl-to-json")
+
+REQUEST_TIMEOUT = 10
+MAX_RETRIES = 4
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_CONCURRENCY = int(os.environ.get("BFSI_FETCH_CONCURRENCY", 8))
+
+# On-disk response cache keyed by endpoint and filing URL
+RESPONSE_CACHE_DIR = os.environ.get(
+    "BFSI_FETCH_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bfsi-ocr", "xbrl")
+)
+RESPONSE_CACHE_TTL = int(os.environ.get("BFSI_FETCH_CACHE_TTL", 7 * 24 * 3600))
+
+
+class ResponseCache:
+    """
+    Stores one JSON file per (endpoint, filing URL) and treats entries older than `ttl` seconds as missing.
+    Writes go through a temp file and an atomic rename, so concurrent fetchers never read partial files.
+    """
+    def __init__(self, cache_dir=RESPONSE_CACHE_DIR, ttl=RESPONSE_CACHE_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, filing_url, endpoint):
+        key = f"{endpoint or XBRL_CONVERTER_API_ENDPOINT}\n{filing_url}"
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def get(self, filing_url, endpoint=None):
+        path = self._path(filing_url, endpoint)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, filing_url, data, endpoint=None):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._path(filing_url, endpoint))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size=MAX_CONCURRENCY):
+    """
+    Returns the shared HTTP session: pooled keep-alive connections, with retries and
+    exponential backoff on 429/5xx responses (honouring Retry-After).
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                backoff_factor=BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(["GET"]),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def fetch_filing(filing_url, endpoint=None, use_cache=True, cache=None):
+    """
+    Fetch the XBRL JSON of one filing, served from the disk cache when fresh.
+    Returns {"error": ...} on timeouts and request failures, like fetch_financial_data.
+    A failed cache write is logged and the fetched data returned anyway.
+    """
+    cache = cache or (ResponseCache() if use_cache else None)
+    if cache is not None:
+        data = cache.get(filing_url, endpoint)
+        if data is not None:
+            instrumentation.inc("fetch_cache_hits_total")
+            return data
+    try:
+        with instrumentation.timer("http_fetch_seconds", endpoint="xbrl-to-json"):
+            response = get_session().get(
+                endpoint or XBRL_CONVERTER_API_ENDPOINT,
+                params={"htm-url": filing_url, "token": API_KEY},
+                timeout=REQUEST_TIMEOUT,
+            )
+            response.raise_for_status()  # Raise exception for HTTP errors (after retries)
+            data = response.json()
+    except requests.exceptions.Timeout:
+        instrumentation.inc("fetch_errors_total", reason="timeout")
+        return {"error": "Request timed out"}
+    except requests.exceptions.RequestException as e:
+        instrumentation.inc("fetch_errors_total", reason="request")
+        return {"error": f"Failed to fetch data: {str(e)}"}
+    except ValueError as e:
+        instrumentation.inc("fetch_errors_total", reason="json")
+        return {"error": f"Invalid JSON response: {str(e)}"}
+    if cache is not None:
+        try:
+            cache.put(filing_url, data, endpoint)
+        except OSError as e:
+            logging.warning(f"XBRL response cache write failed: {e}")
+    return data
+
+
+def fetch_filings(filing_urls, max_concurrency=MAX_CONCURRENCY, endpoint=None, use_cache=True):
+    """
+    Fetch many filings concurrently over the shared session, at most `max_concurrency` at a time.
+
+    Returns:
+        dict: filing URL -> XBRL JSON (or {"error": ...} for that filing).
+    """
+    cache = ResponseCache() if use_cache else None
+    unique_urls = list(dict.fromkeys(filing_urls))
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        results = executor.map(lambda url: fetch_filing(url, endpoint=endpoint, use_cache=use_cache, cache=cache),
+                               unique_urls)
+        return dict(zip(unique_urls, results))
@@ -0,0 +1,170 @@
+import io
+import re
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from xml.sax.saxutils import escape, quoteattr
+
+# Conservative XML element name: no colons, so namespace-aware parsers accept every tag
+_VALID_TAG = re.compile(r"^[A-Za-z_][\w.\-]*$")
+_INVALID_TAG_CHARS = re.compile(r"[^\w.\-]")
+# Characters that XML 1.0 does not allow anywhere in a document
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+ITEM_TAG = "item"
+
+
+@lru_cache(maxsize=4096)
+def _tag(name):
+    """
+    Returns (tag, extra attributes) for a JSON key. Keys that are not valid XML
+    names are sanitized and the original key is kept in a `key` attribute.
+    """
+    if _VALID_TAG.match(name):
+        return name, ""
+    tag = "_" + _INVALID_TAG_CHARS.sub("_", name)
+    return tag, f" key={quoteattr(_INVALID_XML_CHARS.sub('', name))}"
+
+
+def _scalar(value):
+    """
+    Returns (type attribute, escaped text) for a JSON scalar.
+    """
+    if value is None:
+        return ' type="null"', ""
+    if isinstance(value, bool):
+        return ' type="boolean"', "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return ' type="number"', repr(value)
+    text = str(value)
+    if _INVALID_XML_CHARS.search(text):
+        text = _INVALID_XML_CHARS.sub("\ufffd", text)
+    if "&" in text or "<" in text or ">" in text:
+        text = escape(text)
+    return "", text
+
+
+def write_elements(items, fp, indent="  ", depth=0):
+    """
+    Writes (key, value) pairs as XML elements to a file handle incrementally.
+
+    Nesting is walked with an explicit stack instead of recursion, so arbitrarily
+    deep documents never hit the recursion limit and nothing but the current path
+    is held in memory. Lists are written as repeated <item> children of an element
+    marked type="array"; non-string scalars carry a type attribute so read_xml can
+    restore them.
+    """
+    # Lines are batched into a small buffer to amortize fp.write calls
+    lines = []
+    write = lines.append
+    stack = [(iter(items), None)]
+    while stack:
+        if len(lines) >= 256:
+            fp.write("".join(lines))
+            lines.clear()
+        entries, closing_tag = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            if closing_tag is not None:
+                write(f"{indent * (depth + len(stack) - 1)}</{closing_tag}>\n")
+            continue
+
+        name, value = entry
+        pad = indent * (depth + len(stack) - 1)
+        tag, attrs = _tag(str(name))
+        if isinstance(value, dict):
+            if not value:
+                write(f'{pad}<{tag}{attrs} type="object"/>\n')
+                continue
+            write(f"{pad}<{tag}{attrs}>\n")
+            stack.append((iter(value.items()), tag))
+        elif isinstance(value, (list, tuple)):
+            if not value:
+                write(f'{pad}<{tag}{attrs} type="array"/>\n')
+                continue
+            write(f'{pad}<{tag}{attrs} type="array">\n')
+            stack.append((((ITEM_TAG, item) for item in value), tag))
+        else:
+            type_attr, text = _scalar(value)
+            write(f"{pad}<{tag}{attrs}{type_attr}>{text}</{tag}>\n")
+    fp.write("".join(lines))
+
+
+def write_xml(data, fp, root_tag="root", indent="  "):
+    """
+    Streams a JSON-like object to a file handle as an XML document under `root_tag`.
+    """
+    fp.write('<?xml version="1.0" encoding="utf-8"?>\n')
+    write_elements([(root_tag, data)], fp, indent=indent)
+
+
+def json_to_xml(json_obj, line_padding=""):
+    """
+    Convert JSON to an XML fragment (without a root element).
+    Handles nested JSON structures iteratively; see write_elements.
+    """
+    if isinstance(json_obj, dict):
+        items = json_obj.items()
+    elif isinstance(json_obj, (list, tuple)):
+        items = ((ITEM_TAG, item) for item in json_obj)
+    else:
+        return f"{line_padding}{_scalar(json_obj)[1]}"
+    buffer = io.StringIO()
+    write_elements(items, buffer, indent="  ", depth=len(line_padding) // 2)
+    return buffer.getvalue().rstrip("\n")
+
+
+def _element_value(elem, children):
+    kind = elem.get("type")
+    if kind == "array":
+        return [value for _, value in children]
+    if children or kind == "object":
+        return dict(children)
+    text = elem.text or ""
+    if kind == "null":
+        return None
+    if kind == "boolean":
+        return text == "true"
+    if kind == "number":
+        return int(text) if re.fullmatch(r"-?\d+", text) else float(text)
+    return text
+
+
+def read_xml(fp):
+    """
+    Parses a document written by write_xml back into the original JSON-like object.
+    Elements are parsed incrementally and cleared as soon as they are consumed.
+    """
+    stack = []
+    for event, elem in ET.iterparse(fp, events=("start", "end")):
+        if event == "start":
+            stack.append([])
+            continue
+        children = stack.pop()
+        value = _element_value(elem, children)
+        key = elem.get("key", elem.tag)
+        elem.clear()
+        if not stack:
+            return value
+        stack[-1].append((key, value))
+    return None
+
+
+def iter_xml_values(fp):
+    """
+    Yields (path, value) for every scalar in a document written by write_xml without
+    building the whole object; list positions appear as "item" in the path.
+    """
+    path = []
+    has_children = []
+    for event, elem in ET.iterparse(fp, events=("start", "end")):
+        if event == "start":
+            if has_children:
+                has_children[-1] = True
+            path.append(elem.get("key", elem.tag))
+            has_children.append(False)
+            continue
+        if not has_children.pop() and elem.get("type") not in ("object", "array"):
+            yield tuple(path[1:]), _element_value(elem, [])
+        path.pop()
+        elem.clear()
@@ -2,12 +2,33 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
-# Import functions from backend modules
-from semi_supervised.api_data import fetch_financial_data  # Semi-supervised model
-from supervised.invoices import process_invoice        # Supervised model
-from supervised.payslips import process_payslips          # Supervised model
-from supervised.profit_loss import process_profit_loss    # Supervised model
-from unsupervised.bart_classification import classify_data, categorize_data_with_kmeans # Unsupervised model
+import instrumentation
+import visualization
+from api.client import API_URL, ExtractionClient
+from preload import PRELOAD, load_backend, preload
+from semi_supervised.fact_store import get_fact_store
+
+# Thin client: with BFSI_API_URL set, OCR, classification and filing fetches run on the extraction service (api.server)
+_client = ExtractionClient(API_URL) if API_URL else None
+
+# Backend models are imported on first use of their page rather than at startup (see preload.py):
+# the script re-runs on every interaction, and torch/transformers/sklearn cost seconds and hundreds of MB
+@st.cache_resource(show_spinner="Loading the processing backend...")
+def get_backend(name):
+    """
+    Returns the "ocr" (supervised), "classify", "kmeans" (unsupervised) or "sec" (semi-supervised)
+    backend, loaded once per process.
+    """
+    if _client is not None and name in ("ocr", "classify", "sec"):
+        return _client
+    return load_backend(name)
+
+@st.cache_resource(show_spinner="Warming up backends...")
+def warm_up():
+    """
+    Loads the backends listed in BFSI_PRELOAD once per process, so production pods pay at startup.
+    """
+    return preload(PRELOAD)
 
 # Function to set background color using CSS
 def set_background():
@@ -37,6 +58,11 @@ def set_background():
 
 # Function to display visualizations
 def display_visualizations(data, title):
+    """
+    Bar, pie and (for larger frames) histogram and scatter charts of a result frame.
+    Charts are drawn from aggregated, cached frames (see visualization.py), so large
+    files don't ship every row to the browser.
+    """
     if isinstance(data, pd.DataFrame):
         data_df = data
     elif isinstance(data, dict):
@@ -46,40 +72,106 @@ def display_visualizations(data, title):
         return
 
     st.markdown(f"### {title} Visualizations")
-    
-    if "Description" in data_df.columns and "Amount" in data_df.columns:
-        x_column, y_column = "Description", "Amount"
-    elif "Field" in data_df.columns and "Value" in data_df.columns:
-        x_column, y_column = "Field", "Value"
-    else:
+
+    columns = visualization.chart_columns(data_df)
+    if columns is None:
         st.error("❌ Unable to generate visualizations: Missing required columns.")
         return
+    x_column, y_column = columns
+    group = visualization.group_column(data_df, x_column)
+    summary = visualization.aggregate(data_df, group, y_column)
+    if summary.empty:
+        st.info("No numeric values to plot.")
+        return
+    if len(data_df) > len(summary):
+        st.caption(f"{len(data_df)} rows summed into {len(summary)} groups by {group}.")
 
     st.subheader("Bar Chart")
     fig_bar = px.bar(
-        data_df, 
-        x=x_column, 
-        y=y_column, 
-        text=y_column, 
+        summary,
+        x=group,
+        y=y_column,
+        text=y_column,
+        hover_data=["Rows"],
         title=f"{title} Summary (Bar Chart)",
-        color=x_column,
         color_discrete_sequence=px.colors.qualitative.Pastel
     )
     fig_bar.update_traces(marker_line_color='rgb(8,48,107)', marker_line_width=1.5, opacity=0.8)
+    fig_bar.update_xaxes(type="category")
     st.plotly_chart(fig_bar)
 
     st.subheader("Pie Chart")
+    # Pie slices can't be negative (losses, refunds); plot magnitudes
     fig_pie = px.pie(
-        data_df, 
-        names=x_column, 
-        values=y_column, 
+        summary.assign(**{y_column: summary[y_column].abs()}),
+        names=group,
+        values=y_column,
         title=f"{title} Distribution (Pie Chart)",
         color_discrete_sequence=px.colors.sequential.Rainbow
     )
-    fig_pie.update_traces(textposition='inside', textinfo='percent+label', pull=[0.1] * len(data_df))
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label', pull=0.1)
     st.plotly_chart(fig_pie)
 
+    if len(data_df) <= visualization.TOP_N:
+        return
+
+    st.subheader("Histogram")
+    bins = visualization.histogram(data_df, y_column)
+    fig_hist = px.bar(
+        bins,
+        x="Bin",
+        y="Rows",
+        hover_data=["Start", "End"],
+        title=f"{title} {y_column} Distribution (Histogram)",
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+    fig_hist.update_traces(width=(bins["End"] - bins["Start"]).to_numpy())
+    fig_hist.update_xaxes(title=y_column)
+    st.plotly_chart(fig_hist)
+
+    # One trace per group: only for clusters and categories, not free-text labels
+    if group != x_column and data_df[group].nunique() <= visualization.TOP_N:
+        st.subheader("Scatter Plot")
+        points = visualization.downsample(data_df, (x_column, y_column), group=group)
+        if len(points) < len(data_df):
+            st.caption(f"Showing a sample of {len(points)} of {len(data_df)} rows.")
+        fig_scatter = px.scatter(
+            points.assign(**{group: points[group].astype(str)}),
+            x=points.index,
+            y=y_column,
+            color=group,
+            hover_data=[x_column],
+            title=f"{title} {y_column} by {group} (Scatter Plot)",
+            render_mode=visualization.render_mode(len(points)),
+            color_discrete_sequence=px.colors.qualitative.Pastel
+        )
+        fig_scatter.update_xaxes(title="Row")
+        st.plotly_chart(fig_scatter)
+
+# Function to display per-stage timings
+def display_diagnostics():
+    """
+    Sidebar panel with the decode/preprocess/OCR/extraction/model timings recorded so far,
+    taken from the extraction service when BFSI_API_URL is set.
+    """
+    with st.sidebar.expander("⏱️ Diagnostics"):
+        try:
+            data = _client.metrics() if API_URL else instrumentation.snapshot()
+        except Exception as e:
+            st.warning(f"Metrics unavailable: {e}")
+            return
+        rows = instrumentation.summary(data)
+        if not rows:
+            st.caption("No timings recorded yet." if instrumentation.enabled() else "Instrumentation is off (BFSI_METRICS=0).")
+            return
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+        st.download_button("Download Prometheus metrics", instrumentation.to_prometheus(data), file_name="bfsi_metrics.prom")
+        if not API_URL and st.button("Reset timings"):
+            instrumentation.reset()
+
 def main():
+    if PRELOAD:
+        warm_up()
     set_background()
     st.title('📊 BFSI - OCR of Bank Statements')
     
@@ -94,7 +186,7 @@ def main():
             uploaded_invoice = st.file_uploader("Upload Invoice", type=['pdf', 'jpg', 'png'])
             if uploaded_invoice is not None:
                 try:
-                    invoice_data = process_invoice(uploaded_invoice)
+                    invoice_data = get_backend("ocr").process_invoice(uploaded_invoice)
                     st.success("✅ Invoice processed successfully!")
                     st.markdown("### 📄 Extracted Fields:")
                     st.write(invoice_data)
@@ -107,7 +199,7 @@ def main():
             uploaded_payslip = st.file_uploader("Upload Payslip", type=['pdf', 'jpg', 'png'])
             if uploaded_payslip is not None:
                 try:
-                    payslip_data = process_payslips(uploaded_payslip)
+                    payslip_data = get_backend("ocr").process_payslips(uploaded_payslip)
                     st.success("✅ Payslip processed successfully!")
                     st.write(payslip_data)
                     display_visualizations(payslip_data, "Payslip Data")
@@ -119,7 +211,7 @@ def main():
             uploaded_profit_loss = st.file_uploader("Upload Profit & Loss Statement", type=['pdf', 'jpg', 'png'])
             if uploaded_profit_loss is not None:
                 try:
-                    profit_loss_data = process_profit_loss(uploaded_profit_loss)
+                    profit_loss_data = get_backend("ocr").process_profit_loss(uploaded_profit_loss)
                     st.success("✅ Profit & Loss statement processed successfully!")
                     st.write(profit_loss_data)
                     display_visualizations(profit_loss_data, "Profit & Loss Data")
@@ -127,12 +219,26 @@ def main():
                     st.error(f"❌ Error processing Profit & Loss statement: {e}")
     
     elif category == "Unsupervised":
-        st.subheader("🤖 Classify Data Using BART Model")
+        st.subheader("🤖 Classify Transaction Data")
+        from unsupervised.classifiers import available_backends
+        # "linear" is only offered once a trained model has been saved
+        backend = st.selectbox(
+            "Classifier backend", available_backends(),
+            help="BART is slow but generative (bart-int8 and bart-onnx are its faster CPU runtimes); "
+                 "keyword and linear are fast CPU classifiers."
+        )
         uploaded_data = st.file_uploader("Upload Data File", type=['csv', 'json'])
         if uploaded_data is not None:
             try:
-                classification_results = classify_data(uploaded_data)
+                classification_results, stats = get_backend("classify").classify_data(
+                    uploaded_data, backend=backend, return_stats=True
+                )
                 st.success("✅ Data classified successfully!")
+                st.caption(
+                    f"{stats['rows']} rows, {stats['unique']} unique descriptions "
+                    f"({stats['cached']} from cache, {stats['inferred']} classified); "
+                    f"dedup ratio {stats['dedup_ratio']:.0%}"
+                )
                 st.markdown("### 📄 Classification Results:")
                 st.write(classification_results)
 
@@ -145,7 +251,13 @@ def main():
                 # Optional: Add K-Means clustering for further analysis
                 if st.checkbox("Apply K-Means Clustering"):
                     n_clusters = st.slider("Select number of clusters", min_value=2, max_value=10, value=3)
-                    clustered_data = categorize_data_with_kmeans(classification_df, n_clusters=n_clusters)
+                    available_features = ["amount", "log_amount", "description"]
+                    if "Date" in classification_df.columns:
+                        available_features.append("day_of_week")
+                    features = st.multiselect("Cluster on", available_features, default=["amount"])
+                    clustered_data = get_backend("kmeans").categorize_data_with_kmeans(
+                        classification_df, n_clusters=n_clusters, features=tuple(features) or ("amount",)
+                    )
                     st.success("✅ Clustering applied successfully!")
                     st.write(clustered_data)
                     display_visualizations(clustered_data, "Clustered Data")
@@ -156,14 +268,25 @@ def main():
     elif category == "Semi-supervised":
         st.subheader("📊 Extract Financial Data from APIs")
         filing_url = st.text_input("Enter SEC Filing URL", "https://www.sec.gov/Archives/edgar/data/320193/000032019321000056/aapl-20210327.htm")
+        fact_store = get_fact_store()
         if st.button("🔍 Fetch Financial Data"):
             try:
-                data = fetch_financial_data(filing_url)
-                st.success("✅ Financial data fetched successfully!")
-                st.json(data)
-                display_visualizations(data, "Financial Data")
+                data = get_backend("sec").fetch_financial_data(filing_url)
+                if "error" in data:
+                    raise ValueError(data["error"])
+                fact_count = fact_store.add_filing(filing_url, data)
+                st.success(f"✅ Financial data fetched successfully! ({fact_count} facts stored)")
+                st.json(data, expanded=False)
             except Exception as e:
                 st.error(f"❌ Error fetching financial data: {e}")
 
+        # Plot statement line items straight from the fact store, so changing the statement doesn't refetch
+        if fact_store.has_filing(filing_url):
+            statement = st.selectbox("Statement", fact_store.statements(filing_url))
+            display_visualizations(fact_store.statement_line_items(filing_url, statement), statement)
+
+    # Rendered last so the timings include this run
+    display_diagnostics()
+
 if __name__ == "__main__":
     main()
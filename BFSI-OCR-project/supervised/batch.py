@@ -0,0 +1,311 @@
+import argparse
+import csv
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+
+import instrumentation
+from supervised.fields import document_types, process_fields_document
+from supervised.invoices import process_invoice
+from supervised.payslips import process_payslips
+from supervised.profit_loss import process_profit_loss
+
+# Document types handled by the batch runner, mapped to the existing single-file processors
+PROCESSORS = {
+    "invoice": process_invoice,
+    "payslip": process_payslips,
+    "profit_loss": process_profit_loss,
+}
+
+# Directory / file name hints used to infer the document type of a path
+DOC_TYPE_ALIASES = {
+    "invoice": "invoice",
+    "invoices": "invoice",
+    "payslip": "payslip",
+    "payslips": "payslip",
+    "profit_loss": "profit_loss",
+    "profit_and_loss": "profit_loss",
+    "pnl": "profit_loss",
+}
+
+SUPPORTED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.pdf')
+
+OUTPUT_COLUMNS = ["Document", "Doc Type", "Status", "Error", "Record", "Field", "Value", "Seconds"]
+
+
+def _doc_type_hint(name):
+    name = name.lower()
+    if name in DOC_TYPE_ALIASES:
+        return DOC_TYPE_ALIASES[name]
+    # Document types defined only by a field spec are matched by their own name
+    if name in document_types():
+        return name
+    return None
+
+
+def infer_doc_type(path):
+    """
+    Infers the document type of a path from its file name or parent directories.
+    Returns None when no hint is found.
+    """
+    hint = _doc_type_hint(os.path.splitext(os.path.basename(path))[0])
+    if hint:
+        return hint
+    for part in reversed(os.path.normpath(os.path.dirname(os.path.abspath(path))).split(os.sep)):
+        hint = _doc_type_hint(part)
+        if hint:
+            return hint
+    return None
+
+
+def get_processor(doc_type):
+    """
+    Returns the processor of a document type: a dedicated module for the built-in
+    types, or the generic field spec processor for types added through config.
+    """
+    if doc_type in PROCESSORS:
+        return PROCESSORS[doc_type]
+    if doc_type in document_types():
+        return lambda file: process_fields_document(file, doc_type)
+    raise ValueError(f"Unknown document type: {doc_type}")
+
+
+def discover_documents(input_path, doc_type=None):
+    """
+    Collects (path, doc_type) pairs from a directory (walked recursively) or a CSV manifest.
+
+    A manifest needs a "path" column and may carry a "doc_type" column; relative paths
+    are resolved against the manifest's directory.
+    """
+    documents = []
+    if os.path.isdir(input_path):
+        for root, _, files in os.walk(input_path):
+            for name in sorted(files):
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    documents.append((path, doc_type or infer_doc_type(path)))
+    elif input_path.lower().endswith('.csv'):
+        base_dir = os.path.dirname(os.path.abspath(input_path))
+        with open(input_path, newline="") as manifest:
+            for row in csv.DictReader(manifest):
+                path = row["path"]
+                if not os.path.isabs(path):
+                    path = os.path.join(base_dir, path)
+                documents.append((path, row.get("doc_type") or doc_type or infer_doc_type(path)))
+    else:
+        documents.append((input_path, doc_type or infer_doc_type(input_path)))
+    return documents
+
+
+def _to_records(result):
+    """
+    Normalizes the output of a processor (DataFrame or dict) into a list of record dicts.
+    Field spec types with fields and rows give the fields record first, then one per line item.
+    """
+    if isinstance(result, dict) and set(result) == {"fields", "rows"}:
+        return _to_records(result["fields"]) + _to_records(result["rows"])
+    if isinstance(result, pd.DataFrame):
+        if list(result.columns) == ["Field", "Value"]:
+            return [dict(zip(result["Field"], result["Value"]))]
+        return result.to_dict(orient="records")
+    return [result]
+
+
+def process_document(path, doc_type):
+    """
+    Runs the matching supervised processor on a single document.
+    Never raises: failures are reported in the returned dict.
+    """
+    start = time.perf_counter()
+    outcome = {"document": path, "doc_type": doc_type, "status": "ok", "error": None, "records": []}
+    try:
+        processor = get_processor(doc_type)
+        with open(path, "rb") as file:
+            result = processor(file)
+        if isinstance(result, dict) and 'error' in result:
+            raise ValueError(result['error'])
+        outcome["records"] = _to_records(result)
+    except Exception as e:
+        outcome["status"] = "failed"
+        outcome["error"] = str(e)
+    seconds = time.perf_counter() - start
+    outcome["seconds"] = round(seconds, 4)
+    instrumentation.observe("document_seconds", seconds, doc_type=doc_type)
+    instrumentation.inc("documents_total", doc_type=doc_type, status=outcome["status"])
+    return outcome
+
+
+def iter_batch(documents, workers=None):
+    """
+    Fans documents out over a process pool and yields results as they complete.
+
+    At most a few tasks per worker are in flight at any time, so very large
+    manifests are not submitted to the pool all at once. Metrics recorded by the
+    workers are merged into this process.
+    """
+    def collect(future):
+        outcome, metrics = future.result()
+        instrumentation.merge(metrics)
+        return outcome
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+    documents = iter(documents)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for path, doc_type in documents:
+            pending.add(executor.submit(instrumentation.run_collecting, process_document, path, doc_type))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield collect(future)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield collect(future)
+
+
+def _to_rows(outcome):
+    """
+    Flattens a document outcome into long-format output rows (one per extracted field).
+    """
+    base = {
+        "Document": outcome["document"],
+        "Doc Type": outcome["doc_type"],
+        "Status": outcome["status"],
+        "Error": outcome["error"],
+        "Seconds": outcome["seconds"],
+    }
+    rows = []
+    for index, record in enumerate(outcome["records"]):
+        for field, value in record.items():
+            rows.append({**base, "Record": index, "Field": field, "Value": None if value is None else str(value)})
+    if not rows:
+        rows.append({**base, "Record": None, "Field": None, "Value": None})
+    return rows
+
+
+class CSVResultWriter:
+    """
+    Appends result rows to a CSV file, flushing after every document.
+    """
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=OUTPUT_COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetResultWriter:
+    """
+    Appends result rows to a Parquet file as row groups of `batch_size` rows.
+    """
+    def __init__(self, path, batch_size=1000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet output requires pyarrow. Install it or write CSV instead.")
+        self.pa = pa
+        self.schema = pa.schema([
+            ("Document", pa.string()), ("Doc Type", pa.string()), ("Status", pa.string()),
+            ("Error", pa.string()), ("Record", pa.int64()), ("Field", pa.string()),
+            ("Value", pa.string()), ("Seconds", pa.float64()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.batch_size = batch_size
+        self.buffer = []
+
+    def write(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self.buffer:
+            self.writer.write_table(self.pa.Table.from_pylist(self.buffer, schema=self.schema))
+            self.buffer = []
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+def open_result_writer(output_path, output_format=None):
+    """
+    Opens a streaming writer for the output path; the format defaults to the file extension.
+    """
+    output_format = output_format or ("parquet" if output_path.lower().endswith(".parquet") else "csv")
+    if output_format == "parquet":
+        return ParquetResultWriter(output_path)
+    if output_format == "csv":
+        return CSVResultWriter(output_path)
+    raise ValueError(f"Unsupported output format: {output_format}")
+
+
+def run_batch(input_path, output_path, doc_type=None, workers=None, output_format=None):
+    """
+    Processes every document under a directory or manifest and streams results to CSV/Parquet.
+
+    Args:
+        input_path (str): Directory, CSV manifest or single document path.
+        output_path (str): Destination .csv or .parquet file.
+        doc_type (str): Forces a document type instead of inferring it per path.
+        workers (int): Size of the process pool (defaults to the number of cores).
+        output_format (str): "csv" or "parquet" (defaults to the output file extension).
+
+    Returns:
+        dict: Run summary with totals and per-document failures.
+    """
+    documents = discover_documents(input_path, doc_type)
+    summary = {"total": 0, "succeeded": 0, "failed": 0, "failures": []}
+    writer = open_result_writer(output_path, output_format)
+    try:
+        for outcome in iter_batch(documents, workers=workers):
+            writer.write(_to_rows(outcome))
+            summary["total"] += 1
+            if outcome["status"] == "ok":
+                summary["succeeded"] += 1
+            else:
+                summary["failed"] += 1
+                summary["failures"].append({"document": outcome["document"], "error": outcome["error"]})
+                logging.warning(f"Failed to process {outcome['document']}: {outcome['error']}")
+    finally:
+        writer.close()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch OCR of invoices, payslips, Profit & Loss statements and field spec document types.")
+    parser.add_argument("input", help="Directory of documents or CSV manifest with path[,doc_type] columns")
+    parser.add_argument("output", help="Output .csv or .parquet file")
+    parser.add_argument("--doc-type", choices=sorted(set(PROCESSORS) | set(document_types())), help="Force a document type for every input")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: number of cores)")
+    parser.add_argument("--format", dest="output_format", choices=["csv", "parquet"], default=None)
+    parser.add_argument("--metrics", default=None,
+                        help="Write per-stage timings to this file (.prom for Prometheus text, otherwise JSON)")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.input, args.output, doc_type=args.doc_type,
+                        workers=args.workers, output_format=args.output_format)
+    if args.metrics:
+        with open(args.metrics, "w") as f:
+            f.write(instrumentation.to_prometheus() if args.metrics.endswith(".prom") else instrumentation.to_json())
+    print(f"Processed {summary['total']} documents: {summary['succeeded']} succeeded, {summary['failed']} failed")
+    for failure in summary["failures"]:
+        print(f"  {failure['document']}: {failure['error']}")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
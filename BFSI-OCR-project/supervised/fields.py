@@ -0,0 +1,331 @@
+import json
+import os
+import re
+import threading
+from functools import reduce
+
+import pandas as pd
+
+from supervised.layout import extract_with_layout, layout_to_text
+from supervised.preprocessing import TARGET_DPI, preprocess_page
+
+# Built-in field specs per document type; extra JSON files (os.pathsep separated) can add or override types
+FIELD_SPECS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "field_specs.json")
+EXTRA_FIELD_SPECS = os.environ.get("BFSI_FIELD_SPECS", "")
+
+# OCR settings used by process_fields_document when a spec doesn't set its own
+DEFAULT_PREPROCESS_PARAMS = {"target_dpi": TARGET_DPI, "binarization": "auto"}
+DEFAULT_TESSERACT_CONFIG = ""
+
+
+def _to_float(value):
+    return float(value.replace(",", "").replace(" ", ""))
+
+
+def _to_int(value):
+    return int(value.replace(",", "").replace(" ", ""))
+
+
+# Value converters by spec "type"; values are stripped and numbers lose thousands separators
+FIELD_TYPES = {
+    "str": str,
+    "float": _to_float,
+    "int": _to_int,
+}
+
+
+def _compile_flags(names):
+    try:
+        return reduce(lambda flags, name: flags | getattr(re, name), names, 0)
+    except AttributeError as e:
+        raise ValueError(f"Unknown regex flag in field spec: {e}")
+
+
+def _converter(doc_type, entry):
+    kind = entry.get("type", "str")
+    if kind not in FIELD_TYPES:
+        raise ValueError(f"Unknown field type '{kind}' for {doc_type}.{entry.get('name')}")
+    return FIELD_TYPES[kind]
+
+
+def _in_parens(text, start, end):
+    # "(1,234)" or "($1,234)": only the value's own brackets count, not those elsewhere on the line
+    return text[:start].rstrip(" $").endswith("(") and text[end:].lstrip(" ").startswith(")")
+
+
+def _convert(match, group, converter, negative_parens):
+    """
+    Converts a captured value; when the spec asks for it, a value wrapped in
+    parentheses (accounting notation) is negated.
+    """
+    value = converter(match.group(group).strip())
+    if negative_parens and _in_parens(match.string, match.start(group), match.end(group)):
+        value = -value
+    return value
+
+
+def _first_chars(patterns, flags):
+    """
+    Returns a character class of the possible first characters of the patterns,
+    or None when a pattern doesn't start with a plain literal.
+    """
+    chars = set()
+    for pattern in patterns:
+        if not pattern[:1].isalnum() or pattern[1:2] in ("?", "*", "{"):
+            return None
+        chars.add(pattern[0])
+    if flags & re.IGNORECASE:
+        chars = {c.lower() for c in chars} | {c.upper() for c in chars}
+    return "".join(sorted(chars))
+
+
+class FieldExtractor:
+    """
+    Extracts the fields of one document type from OCR text.
+
+    All field patterns are compiled once into a single alternation, so the text is
+    scanned in one forward pass instead of one re.search per field. The scan stops at
+    every position where some field matches, and each field not found yet is tried
+    there, so every field gets the same (leftmost) match as its own re.search, even
+    when one label contains another ("NET PAY" in "YTD NET PAY"). Line-item tables
+    ("rows" in the spec) use one compiled per-line pattern.
+    """
+    def __init__(self, doc_type, spec):
+        self.doc_type = doc_type
+        flags = _compile_flags(spec.get("flags", []))
+
+        self.fields = []
+        patterns = []
+        for entry in spec.get("fields", []):
+            pattern = re.compile(entry["pattern"], flags)
+            if pattern.groups != 1:
+                raise ValueError(f"Field pattern {doc_type}.{entry['name']} must have exactly one capture group")
+            patterns.append(entry["pattern"])
+            self.fields.append(
+                (entry["name"], _converter(doc_type, entry), entry.get("negative_parens", False), pattern)
+            )
+        self.names = [field[0] for field in self.fields]
+        self.scanner = None
+        if patterns:
+            source = "|".join(patterns)
+            # Case-insensitive alternations lose re's first-character skip, so add it back as a lookahead
+            first_chars = _first_chars(patterns, flags) if flags & re.IGNORECASE else None
+            if first_chars:
+                source = f"(?-i:(?=[{first_chars}]))(?:{source})"
+            self.scanner = re.compile(source, flags)
+
+        rows = spec.get("rows")
+        self.row_pattern = None
+        self.row_columns = []
+        if rows:
+            self.row_pattern = re.compile(rows["pattern"], flags)
+            self.row_columns = [
+                (column["name"], _converter(doc_type, column), column.get("negative_parens", False))
+                for column in rows["columns"]
+            ]
+            if self.row_pattern.groups != len(self.row_columns):
+                raise ValueError(f"Row pattern of {doc_type} must have one capture group per column")
+
+    def extract(self, text):
+        """
+        Returns {field name: value} with None for fields that were not found.
+        """
+        values = dict.fromkeys(self.names)
+        if self.scanner is None:
+            return values
+        found = set()
+        search = self.scanner.search
+        fields = self.fields
+        pos = 0
+        while len(found) < len(fields):
+            match = search(text, pos)
+            if match is None:
+                break
+            start = match.start()
+            # re.search of any field that matches here would stop here too
+            for name, converter, negative_parens, pattern in fields:
+                if name not in found:
+                    field_match = pattern.match(text, start)
+                    if field_match is not None and field_match.group(1) is not None:
+                        found.add(name)
+                        values[name] = _convert(field_match, 1, converter, negative_parens)
+            # Labels can overlap ("NET PAY" inside "YTD NET PAY"), so the next match may start one character on
+            pos = start + 1
+        return values
+
+    def extract_rows(self, lines):
+        """
+        Returns the line items matched by the row pattern as lists of converted values.
+        """
+        if self.row_pattern is None:
+            return []
+        rows = []
+        search = self.row_pattern.search
+        for line in lines:
+            match = search(line)
+            if match:
+                rows.append([
+                    None if match.group(group) is None else _convert(match, group, converter, negative_parens)
+                    for group, (_, converter, negative_parens) in enumerate(self.row_columns, 1)
+                ])
+        return rows
+
+    def locate(self, regions):
+        """
+        Returns where each field was found among OCRed layout regions (see supervised.layout):
+        [{"field", "value", "page", "box"}], the first region with a value winning.
+        """
+        located, found = [], set()
+        for region in regions:
+            for name, value in self.extract(region["text"]).items():
+                if value is not None and name not in found:
+                    found.add(name)
+                    located.append({"field": name, "value": value, "page": region.get("page"), "box": region["box"]})
+        return located
+
+    def locate_rows(self, regions, clean=str.strip):
+        """
+        Returns the line items of OCRed layout regions with the box of the region
+        each came from: [{"row", "page", "box"}]. `clean` normalizes every line first.
+        """
+        return [
+            {"row": row, "page": region.get("page"), "box": region["box"]}
+            for region in regions
+            for row in self.extract_rows(clean(line) for line in region["text"].split("\n") if line.strip())
+        ]
+
+
+def load_field_specs(path):
+    """
+    Reads a JSON file mapping document types to field specs.
+    """
+    with open(path) as f:
+        specs = json.load(f)
+    if not isinstance(specs, dict):
+        raise ValueError(f"Field spec file {path} must contain an object keyed by document type")
+    return specs
+
+
+_specs = None
+_extractors = {}
+_specs_lock = threading.Lock()
+
+
+def _field_specs():
+    global _specs
+    if _specs is None:
+        specs = load_field_specs(FIELD_SPECS_PATH)
+        for path in filter(None, EXTRA_FIELD_SPECS.split(os.pathsep)):
+            specs.update(load_field_specs(path))
+        _specs = specs
+    return _specs
+
+
+def register_document_type(doc_type, spec):
+    """
+    Adds (or replaces) the field spec of a document type at runtime.
+    The spec is compiled immediately so mistakes surface here, not on the first document.
+    """
+    extractor = FieldExtractor(doc_type, spec)
+    with _specs_lock:
+        _field_specs()[doc_type] = spec
+        _extractors[doc_type] = extractor
+    return extractor
+
+
+def document_types():
+    """
+    Returns the document types that have a field spec.
+    """
+    with _specs_lock:
+        return sorted(_field_specs())
+
+
+def get_field_spec(doc_type):
+    with _specs_lock:
+        specs = _field_specs()
+        if doc_type not in specs:
+            raise ValueError(f"No field spec for document type: {doc_type}")
+        return specs[doc_type]
+
+
+def get_extractor(doc_type):
+    """
+    Returns the compiled extractor of a document type, compiling it on first use.
+    """
+    with _specs_lock:
+        extractor = _extractors.get(doc_type)
+        if extractor is None:
+            specs = _field_specs()
+            if doc_type not in specs:
+                raise ValueError(f"No field spec for document type: {doc_type}")
+            extractor = _extractors[doc_type] = FieldExtractor(doc_type, specs[doc_type])
+        return extractor
+
+
+def extract_document(source, doc_type):
+    """
+    OCRs a document and applies the field spec of its type.
+
+    Returns:
+        tuple: ({field: value}, DataFrame of line items, empty when the spec has no rows).
+    """
+    spec = get_field_spec(doc_type)
+    extractor = get_extractor(doc_type)
+
+    def parse(text):
+        rows = extractor.extract_rows(line.strip() for line in text.split("\n") if line.strip())
+        return extractor.extract(text), rows
+
+    (fields, rows), _ = extract_with_layout(
+        source, preprocess_page, spec.get("preprocess_params", DEFAULT_PREPROCESS_PARAMS),
+        spec.get("tesseract_config", DEFAULT_TESSERACT_CONFIG), doc_type, parse,
+    )
+    return fields, pd.DataFrame(rows, columns=[column[0] for column in extractor.row_columns])
+
+
+def locate_fields(source, doc_type, preprocess=None, preprocess_params=None, config=None, clean=str.strip):
+    """
+    Returns the extracted values of a document together with the page and bounding
+    box (x, y, w, h in preprocessed page pixels) of the layout region they were read from.
+
+    The built-in types should pass their module's preprocessing, e.g.
+    locate_fields(file, "invoice", preprocess_invoice, invoices.PREPROCESS_PARAMS,
+    invoices.TESSERACT_CONFIG, clean=clean_text); field spec types default to their spec.
+    Regions are cached, so this is cheap after the document was processed.
+
+    Returns:
+        list: {"field", "value", "page", "box"} per field, then {"row", "page", "box"} per line item.
+        Values read from a page without regions of interest, or from a PDF text layer, have no box.
+    """
+    spec = get_field_spec(doc_type)
+    extractor = get_extractor(doc_type)
+    _, regions = layout_to_text(
+        source,
+        preprocess or preprocess_page,
+        preprocess_params if preprocess is not None else spec.get("preprocess_params", DEFAULT_PREPROCESS_PARAMS),
+        config if config is not None else spec.get("tesseract_config", DEFAULT_TESSERACT_CONFIG),
+        doc_type,
+    )
+    return extractor.locate(regions) + extractor.locate_rows(regions, clean)
+
+
+def process_fields_document(source, doc_type):
+    """
+    Processes a document whose type is defined only by a field spec (e.g. bank_statement, form16).
+
+    Returns:
+        A Field/Value DataFrame when the spec defines fields only, the line items when it
+        defines rows only, and {"fields": Field/Value DataFrame, "rows": line items} when
+        it defines both (e.g. bank_statement).
+    """
+    try:
+        fields, rows = extract_document(source, doc_type)
+        if not fields:
+            return rows
+        fields = pd.DataFrame(list(fields.items()), columns=["Field", "Value"])
+        if get_extractor(doc_type).row_pattern is None:
+            return fields
+        return {"fields": fields, "rows": rows}
+    except Exception as e:
+        return {'error': f"Error processing the {doc_type} document: {e}"}
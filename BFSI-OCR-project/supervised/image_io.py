@@ -0,0 +1,59 @@
+import os
+
+import cv2
+import numpy as np
+
+import instrumentation
+
+
+def read_bytes(source):
+    """
+    Returns the raw bytes of an upload buffer, file-like object, bytes object or file path.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    if hasattr(source, "getvalue"):
+        # Streamlit's UploadedFile and BytesIO expose the whole buffer regardless of the read position
+        return source.getvalue()
+    if hasattr(source, "read"):
+        return source.read()
+    raise ValueError(f"Unsupported image source: {type(source).__name__}")
+
+
+def source_name(source):
+    """
+    Returns the file name of an upload or path, or None for in-memory sources.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, "name", None)
+
+
+def load_image(source, flags=cv2.IMREAD_COLOR):
+    """
+    Decodes an image in memory from a numpy array, bytes, a file path or a file-like object.
+    Numpy arrays are returned as-is; nothing is written to disk, so this is safe to call
+    from many threads at once.
+    """
+    if isinstance(source, np.ndarray):
+        return source
+    data = read_bytes(source)
+    with instrumentation.timer("decode_seconds", format="image"):
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), flags)
+    if img is None:
+        raise ValueError("Invalid image file or corrupted data.")
+    return img
+
+
+def to_grayscale(img):
+    """
+    Converts a BGR/BGRA image to grayscale, passing already single-channel images through.
+    """
+    if img.ndim == 2:
+        return img
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -1,13 +1,13 @@
-import cv2
 import pytesseract
-import numpy as np
 import pandas as pd
-import re
-import os
 import logging
-from PIL import Image
 import platform
 
+from supervised.fields import get_extractor
+from supervised.image_io import source_name
+from supervised.layout import extract_with_layout
+from supervised.preprocessing import TARGET_DPI, preprocess_page
+
 # Configure Tesseract path dynamically
 if platform.system() == 'Windows':
     pytesseract.pytesseract.tesseract_cmd = r'C:\\Program Files\\Tesseract-OCR\\tesseract.exe'
@@ -17,21 +17,19 @@ else:
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def preprocess_invoice(image_path):
+# OCR settings; both are part of the OCR cache key
+TESSERACT_CONFIG = '--oem 3 --psm 6'
+PREPROCESS_PARAMS = {"target_dpi": TARGET_DPI, "binarization": "auto", "block_size": 11, "c": 2, "median_ksize": 3}
+
+def preprocess_invoice(image, target_dpi=TARGET_DPI, binarization="auto", block_size=11, c=2, median_ksize=3):
     """
     Preprocess the invoice image for OCR.
-    Converts to grayscale, applies thresholding and noise removal.
+    Accepts a numpy array, bytes, a file path or an uploaded file.
+    Runs the shared pipeline (resolution, deskew, margin crop), then thresholding and noise removal.
     """
     try:
-        img = cv2.imread(image_path)
-        if img is None:
-            raise ValueError("Invalid image file or corrupted data.")
-
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                       cv2.THRESH_BINARY, 11, 2)
-        denoised = cv2.medianBlur(binary, 3)
-        return denoised
+        return preprocess_page(image, target_dpi=target_dpi, binarization=binarization,
+                               block_size=block_size, c=c, median_ksize=median_ksize)
     except Exception as e:
         logging.error(f"Error in preprocess_invoice: {e}")
         raise
@@ -41,36 +39,30 @@ def clean_text(text):
     Cleans extracted text by removing unwanted characters and formatting numbers correctly.
     """
     text = text.replace(',', '')  # Remove commas from numbers
-    text = re.sub(r'\s+', ' ', text).strip()  # Remove extra spaces
-    return text
+    return ' '.join(text.split())  # Collapse runs of whitespace, same as re.sub(r'\s+', ' ', text).strip()
 
-def extract_invoice_data(image_path):
+def parse_invoice_lines(text):
     """
-    Extracts structured data from invoice image using OCR.
+    Returns the invoice line items found in OCR text as [description, rate, qty, line total] lists.
     """
-    try:
-        img = preprocess_invoice(image_path)
-        text = pytesseract.image_to_string(img, config='--oem 3 --psm 6')
-
-        lines = [clean_text(line) for line in text.split('\n') if line.strip()]
-        
-        logging.info("Extracted OCR Text:")
-        for line in lines:
-            logging.info(repr(line))
+    lines = [clean_text(line) for line in text.split('\n') if line.strip()]
+    return get_extractor("invoice").extract_rows(lines)
 
-        extracted_data = []
-        
-        # Updated regex to capture invoice line items
-        pattern = re.compile(r'([A-Za-z0-9\-\(\)]+)\s+\$?([\d,]+\.\d{2})\s+(\d+)\s+\$?([\d,]+\.\d{2})')
+def extract_invoice_data(image):
+    """
+    Extracts structured data from an invoice image or PDF using OCR.
+    """
+    try:
+        # Invoice line items: description, rate, quantity and line total (see field_specs.json),
+        # OCRed from the line-item table region when the layout stage finds one
+        extracted_data, text = extract_with_layout(image, preprocess_invoice, PREPROCESS_PARAMS, TESSERACT_CONFIG,
+                                                   "invoice", parse_invoice_lines)
 
-        for line in lines:
-            match = pattern.search(line)
-            if match:
-                description = match.group(1).strip()
-                rate = clean_text(match.group(2))
-                qty = match.group(3).strip()
-                line_total = clean_text(match.group(4))
-                extracted_data.append([description, float(rate), int(qty), float(line_total)])
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Extracted OCR Text:")
+            for line in text.split('\n'):
+                if line.strip():
+                    logging.debug(repr(clean_text(line)))
 
         if not extracted_data:
             raise ValueError("No structured data found. Please check the invoice format.")
@@ -86,16 +78,12 @@ def process_invoice(file):
     Processes the uploaded invoice file and extracts structured data.
     """
     try:
-        temp_path = "temp_invoice.png"
-        with open(temp_path, "wb") as f:
-            f.write(file.read())
-
-        if not file.name.lower().endswith(('.png', '.jpg', '.jpeg')):
-            os.remove(temp_path)
-            raise ValueError("Unsupported file format. Please upload PNG or JPG.")
+        name = source_name(file)
+        if name is not None and not name.lower().endswith(('.png', '.jpg', '.jpeg', '.pdf')):
+            raise ValueError("Unsupported file format. Please upload PNG, JPG or PDF.")
 
-        invoice_df = extract_invoice_data(temp_path)
-        os.remove(temp_path)
+        # Decode straight from the upload buffer; no temp file, so concurrent sessions can't clobber each other
+        invoice_df = extract_invoice_data(file)
 
         if invoice_df.empty:
             raise ValueError("No text extracted. Please check the image quality.")
@@ -0,0 +1,358 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import cv2
+import numpy as np
+
+import instrumentation
+from supervised.image_io import load_image, read_bytes
+from supervised.ocr_cache import cached_image_to_string, get_cache, make_cache_key
+from supervised.ocr_engine import get_engine
+from supervised.pdf_io import PDF_DPI, PDF_OCR_WORKERS, document_to_text, is_pdf, iter_pdf_pages
+
+# Region-of-interest OCR: only the layout blocks a parser needs are OCRed (set to 0 for full-page OCR)
+LAYOUT_OCR = os.environ.get("BFSI_OCR_LAYOUT", "1") != "0"
+LAYOUT_WORKERS = int(os.environ.get("BFSI_OCR_LAYOUT_WORKERS", os.cpu_count() or 1))
+# Share of the expected values the regions must yield before full-page OCR is skipped.
+# Documents routinely leave a few fields out, so the default tolerates a quarter of them
+# missing instead of OCRing the page twice; raise it to 1.0 to favour completeness.
+LAYOUT_MIN_FOUND = float(os.environ.get("BFSI_OCR_LAYOUT_MIN_FOUND", 0.75))
+
+# Tesseract page segmentation mode per region kind: a uniform block for tables and
+# multi-line blocks, a single text line for one-line regions
+REGION_PSM = {
+    "table": 6,
+    "block": 6,
+    "line": 7,
+}
+
+# What each document type needs from a page: ruled tables, plus text lines with at
+# least `min_cells` columns. Lines are split into cells at wide horizontal gaps:
+# invoice line items have 4 cells (description, rate, qty, total), payslip and P&L
+# lines put a label and a value in separate columns.
+LAYOUT_PROFILES = {
+    "invoice": {"min_cells": 3},
+    "payslip": {"min_cells": 2},
+    "profit_loss": {"min_cells": 2},
+}
+# Profile of document types added through field specs
+DEFAULT_LAYOUT_PROFILE = {"min_cells": 2}
+
+# Gaps wider than this many glyph heights separate cells (columns) within a line
+CELL_GAP = 1.5
+# Lines closer than this many glyph heights are OCRed as one block
+BLOCK_GAP = 1.0
+
+
+def _glyph_height(ink):
+    count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    glyphs = heights[(heights >= 4) & (heights <= ink.shape[0] // 8) & (widths <= heights * 4)]
+    return float(np.median(glyphs)) if len(glyphs) else None
+
+
+def detect_tables(ink, min_width=0.3):
+    """
+    Finds ruled tables: boxes around the grid of long horizontal and vertical lines.
+    Returns (table boxes, ink with the rulings removed).
+    """
+    height, width = ink.shape
+    horizontal = cv2.morphologyEx(ink, cv2.MORPH_OPEN,
+                                  cv2.getStructuringElement(cv2.MORPH_RECT, (max(20, width // 25), 1)))
+    vertical = cv2.morphologyEx(ink, cv2.MORPH_OPEN,
+                                cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(20, height // 40))))
+    rulings = cv2.bitwise_or(horizontal, vertical)
+    grid = cv2.dilate(rulings, np.ones((5, 5), np.uint8))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(grid, connectivity=8)
+    tables = []
+    for x, y, w, h, _ in stats[1:]:
+        if w < width * min_width:
+            continue
+        # A table has at least two separate horizontal rulings; a lone rule or a dark page edge does not
+        rows = horizontal[y:y + h, x:x + w].any(axis=1).astype(np.int8)
+        if np.count_nonzero(np.diff(rows, prepend=0) == 1) >= 2:
+            tables.append((int(x), int(y), int(w), int(h)))
+    return tables, cv2.subtract(ink, rulings)
+
+
+def _group_lines(cells):
+    """
+    Groups cell boxes into text lines by vertical overlap, top to bottom.
+    """
+    lines = []
+    for box in sorted(cells, key=lambda b: b[1] + b[3] / 2):
+        x, y, w, h = box
+        if lines:
+            line = lines[-1]
+            top, bottom = line["top"], line["bottom"]
+            overlap = min(bottom, y + h) - max(top, y)
+            if overlap > 0.5 * min(h, bottom - top):
+                line["cells"].append(box)
+                line["top"], line["bottom"] = min(top, y), max(bottom, y + h)
+                continue
+        lines.append({"cells": [box], "top": y, "bottom": y + h})
+    for line in lines:
+        line["cells"].sort()
+    return lines
+
+
+def _union(boxes):
+    x0 = min(b[0] for b in boxes)
+    y0 = min(b[1] for b in boxes)
+    x1 = max(b[0] + b[2] for b in boxes)
+    y1 = max(b[1] + b[3] for b in boxes)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def _inside(box, container):
+    x, y, w, h = box
+    cx, cy = x + w / 2, y + h / 2
+    return container[0] <= cx <= container[0] + container[2] and container[1] <= cy <= container[1] + container[3]
+
+
+def detect_regions(binary, min_cells=2):
+    """
+    Locates the regions of a preprocessed page that hold label/value or table rows.
+
+    Ruled tables are found from their line grid and OCRed whole. Remaining text is smeared into
+    cells (runs of words with normal spacing); cells are grouped into lines, and
+    lines with at least `min_cells` columns are kept. Consecutive kept lines are
+    merged into blocks.
+
+    Args:
+        binary (np.ndarray): Preprocessed page, dark text on a light background.
+        min_cells (int): Minimum number of columns for a line to be kept.
+
+    Returns:
+        list: Region dicts {"kind", "box": (x, y, w, h), "psm"}, top to bottom.
+        Empty when nothing suitable is found, so callers can fall back to the full page.
+    """
+    ink = cv2.threshold(binary, 127, 255, cv2.THRESH_BINARY_INV)[1]
+    glyph = _glyph_height(ink)
+    if glyph is None:
+        return []
+
+    # Rulings are removed before grouping text, or they would join every row they cross
+    table_boxes, ink = detect_tables(ink)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, int(glyph * CELL_GAP)), max(1, int(glyph / 4))))
+    contours, _ = cv2.findContours(cv2.dilate(ink, kernel), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    cells = [box for box in map(cv2.boundingRect, contours) if box[3] >= glyph * 0.5]
+    cells = [box for box in cells if not any(_inside(box, table) for table in table_boxes)]
+
+    regions = [{"kind": "table", "box": box, "psm": REGION_PSM["table"]} for box in table_boxes]
+    block = []
+    for line in _group_lines(cells) + [None]:
+        keep = line is not None and len(line["cells"]) >= min_cells
+        if keep and block and line["top"] - block[-1]["bottom"] <= glyph * BLOCK_GAP:
+            block.append(line)
+            continue
+        if block:
+            kind = "block" if len(block) > 1 else "line"
+            box = _union([cell for line_ in block for cell in line_["cells"]])
+            regions.append({"kind": kind, "box": box, "psm": REGION_PSM[kind]})
+        block = [line] if keep else []
+
+    # Pad regions so Tesseract sees some background around the glyphs
+    pad = int(glyph / 2)
+    height, width = binary.shape[:2]
+    for region in regions:
+        x, y, w, h = region["box"]
+        x0, y0 = max(0, x - pad), max(0, y - pad)
+        region["box"] = (x0, y0, min(width, x + w + pad) - x0, min(height, y + h + pad) - y0)
+    regions.sort(key=lambda r: (r["box"][1], r["box"][0]))
+    return regions
+
+
+def with_psm(config, psm):
+    """
+    Returns the Tesseract config with its --psm replaced by `psm`.
+    """
+    config = re.sub(r"--psm\s+\d+", "", config or "").strip()
+    return f"{config} --psm {psm}".strip()
+
+
+_region_executor = None
+_region_executor_lock = threading.Lock()
+
+
+def get_region_executor():
+    """
+    Returns the process-wide pool that OCRs regions. It is shared by all pages being
+    processed, so OCRing the pages of a PDF in parallel doesn't multiply the threads.
+    """
+    global _region_executor
+    with _region_executor_lock:
+        if _region_executor is None:
+            _region_executor = ThreadPoolExecutor(max_workers=LAYOUT_WORKERS, thread_name_prefix="layout-ocr")
+        return _region_executor
+
+
+def ocr_regions(binary, regions, config=""):
+    """
+    OCRs the regions of a page in parallel, each with the PSM of its kind, and
+    returns them with their "text" filled in.
+    """
+    engine = get_engine()
+
+    def ocr(region):
+        x, y, w, h = region["box"]
+        crop = np.ascontiguousarray(binary[y:y + h, x:x + w])
+        return {**region, "text": engine.image_to_string(crop, config=with_psm(config, region["psm"])).strip()}
+
+    if LAYOUT_WORKERS <= 1 or len(regions) <= 1:
+        return [ocr(region) for region in regions]
+    return list(get_region_executor().map(ocr, regions))
+
+
+def page_regions(img, preprocess, preprocess_params=None, config="", profile="invoice"):
+    """
+    Preprocesses a page, detects its regions of interest and OCRs them.
+
+    The OCRed regions are cached as a whole under the page pixels, preprocessing,
+    config and profile, so a page seen before skips preprocessing too. Returns an
+    empty list when no region was found.
+    """
+    preprocess_params = preprocess_params or {}
+    settings = LAYOUT_PROFILES.get(profile, DEFAULT_LAYOUT_PROFILE)
+    cache = get_cache()
+    key = None
+    if cache is not None:
+        key = make_cache_key(img, preprocess.__name__, preprocess_params, f"{config}|layout={profile}",
+                             get_engine().name)
+        try:
+            cached = cache.get(key)
+        except sqlite3.Error as e:
+            logging.warning(f"OCR cache lookup failed: {e}")
+            cached = None
+        if cached is not None:
+            return [{**region, "box": tuple(region["box"])} for region in json.loads(cached)]
+
+    binary = preprocess(img, **preprocess_params)
+    with instrumentation.timer("layout_seconds", profile=profile):
+        regions = detect_regions(binary, **settings)
+    regions = ocr_regions(binary, regions, config)
+
+    if cache is not None:
+        try:
+            cache.put(key, json.dumps(regions))
+        except sqlite3.Error as e:
+            logging.warning(f"OCR cache write failed: {e}")
+    return regions
+
+
+def _page_regions_or_page(img, preprocess, preprocess_params, config, profile):
+    # A page without regions of interest is OCRed whole, as one region without a box
+    regions = page_regions(img, preprocess, preprocess_params, config, profile)
+    if regions:
+        return regions
+    text = cached_image_to_string(img, preprocess, preprocess_params, config)
+    return [{"kind": "page", "box": None, "psm": None, "text": text}]
+
+
+def layout_to_text(source, preprocess, preprocess_params=None, config="", profile="invoice",
+                   workers=PDF_OCR_WORKERS):
+    """
+    Region-of-interest counterpart of document_to_text for images and PDFs.
+
+    Scanned PDF pages are processed in parallel like pdf_to_text does, at most two
+    pages per worker in flight. A page with no region of interest is OCRed whole
+    (a "page" region without a box), so the other pages keep their region OCR.
+
+    Returns:
+        tuple: (text of the regions in reading order, list of region dicts with
+        "page", "kind", "box" and "text"). PDF pages with a text layer are returned
+        as one "text_layer" region without a box.
+    """
+    if isinstance(source, np.ndarray):
+        pages = [(1, None, source)]
+    else:
+        data = read_bytes(source)
+        pages = iter_pdf_pages(data, dpi=PDF_DPI) if is_pdf(data) else [(1, None, load_image(data))]
+
+    by_page = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = {}
+        for page_number, text, img in pages:
+            if text is not None:
+                by_page[page_number] = [{"kind": "text_layer", "box": None, "psm": None, "text": text}]
+                continue
+            future = executor.submit(_page_regions_or_page, img, preprocess, preprocess_params, config, profile)
+            pending[future] = page_number
+            if len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    by_page[pending.pop(future)] = future.result()
+        for future, page_number in pending.items():
+            by_page[page_number] = future.result()
+
+    regions = [{"page": page_number, **region} for page_number in sorted(by_page) for region in by_page[page_number]]
+    return "\n".join(region["text"] for region in regions), regions
+
+
+def _layout_used(regions):
+    return any(region["kind"] not in ("page", "text_layer") for region in regions)
+
+
+def _coverage(result):
+    """
+    (found, expected) of a parse result: non-None values of a dict of fields, rows of a
+    list of line items (a non-empty list counts as complete), summed over a tuple of both.
+    """
+    if isinstance(result, dict):
+        return sum(value is not None for value in result.values()), len(result)
+    if isinstance(result, tuple):
+        counts = [_coverage(part) for part in result]
+        return sum(found for found, _ in counts), sum(expected for _, expected in counts)
+    return len(result), max(len(result), 1)
+
+
+def _merge(layout, full):
+    """
+    Combines the region and full-page parses: fields missing from the regions are
+    taken from the full page, and the longer list of line items wins.
+    """
+    if isinstance(layout, dict):
+        return {key: layout[key] if layout[key] is not None else full.get(key) for key in layout}
+    if isinstance(layout, tuple):
+        return tuple(_merge(a, b) for a, b in zip(layout, full))
+    return layout if len(layout) >= len(full) else full
+
+
+def extract_with_layout(source, preprocess, preprocess_params=None, config="", profile="invoice", parse=None,
+                        use_layout=None):
+    """
+    OCRs the regions of interest of a document and parses their text with `parse`.
+
+    When the regions yield less than LAYOUT_MIN_FOUND of the expected values (fields
+    of a dict, line items of a list), the full page is OCRed as well and the two
+    parses are merged, so the result is never worse than full-page OCR alone.
+
+    Returns:
+        tuple: (parsed result, the OCR text it was parsed from).
+    """
+    if not isinstance(source, np.ndarray):
+        # Read once: file handles can't be read again for the fallback
+        source = read_bytes(source)
+    layout_result = None
+    if LAYOUT_OCR if use_layout is None else use_layout:
+        text, regions = layout_to_text(source, preprocess, preprocess_params, config, profile)
+        with instrumentation.timer("extract_seconds", profile=profile):
+            layout_result = parse(text)
+        found, expected = _coverage(layout_result)
+        # Without any region the text already is the full-page text
+        if found >= expected * LAYOUT_MIN_FOUND or not _layout_used(regions):
+            return layout_result, text
+        logging.info(f"Found {found} of {expected} values in the {profile} regions of interest, "
+                     f"adding full-page OCR")
+    text = document_to_text(source, preprocess, preprocess_params, config)
+    with instrumentation.timer("extract_seconds", profile=profile):
+        result = parse(text)
+    if layout_result is not None:
+        result = _merge(layout_result, result)
+    return result, text
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+import instrumentation
+from supervised.ocr_engine import get_engine
+
+# Cache location and size budget, overridable through the environment
+CACHE_DIR = os.environ.get("BFSI_OCR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bfsi-ocr"))
+CACHE_MAX_BYTES = int(os.environ.get("BFSI_OCR_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+CACHE_ENABLED = os.environ.get("BFSI_OCR_CACHE", "1") != "0"
+
+
+def make_cache_key(img, preprocess_name, preprocess_params, config, engine_name=None):
+    """
+    Builds a content-addressed key from the decoded image pixels, the preprocessing
+    step and its parameters, the Tesseract config string and the OCR engine
+    (defaults to the configured one), since engines can return different text.
+    """
+    engine_name = engine_name or get_engine().name
+    img = np.ascontiguousarray(img)
+    digest = hashlib.sha256()
+    digest.update(f"{img.shape}|{img.dtype}".encode())
+    digest.update(img.data)
+    digest.update(json.dumps([preprocess_name, preprocess_params, config, engine_name], sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Persistent OCR text cache backed by SQLite with size-bounded LRU eviction.
+    Safe to share between threads; separate processes each open their own connection.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "ocr_cache.sqlite3")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_text ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS ocr_text_last_access ON ocr_text (last_access)")
+
+    def get(self, key):
+        """
+        Returns the cached text for a key (refreshing its LRU position), or None on a miss.
+        """
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT text FROM ocr_text WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                instrumentation.inc("ocr_cache_misses_total")
+                return None
+            self.conn.execute("UPDATE ocr_text SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            instrumentation.inc("ocr_cache_hits_total")
+            return row[0]
+
+    def put(self, key, text):
+        """
+        Stores OCR text under a key, then evicts least recently used entries over the size budget.
+        """
+        size = len(text.encode("utf-8"))
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ocr_text (key, text, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, text, size, time.time()),
+            )
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_text").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = self.conn.execute(
+                    "SELECT key, size FROM ocr_text ORDER BY last_access LIMIT 1"
+                ).fetchone()
+                if oldest is None:
+                    break
+                self.conn.execute("DELETE FROM ocr_text WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+
+    def stats(self):
+        """
+        Returns hit/miss counters for this process along with the current cache size.
+        """
+        with self.lock:
+            entries, total = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_text"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total,
+                "max_bytes": self.max_bytes}
+
+    def clear(self):
+        """
+        Removes every cached entry and resets the counters.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM ocr_text")
+            self.hits = 0
+            self.misses = 0
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Returns the process-wide OCR cache, or None when caching is disabled.
+    A fresh connection is opened after a fork so worker processes never share one.
+    """
+    global _cache, _cache_pid
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = OCRCache()
+            _cache_pid = os.getpid()
+        return _cache
+
+
+def cached_image_to_string(img, preprocess, preprocess_params=None, config=""):
+    """
+    Runs `preprocess(img, **preprocess_params)` and the configured OCR engine on the
+    result, reusing the cached text when the same image was already OCRed with the
+    same settings.
+    """
+    preprocess_params = preprocess_params or {}
+    engine = get_engine()
+    cache = get_cache()
+    key = None
+    if cache is not None:
+        key = make_cache_key(img, preprocess.__name__, preprocess_params, config, engine.name)
+        try:
+            text = cache.get(key)
+        except sqlite3.Error as e:
+            logging.warning(f"OCR cache lookup failed: {e}")
+            text = None
+        if text is not None:
+            return text
+
+    text = engine.image_to_string(preprocess(img, **preprocess_params), config=config)
+
+    if cache is not None:
+        try:
+            cache.put(key, text)
+        except sqlite3.Error as e:
+            logging.warning(f"OCR cache write failed: {e}")
+    return text
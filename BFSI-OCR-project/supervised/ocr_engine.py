@@ -0,0 +1,160 @@
+import logging
+import os
+import queue
+import shlex
+import threading
+
+import cv2
+import pytesseract
+
+import instrumentation
+
+# OCR backend selection: "pytesseract" (a tesseract subprocess per call) or
+# "tesserocr" (a pool of long-lived Tesseract C-API instances with the model kept loaded)
+OCR_ENGINE = os.environ.get("BFSI_OCR_ENGINE", "pytesseract")
+OCR_LANG = os.environ.get("BFSI_OCR_LANG", "eng")
+OCR_POOL_SIZE = int(os.environ.get("BFSI_OCR_POOL_SIZE", os.cpu_count() or 1))
+
+
+def parse_tesseract_config(config):
+    """
+    Splits a Tesseract CLI config string into (oem, psm, variables).
+    Unset --oem/--psm are returned as None.
+    """
+    oem, psm, variables = None, None, {}
+    tokens = shlex.split(config or "")
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == "--oem":
+            oem = int(tokens[i + 1])
+            i += 1
+        elif token == "--psm":
+            psm = int(tokens[i + 1])
+            i += 1
+        elif token == "-c":
+            name, _, value = tokens[i + 1].partition("=")
+            variables[name] = value
+            i += 1
+        i += 1
+    return oem, psm, variables
+
+
+class PytesseractEngine:
+    """
+    Runs a fresh tesseract subprocess per call through pytesseract. Always available.
+    """
+    name = "pytesseract"
+
+    def image_to_string(self, img, config=""):
+        with instrumentation.timer("ocr_seconds", engine=self.name):
+            return pytesseract.image_to_string(img, config=config)
+
+
+class TesserocrEngine:
+    """
+    Keeps a pool of initialized tesserocr.PyTessBaseAPI instances per config string,
+    so the traineddata is loaded once per worker instead of once per page.
+    Each instance is used by one thread at a time.
+    """
+    name = "tesserocr"
+
+    def __init__(self, lang=OCR_LANG, pool_size=OCR_POOL_SIZE):
+        try:
+            import tesserocr
+        except ImportError:
+            raise ValueError("The tesserocr OCR engine requires the tesserocr package. "
+                             "Install it or set BFSI_OCR_ENGINE=pytesseract.")
+        from PIL import Image
+        self.tesserocr = tesserocr
+        self.Image = Image
+        self.lang = lang
+        self.pool_size = pool_size
+        self.pools = {}
+        self.created = {}
+        self.lock = threading.Lock()
+
+    def _create_api(self, config):
+        oem, psm, variables = parse_tesseract_config(config)
+        with instrumentation.timer("model_load_seconds", model="tesserocr"):
+            api = self.tesserocr.PyTessBaseAPI(
+                lang=self.lang,
+                oem=self.tesserocr.OEM.DEFAULT if oem is None else oem,
+                psm=self.tesserocr.PSM.AUTO if psm is None else psm,
+            )
+        for name, value in variables.items():
+            api.SetVariable(name, value)
+        return api
+
+    def _acquire(self, config):
+        while True:
+            with self.lock:
+                pool = self.pools.setdefault(config, queue.LifoQueue())
+                try:
+                    return pool.get_nowait()
+                except queue.Empty:
+                    if self.created.get(config, 0) < self.pool_size:
+                        self.created[config] = self.created.get(config, 0) + 1
+                        create = True
+                    else:
+                        create = False
+            if create:
+                try:
+                    return self._create_api(config)
+                except Exception:
+                    # Give the slot back so a failed creation doesn't shrink the pool for good
+                    with self.lock:
+                        self.created[config] -= 1
+                    raise
+            try:
+                # Re-check periodically: a slot freed by a failed creation is never put on the queue
+                return pool.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def image_to_string(self, img, config=""):
+        if img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        api = self._acquire(config)
+        try:
+            with instrumentation.timer("ocr_seconds", engine=self.name):
+                api.SetImage(self.Image.fromarray(img))
+                return api.GetUTF8Text()
+        finally:
+            self.pools[config].put(api)
+
+    def close(self):
+        with self.lock:
+            for pool in self.pools.values():
+                while not pool.empty():
+                    pool.get_nowait().End()
+            self.pools.clear()
+            self.created.clear()
+
+
+ENGINES = {
+    "pytesseract": PytesseractEngine,
+    "tesserocr": TesserocrEngine,
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(name=None):
+    """
+    Returns the process-wide OCR engine for `name` (defaults to BFSI_OCR_ENGINE).
+    Falls back to the pytesseract subprocess engine when the configured backend
+    is not installed.
+    """
+    name = name or OCR_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unknown OCR engine: {name}. Choose one of {sorted(ENGINES)}.")
+    with _engines_lock:
+        if name not in _engines:
+            try:
+                _engines[name] = ENGINES[name]()
+            except ValueError as e:
+                logging.warning(f"{e} Falling back to the pytesseract engine.")
+                _engines[name] = PytesseractEngine()
+        return _engines[name]
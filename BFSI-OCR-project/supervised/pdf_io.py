@@ -0,0 +1,101 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import cv2
+import numpy as np
+
+import instrumentation
+from supervised.image_io import load_image, read_bytes
+from supervised.ocr_cache import cached_image_to_string
+
+# Rasterization resolution and OCR parallelism for multi-page PDFs
+PDF_DPI = int(os.environ.get("BFSI_OCR_PDF_DPI", 200))
+PDF_OCR_WORKERS = int(os.environ.get("BFSI_OCR_PDF_WORKERS", os.cpu_count() or 1))
+
+# Pages whose embedded text layer has at least this many characters are not OCRed
+MIN_TEXT_CHARS = 20
+
+
+def _open_pdf(data):
+    """
+    Opens PDF bytes with PyMuPDF, which is only required when a PDF is actually uploaded.
+    """
+    try:
+        import pymupdf
+    except ImportError:
+        try:
+            import fitz as pymupdf
+        except ImportError:
+            raise ValueError("PDF support requires PyMuPDF. Install it with `pip install pymupdf`.")
+    return pymupdf.open(stream=data, filetype="pdf")
+
+
+def is_pdf(data):
+    """
+    Checks the magic bytes of a document for a PDF header.
+    """
+    return data[:1024].lstrip().startswith(b"%PDF-")
+
+
+def iter_pdf_pages(source, dpi=PDF_DPI, min_text_chars=MIN_TEXT_CHARS):
+    """
+    Lazily yields (page_number, text, image) for every page of a PDF.
+
+    Pages with an embedded text layer yield their text and no image; other pages are
+    rasterized at `dpi` into a BGR numpy array and yield no text. Only the current
+    page is rasterized, so memory does not grow with the page count.
+    """
+    data = source if isinstance(source, bytes) else read_bytes(source)
+    with _open_pdf(data) as pdf:
+        for page_number, page in enumerate(pdf, start=1):
+            with instrumentation.timer("decode_seconds", format="pdf_text"):
+                text = page.get_text()
+            if len(text.strip()) >= min_text_chars:
+                yield page_number, text, None
+                continue
+            with instrumentation.timer("decode_seconds", format="pdf_raster"):
+                pix = page.get_pixmap(dpi=dpi, alpha=False)
+                img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+                if pix.n == 1:
+                    img = img.copy()
+                else:
+                    img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+            yield page_number, None, img
+
+
+def pdf_to_text(source, preprocess, preprocess_params=None, config="", dpi=PDF_DPI, workers=PDF_OCR_WORKERS):
+    """
+    Returns the text of every PDF page in order, OCRing scanned pages in parallel.
+
+    Rasterization stays on the calling thread while Tesseract runs on a thread pool;
+    at most two pages per worker are waiting for OCR at any time.
+    """
+    texts = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        for page_number, text, img in iter_pdf_pages(source, dpi=dpi):
+            if text is not None:
+                texts[page_number] = text
+                continue
+            future = executor.submit(cached_image_to_string, img, preprocess, preprocess_params, config)
+            pending[future] = page_number
+            if len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    texts[pending.pop(future)] = future.result()
+        for future, page_number in pending.items():
+            texts[page_number] = future.result()
+    return [texts[page_number] for page_number in sorted(texts)]
+
+
+def document_to_text(source, preprocess, preprocess_params=None, config=""):
+    """
+    Returns the text of an image or PDF document, OCRing it through the cache.
+    The pages of a PDF are joined into one text so the existing extractors apply unchanged.
+    """
+    if isinstance(source, np.ndarray):
+        return cached_image_to_string(source, preprocess, preprocess_params, config)
+    data = read_bytes(source)
+    if is_pdf(data):
+        return "\n".join(pdf_to_text(data, preprocess, preprocess_params, config))
+    return cached_image_to_string(load_image(data), preprocess, preprocess_params, config)
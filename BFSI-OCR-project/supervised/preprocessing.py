@@ -0,0 +1,256 @@
+import os
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+import instrumentation
+from supervised.image_io import load_image, to_grayscale
+
+# Resolution pages are normalized to before OCR; Tesseract works best around 300 DPI
+TARGET_DPI = int(os.environ.get("BFSI_OCR_TARGET_DPI", 300))
+# Pages are never enlarged more than this, and never made longer than MAX_SIDE pixels
+MAX_UPSCALE = 2.0
+MAX_SIDE = int(os.environ.get("BFSI_OCR_MAX_SIDE", 5000))
+# Rescaling by less than this fraction is skipped
+MIN_RESCALE = 0.1
+# Median glyph height (between x-height and cap height) of 10-11pt body text,
+# used to estimate the DPI of photos and screenshots
+TEXT_HEIGHT_INCHES = 0.07
+# Skew outside this range is either noise or not a scanning artefact (e.g. landscape pages)
+MIN_SKEW_DEGREES = 0.3
+MAX_SKEW_DEGREES = 10.0
+# Long side of the thumbnail that page analysis (DPI, skew, margins, lighting) runs on
+ANALYSIS_SIDE = 1000
+# Background brightness spread above which a page is treated as unevenly lit
+UNEVEN_LIGHTING = 0.15
+MARGIN_PADDING = 10
+
+BINARIZATION_METHODS = ("auto", "otsu", "adaptive", "fixed", "none")
+
+
+@contextmanager
+def _stage(name, timings):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + seconds
+        instrumentation.observe("preprocess_seconds", seconds, stage=name)
+
+
+def stage_timings():
+    """
+    Returns the process-wide time spent per preprocessing stage:
+    {stage: {"count": ..., "seconds": ..., "mean_ms": ...}}.
+    Empty when instrumentation is disabled (BFSI_METRICS=0).
+    """
+    return {
+        series["labels"]["stage"]: {"count": series["count"], "seconds": round(series["sum"], 4),
+                                    "mean_ms": round(1000 * series["sum"] / series["count"], 3)}
+        for series in instrumentation.snapshot()["histograms"] if series["name"] == "preprocess_seconds"
+    }
+
+
+def reset_stage_timings():
+    instrumentation.reset("preprocess_seconds")
+
+
+def _thumbnail(gray, side=ANALYSIS_SIDE):
+    """
+    Returns (thumbnail, scale) with the long side at most `side` pixels.
+    """
+    scale = min(1.0, side / max(gray.shape[:2]))
+    if scale == 1.0:
+        return gray, 1.0
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale
+
+
+def estimate_dpi(ink, scale=1.0):
+    """
+    Estimates the resolution of a page from the median height of its glyphs.
+
+    Args:
+        ink (np.ndarray): Binary thumbnail with text as non-zero pixels.
+        scale (float): Thumbnail size relative to the page.
+
+    Returns:
+        float or None: Estimated DPI, or None when no text-like components are found.
+    """
+    count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    # Glyph-sized components only: drop specks, rules, pictures and page borders
+    glyphs = heights[(heights >= 3) & (heights <= ink.shape[0] // 8) & (widths <= heights * 4)]
+    if len(glyphs) < 10:
+        return None
+    return float(np.median(glyphs)) / scale / TEXT_HEIGHT_INCHES
+
+
+def estimate_skew(ink):
+    """
+    Estimates the skew angle in degrees from the orientation of text lines.
+
+    Words are smeared horizontally into line blobs, and the length-weighted median
+    angle of their minimum-area rectangles is returned (0.0 when nothing line-like is found).
+    """
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(9, ink.shape[1] // 50), 1))
+    lines = cv2.dilate(ink, kernel)
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    angles, weights = [], []
+    for contour in contours:
+        (_, _), (width, height), angle = cv2.minAreaRect(contour)
+        if width < height:
+            width, height = height, width
+            angle -= 90
+        # Only long, thin blobs are reliable text lines
+        if width < ink.shape[1] * 0.1 or width < height * 5:
+            continue
+        angle = (angle + 45) % 90 - 45
+        angles.append(angle)
+        weights.append(width)
+    if not angles:
+        return 0.0
+    order = np.argsort(angles)
+    cumulative = np.cumsum(np.asarray(weights)[order])
+    return float(np.asarray(angles)[order][np.searchsorted(cumulative, cumulative[-1] / 2)])
+
+
+def content_box(ink, scale=1.0, padding=MARGIN_PADDING):
+    """
+    Returns the (x, y, width, height) of the page content, in page pixels, ignoring
+    isolated specks; None when the page is blank.
+    """
+    count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    # Components of a few pixels are specks; thin strokes survive, unlike with a morphological opening
+    stats = stats[1:][stats[1:, cv2.CC_STAT_AREA] >= 4]
+    if not len(stats):
+        return None
+    x, y = stats[:, 0].min(), stats[:, 1].min()
+    w, h = (stats[:, 0] + stats[:, 2]).max() - x, (stats[:, 1] + stats[:, 3]).max() - y
+    pad = padding * scale
+    height, width = ink.shape[:2]
+    x0, y0 = max(0.0, x - pad), max(0.0, y - pad)
+    x1, y1 = min(float(width), x + w + pad), min(float(height), y + h + pad)
+    return int(x0 / scale), int(y0 / scale), int(np.ceil((x1 - x0) / scale)), int(np.ceil((y1 - y0) / scale))
+
+
+def choose_binarization(thumb):
+    """
+    Picks the binarization strategy of a page: adaptive thresholding when the
+    background brightness varies across the page (shadows, phone photos),
+    global Otsu thresholding otherwise.
+    """
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(15, max(thumb.shape) // 20),) * 2)
+    # Closing removes the (dark) text, leaving an estimate of the background illumination
+    background = cv2.morphologyEx(thumb, cv2.MORPH_CLOSE, kernel)
+    low, high = np.percentile(background, (5, 95))
+    return "adaptive" if (high - low) / 255.0 > UNEVEN_LIGHTING else "otsu"
+
+
+def analyze_page(gray):
+    """
+    Measures a grayscale page on a thumbnail: estimated DPI, skew angle,
+    content box and the binarization strategy it needs.
+    """
+    thumb, scale = _thumbnail(gray)
+    _, ink = cv2.threshold(thumb, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return {
+        "dpi": estimate_dpi(ink, scale),
+        "skew": estimate_skew(ink),
+        "box": content_box(ink, scale),
+        "binarization": choose_binarization(thumb),
+    }
+
+
+def _rescale_factor(shape, dpi, target_dpi):
+    factor = target_dpi / dpi if dpi else 1.0
+    factor = min(factor, MAX_UPSCALE, MAX_SIDE / max(shape[:2]))
+    return 1.0 if abs(factor - 1.0) < MIN_RESCALE else factor
+
+
+def binarize(gray, method="otsu", block_size=31, c=10, median_ksize=0, blur_ksize=0, threshold=180):
+    """
+    Binarizes a grayscale page in place (the array is overwritten and returned).
+
+    Args:
+        method (str): "otsu", "adaptive", "fixed" (global `threshold`) or "none".
+        block_size, c: Adaptive threshold neighbourhood size and offset.
+        median_ksize (int): Median filter applied after thresholding (0 disables it).
+        blur_ksize (int): Gaussian blur applied before thresholding (0 disables it).
+    """
+    if blur_ksize:
+        cv2.GaussianBlur(gray, (blur_ksize, blur_ksize), 0, dst=gray)
+    if method == "otsu":
+        cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=gray)
+    elif method == "adaptive":
+        cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, c, dst=gray)
+    elif method == "fixed":
+        cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY, dst=gray)
+    elif method != "none":
+        raise ValueError(f"Unknown binarization method: {method}")
+    if median_ksize:
+        cv2.medianBlur(gray, median_ksize, dst=gray)
+    return gray
+
+
+def preprocess_page(image, target_dpi=TARGET_DPI, deskew=True, crop_margins=True, binarization="auto",
+                    block_size=31, c=10, median_ksize=0, blur_ksize=0, threshold=180, timings=None):
+    """
+    Shared OCR preprocessing: grayscale, margin crop, DPI normalization and deskew,
+    then binarization.
+
+    Page analysis runs once on a small thumbnail. Cropping is a view, rescaling and
+    rotation are a single resampling pass, and binarization works in place, so a
+    page is copied at most once after grayscale conversion.
+
+    Args:
+        image: Numpy array, bytes, file path or uploaded file.
+        target_dpi (int): Resolution to normalize to (None keeps the input size).
+        deskew (bool): Straighten pages scanned or photographed at a small angle.
+        crop_margins (bool): Drop empty borders before resampling.
+        binarization (str): One of BINARIZATION_METHODS; "auto" picks per page.
+        timings (dict): Optional dict that receives the seconds spent per stage.
+
+    Returns:
+        np.ndarray: Single-channel uint8 image ready for Tesseract.
+    """
+    if binarization not in BINARIZATION_METHODS:
+        raise ValueError(f"Unknown binarization method: {binarization}")
+    with _stage("load", timings):
+        gray = to_grayscale(load_image(image))
+        # Arrays handed in by the caller are never modified
+        owned = gray is not image
+
+    with _stage("analyze", timings):
+        page = analyze_page(gray)
+
+    with _stage("crop", timings):
+        if crop_margins and page["box"] is not None:
+            x, y, w, h = page["box"]
+            gray = gray[y:y + h, x:x + w]
+
+    with _stage("geometry", timings):
+        factor = _rescale_factor(gray.shape, page["dpi"], target_dpi) if target_dpi else 1.0
+        angle = page["skew"] if deskew and MIN_SKEW_DEGREES <= abs(page["skew"]) <= MAX_SKEW_DEGREES else 0.0
+        height, width = gray.shape[:2]
+        size = (max(1, round(width * factor)), max(1, round(height * factor)))
+        interpolation = cv2.INTER_AREA if factor < 1 else cv2.INTER_CUBIC
+        if angle:
+            matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, factor)
+            matrix[:, 2] += (size[0] - width) / 2, (size[1] - height) / 2
+            gray = cv2.warpAffine(gray, matrix, size, flags=interpolation if factor >= 1 else cv2.INTER_LINEAR,
+                                  borderMode=cv2.BORDER_REPLICATE)
+        elif factor != 1.0:
+            gray = cv2.resize(gray, size, interpolation=interpolation)
+        elif not owned or not gray.flags["C_CONTIGUOUS"]:
+            gray = np.ascontiguousarray(gray) if owned else gray.copy()
+
+    with _stage("binarize", timings):
+        method = page["binarization"] if binarization == "auto" else binarization
+        binarize(gray, method, block_size=block_size, c=c, median_ksize=median_ksize,
+                 blur_ksize=blur_ksize, threshold=threshold)
+    return gray
@@ -1,63 +1,40 @@
+import logging
 
-import pytesseract
-import cv2
-import numpy as np
-import re
 import pandas as pd
 
+from supervised.fields import get_extractor
+from supervised.layout import extract_with_layout
+from supervised.preprocessing import TARGET_DPI, preprocess_page
+
+# OCR settings; both are part of the OCR cache key
+TESSERACT_CONFIG = ''
+PREPROCESS_PARAMS = {"target_dpi": TARGET_DPI, "binarization": "auto", "blur_ksize": 5, "threshold": 180}
+
+def preprocess_profit_loss(image, target_dpi=TARGET_DPI, binarization="auto", blur_ksize=5, threshold=180):
+    """
+    Runs the shared preprocessing pipeline on the statement, with a Gaussian blur
+    to reduce noise before thresholding; `threshold` is used when binarization is "fixed".
+    """
+    return preprocess_page(image, target_dpi=target_dpi, binarization=binarization,
+                           blur_ksize=blur_ksize, threshold=threshold)
+
 def process_profit_loss(uploaded_profit_loss):
     """
     Processes the uploaded Profit & Loss statement to extract financial data.
 
     Args:
-        uploaded_profit_loss: The uploaded file object (PDF, JPG, or PNG).
+        uploaded_profit_loss: The uploaded file object (PDF, JPG, or PNG), raw bytes, a path or a numpy array.
 
     Returns:
         A DataFrame containing extracted financial data.
     """
     try:
-        # Read the uploaded image using OpenCV
-        img = cv2.imdecode(np.frombuffer(uploaded_profit_loss.read(), np.uint8), cv2.IMREAD_COLOR)
-
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-        # Apply Gaussian blur to reduce noise
-        gray = cv2.GaussianBlur(gray, (5, 5), 0)
-
-        # Apply thresholding to improve OCR
-        _, thresh = cv2.threshold(gray, 180, 255, cv2.THRESH_BINARY)
-
-        # Extract text from image using Tesseract OCR
-        text = pytesseract.image_to_string(thresh)
-
-        # Print extracted text for debugging
-        print("Extracted OCR Text:\n", text)
-
-        # Define regex patterns to extract financial values
-        patterns = {
-            "Gross Profit": r"Gross profit\s+([\d,]+)",
-            "Dividends Received": r"Dividends received\s+([\d,]+)",
-            "Profit on Sale of Machine": r"Profit on sale of machine\s+([\d,]+)",
-            "Depreciation": r"Depreciation\s+\(?([\d,]+)\)?",  # Handles negative values with or without parentheses
-            "Interest Expense": r"Interest expense\s+\(?([\d,]+)\)?",
-            "Distribution and Admin Expenses": r"Distribution, administration and other expenses\s+\(?([\d,]+)\)?",
-            "Taxation": r"Taxation\s+\(?([\d,]+)\)?",
-            "Net Profit": r"Profit for the year after taxation\s+([\d,]+)"
-        }
+        # OCR the label/value regions of the image or PDF and extract financial data with the compiled
+        # spec (see field_specs.json); values in parentheses are negative. Cached text is reused for pages seen before
+        profit_loss_data, text = extract_with_layout(uploaded_profit_loss, preprocess_profit_loss, PREPROCESS_PARAMS,
+                                                     TESSERACT_CONFIG, "profit_loss", get_extractor("profit_loss").extract)
 
-        # Extract financial data
-        profit_loss_data = {}
-        for key, pattern in patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                value = match.group(1).replace(",", "")  # Remove commas from numbers
-                # Handle negative values (if enclosed in parentheses)
-                if "(" in match.group(0) and ")" in match.group(0):
-                    value = f"-{value}"
-                profit_loss_data[key] = int(value)
-            else:
-                profit_loss_data[key] = None  # If not found, mark as None
+        logging.debug(f"Extracted OCR Text:\n{text}")
 
         # Convert the dictionary to a DataFrame for visualization
         profit_loss_df = pd.DataFrame(list(profit_loss_data.items()), columns=["Field", "Value"])
@@ -1,10 +1,232 @@
+import hashlib
+import logging
+import os
+import pickle
+import re
+import shutil
+import threading
+
 import pandas as pd
-from transformers import BartForConditionalGeneration, BartTokenizer
-import torch
-from sklearn.cluster import KMeans
 import json
 
-def classify_data(uploaded_data, transaction_id=None):
+import instrumentation
+from unsupervised.classifiers import make_classifier
+from unsupervised.clustering import fit_clusters
+from unsupervised.label_cache import classify_unique
+from unsupervised.streaming import prepare_transactions
+
+# Hugging Face model id or local directory (for offline use) of the BART checkpoint
+BART_MODEL_NAME = os.environ.get("BFSI_BART_MODEL", "facebook/bart-large")
+# Number of transactions tokenized and generated together
+BATCH_SIZE = int(os.environ.get("BFSI_BART_BATCH_SIZE", 16))
+MAX_INPUT_LENGTH = 512
+MAX_OUTPUT_LENGTH = 150
+# Generation length cap per use case, in tokens; transaction labels are short, so classification
+# stops long before the general cap instead of letting a runaway generation run to 150 tokens
+MAX_OUTPUT_LENGTHS = {
+    "classify": int(os.environ.get("BFSI_BART_CLASSIFY_MAX_LENGTH", 64)),
+}
+
+# Inference runtime: "fp32" (PyTorch), "int8" (PyTorch dynamic int8 quantization of the Linear
+# layers) or "onnx" (ONNX Runtime through optimum). int8 weights and onnx models are built on
+# first use and cached under BART_ARTIFACT_DIR, rebuilt whenever the source checkpoint changes.
+BART_RUNTIME = os.environ.get("BFSI_BART_RUNTIME", "fp32")
+BART_ARTIFACT_DIR = os.environ.get(
+    "BFSI_BART_ARTIFACT_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bfsi-ocr", "bart")
+)
+# Written into an exported ONNX directory; holds the fingerprint of the checkpoint it came from
+ONNX_FINGERPRINT_FILE = "bfsi-fingerprint.txt"
+# Intra-op threads of PyTorch / ONNX Runtime; one process per host should use every core
+BART_THREADS = int(os.environ.get("BFSI_BART_THREADS", os.cpu_count() or 1))
+
+_models = {}
+_models_lock = threading.Lock()
+
+def _artifact_path(model_name, runtime):
+    name = re.sub(r"[^\w.-]+", "--", model_name.strip("/\\"))
+    return os.path.join(BART_ARTIFACT_DIR, f"{name}-{runtime}")
+
+def _checkpoint_fingerprint(model_name, *versions):
+    """
+    Identifies the checkpoint an artifact is built from: the model name and library
+    versions, plus the path, size and mtime of every file of a local checkpoint
+    directory (or the cached snapshot revision of a Hub model id).
+    """
+    import transformers
+
+    digest = hashlib.sha256("|".join([model_name, transformers.__version__, *versions]).encode())
+    if os.path.isdir(model_name):
+        for root, dirs, files in os.walk(model_name):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                stat = os.stat(file_path)
+                digest.update(f"{os.path.relpath(file_path, model_name)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    else:
+        from huggingface_hub import try_to_load_from_cache
+
+        # The snapshot path carries the commit hash of the downloaded revision
+        config_path = try_to_load_from_cache(model_name, "config.json")
+        if isinstance(config_path, str):
+            digest.update(config_path.encode())
+    return digest.hexdigest()
+
+def _load_fp32(model_name, local_only):
+    import torch
+    from transformers import BartForConditionalGeneration
+
+    torch.set_num_threads(BART_THREADS)
+    model = BartForConditionalGeneration.from_pretrained(model_name, local_files_only=local_only)
+    return model.eval()
+
+def _quantize(model):
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def _load_int8(model_name, local_only):
+    import torch
+    from transformers import BartConfig, BartForConditionalGeneration
+
+    path = _artifact_path(model_name, "int8") + ".pt"
+    fingerprint = _checkpoint_fingerprint(model_name, torch.__version__)
+    torch.set_num_threads(BART_THREADS)
+    saved = None
+    if os.path.exists(path):
+        try:
+            # Tensors and plain containers only: nothing in the artifact can run code on load
+            saved = torch.load(path, weights_only=True)
+        except (OSError, RuntimeError, pickle.UnpicklingError) as e:
+            logging.warning(f"Ignoring unreadable int8 BART artifact {path}: {e}")
+    if isinstance(saved, dict) and saved.get("fingerprint") == fingerprint:
+        # Rebuild the quantized architecture from the config alone, then load the saved int8 weights
+        config = BartConfig.from_pretrained(model_name, local_files_only=local_only)
+        model = _quantize(BartForConditionalGeneration(config))
+        model.load_state_dict(saved["state_dict"])
+        return model.eval()
+    model = _quantize(_load_fp32(model_name, local_only))
+    os.makedirs(BART_ARTIFACT_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save({"fingerprint": fingerprint, "state_dict": model.state_dict()}, tmp_path)
+    os.replace(tmp_path, path)
+    return model.eval()
+
+def _load_onnx(model_name, local_only):
+    try:
+        import onnxruntime
+        import optimum
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError:
+        raise ValueError("The onnx BART runtime requires optimum and onnxruntime. Install them with "
+                         "`pip install optimum[onnxruntime]` or set BFSI_BART_RUNTIME=fp32.")
+    path = _artifact_path(model_name, "onnx")
+    fingerprint = _checkpoint_fingerprint(model_name, getattr(optimum, "__version__", ""))
+    fingerprint_path = os.path.join(path, ONNX_FINGERPRINT_FILE)
+    try:
+        with open(fingerprint_path) as f:
+            fresh = f.read() == fingerprint
+    except OSError:
+        fresh = False
+    if not fresh:
+        # Export to a temporary directory first, so concurrent loaders never see a partial model
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, local_files_only=local_only).save_pretrained(tmp_path)
+        with open(os.path.join(tmp_path, ONNX_FINGERPRINT_FILE), "w") as f:
+            f.write(fingerprint)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = BART_THREADS
+    options.inter_op_num_threads = 1
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ORTModelForSeq2SeqLM.from_pretrained(path, session_options=options, provider="CPUExecutionProvider")
+
+BART_RUNTIMES = {
+    "fp32": _load_fp32,
+    "int8": _load_int8,
+    "onnx": _load_onnx,
+}
+
+def load_bart_model(model_name=BART_MODEL_NAME, runtime=None):
+    """
+    Loads the BART tokenizer and model once per process and returns the cached pair.
+
+    Args:
+        model_name (str): Hugging Face model id, or a local directory to load offline.
+        runtime (str): "fp32", "int8" or "onnx" (defaults to BFSI_BART_RUNTIME).
+
+    Returns:
+        tuple: (tokenizer, model) with the model ready for generate().
+    """
+    runtime = runtime or BART_RUNTIME
+    if runtime not in BART_RUNTIMES:
+        raise ValueError(f"Unknown BART runtime: {runtime}. Choose one of {sorted(BART_RUNTIMES)}.")
+    with _models_lock:
+        if (model_name, runtime) not in _models:
+            # Imported here: torch and transformers take seconds and hundreds of MB, and only BART needs them
+            from transformers import BartTokenizer
+
+            local_only = os.path.isdir(model_name)
+            with instrumentation.timer("model_load_seconds", model="bart", runtime=runtime):
+                tokenizer = BartTokenizer.from_pretrained(model_name, local_files_only=local_only)
+                model = BART_RUNTIMES[runtime](model_name, local_only)
+            _models[(model_name, runtime)] = (tokenizer, model)
+        return _models[(model_name, runtime)]
+
+def iter_classifications(texts, batch_size=BATCH_SIZE, model_name=BART_MODEL_NAME, runtime=None, max_length=None):
+    """
+    Runs BART over texts in length-sorted micro-batches and yields (index, result) pairs.
+
+    Sorting by length keeps padding per batch small; only one batch of tensors is
+    alive at a time, so memory is bounded by the batch size rather than the input size.
+    Generation stops at `max_length` tokens (defaults to the classification cap).
+    """
+    import torch
+
+    max_length = max_length or MAX_OUTPUT_LENGTHS["classify"]
+    runtime = runtime or BART_RUNTIME
+    tokenizer, model = load_bart_model(model_name, runtime)
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            with instrumentation.timer("tokenize_seconds", model="bart"):
+                inputs = tokenizer([texts[i] for i in batch], return_tensors="pt", padding=True,
+                                   truncation=True, max_length=MAX_INPUT_LENGTH)
+            with instrumentation.timer("generate_seconds", model="bart", runtime=runtime):
+                summary = model.generate(inputs['input_ids'], attention_mask=inputs['attention_mask'],
+                                         max_length=max_length)
+            with instrumentation.timer("tokenize_seconds", model="bart", step="decode"):
+                decoded = tokenizer.batch_decode(summary, skip_special_tokens=True)
+            for index, result in zip(batch, decoded):
+                yield index, result
+
+def classify_texts(texts, batch_size=BATCH_SIZE, model_name=BART_MODEL_NAME, runtime=None, max_length=None):
+    """
+    Returns the BART classification of every text, in input order.
+    """
+    results = [None] * len(texts)
+    for index, result in iter_classifications(texts, batch_size=batch_size, model_name=model_name,
+                                              runtime=runtime, max_length=max_length):
+        results[index] = result
+    return results
+
+def classify_data(uploaded_data, transaction_id=None, batch_size=BATCH_SIZE, backend="bart", return_stats=False):
+    """
+    Classifies the transactions of an uploaded CSV/JSON file.
+
+    Args:
+        uploaded_data: Uploaded file object with a name ending in .csv or .json.
+        transaction_id: Optional Transaction ID to return the result for.
+        batch_size (int): Micro-batch size for the BART backend.
+        backend (str): Classifier backend: "bart" (slow, generative; "bart-int8" and "bart-onnx"
+            are its optimized CPU runtimes), "keyword" or "linear" (CPU-fast).
+        return_stats (bool): Also return the deduplication stats of the run.
+
+    Returns:
+        list: Records with the classification result of each transaction
+        (a (records, stats) tuple when return_stats is True).
+    """
     try:
         # Read the data based on the file format
         if uploaded_data.name.endswith('.csv'):
@@ -14,65 +236,56 @@ def classify_data(uploaded_data, transaction_id=None):
         else:
             raise ValueError("Unsupported file format. Please upload a CSV or JSON file.")
 
-        # Ensure essential columns exist
-        required_columns = ["Transaction_ID", "Description", "Amount", "Date"]
-        for col in required_columns:
-            if col not in data.columns:
-                raise ValueError(f"Missing required column: {col}")
-
-        # Fill missing values with placeholders
-        data.fillna("Unknown", inplace=True)
+        # Ensure essential columns exist, fill missing text values and build Text_Input
+        prepare_transactions(data)
 
-        # Combine Description and Amount into a single text string for BART processing
-        data["Text_Input"] = data["Description"] + " - " + data["Amount"].astype(str)
-
-        # Initialize the BART model and tokenizer
-        tokenizer = BartTokenizer.from_pretrained('facebook/bart-large')
-        model = BartForConditionalGeneration.from_pretrained('facebook/bart-large')
-
-        # Tokenize and generate summaries/classifications for each transaction
-        inputs = tokenizer(list(data["Text_Input"]), return_tensors="pt", padding=True, truncation=True, max_length=512)
-        summary = model.generate(inputs['input_ids'], max_length=150)
-
-        # Decode the output summaries and prepare the classification result
-        decoded_summary = [tokenizer.decode(s, skip_special_tokens=True) for s in summary]
-
-        # Add the summary back to the data
-        data["Classification_Result"] = decoded_summary
+        # Classify each unique description once with the selected backend and broadcast the labels
+        classifier = make_classifier(backend, batch_size)
+        data["Classification_Result"], stats = classify_unique(list(data["Text_Input"]), classifier)
 
         # Query a specific Transaction ID if provided
         if transaction_id is not None:
-            transaction_result = data[data["Transaction_ID"] == transaction_id]
+            # Compared as text: IDs come in as query strings, and the column may parse as numbers or text
+            transaction_result = data[data["Transaction_ID"].astype(str) == str(transaction_id)]
             if not transaction_result.empty:
-                return transaction_result[["Transaction_ID", "Classification_Result"]].to_dict(orient='records')
+                result = transaction_result[["Transaction_ID", "Classification_Result"]].to_dict(orient='records')
             else:
-                return {"Error": f"No data found for Transaction ID: {transaction_id}"}
+                result = {"Error": f"No data found for Transaction ID: {transaction_id}"}
+        else:
+            # Return the entire classification result
+            result = data[["Transaction_ID", "Description", "Amount", "Classification_Result"]].to_dict(orient='records')
 
-        # Return the entire classification result
-        return data[["Transaction_ID", "Description", "Amount", "Classification_Result"]].to_dict(orient='records')
+        return (result, stats) if return_stats else result
 
     except Exception as e:
         raise ValueError(f"Error processing file: {e}")
 
 
-def categorize_data_with_kmeans(data, n_clusters=3):
+def categorize_data_with_kmeans(data, n_clusters=3, features=("amount",), method="auto"):
     """
-    Perform K-Means clustering to categorize transactions based on amount.
+    Perform K-Means clustering to categorize transactions.
+
+    Clustering on amount alone uses an optimal 1-D dynamic program while the input is
+    small enough (clustering.EXACT_1D_MAX_WORK); larger inputs and other feature sets use
+    KMeans, or MiniBatchKMeans for large inputs. Fits are cached by data hash and k,
+    so re-running with the same data and settings does not refit.
 
     Args:
-        data (pd.DataFrame): Input transaction data.
+        data (pd.DataFrame): Input transaction data (left unmodified).
         n_clusters (int): Number of clusters for K-Means.
+        features (tuple): Any of "amount", "log_amount", "day_of_week", "description".
+        method (str): "auto", "1d", "kmeans" or "minibatch".
 
     Returns:
-        pd.DataFrame: Dataframe with an additional "Cluster" column.
+        pd.DataFrame: Copy of the data with numeric Amount and an additional "Cluster" column.
     """
     try:
+        data = data.copy()
         # Ensure Amount column is numeric
         data["Amount"] = pd.to_numeric(data["Amount"], errors="coerce").fillna(0)
 
         # Apply K-Means clustering
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-        data["Cluster"] = kmeans.fit_predict(data[["Amount"]])
+        data["Cluster"] = fit_clusters(data, n_clusters=n_clusters, features=features, method=method)
 
         return data
     except Exception as e:
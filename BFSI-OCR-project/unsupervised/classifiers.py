@@ -0,0 +1,209 @@
+import os
+import re
+import threading
+from functools import partial
+
+# Label assigned when no keyword matches
+DEFAULT_CATEGORY = "Other"
+
+# Keyword rules for the fast classifier; the first keyword found in a text decides its category
+CATEGORY_KEYWORDS = {
+    "Groceries": ["grocery", "groceries", "supermarket", "walmart", "costco", "kroger", "safeway", "aldi",
+                  "whole foods", "trader joe", "tesco", "big bazaar", "dmart"],
+    "Dining": ["restaurant", "cafe", "coffee", "starbucks", "mcdonald", "burger", "pizza", "domino", "kfc",
+               "subway", "swiggy", "zomato", "doordash", "ubereats", "uber eats", "grubhub"],
+    "Transport": ["uber", "lyft", "ola", "taxi", "metro", "fuel", "petrol", "gas station", "shell", "chevron",
+                  "exxon", "parking", "toll"],
+    "Travel": ["airline", "airlines", "flight", "hotel", "airbnb", "booking.com", "expedia", "marriott",
+               "hilton", "irctc", "makemytrip"],
+    "Utilities": ["electricity", "electric", "water bill", "utility", "utilities", "internet", "broadband",
+                  "comcast", "verizon", "at&t", "airtel", "jio", "mobile recharge", "phone bill"],
+    "Shopping": ["amazon", "flipkart", "ebay", "target", "best buy", "ikea", "myntra", "mall", "store"],
+    "Entertainment": ["netflix", "spotify", "hulu", "disney", "prime video", "cinema", "movie", "theatre",
+                      "steam", "playstation", "xbox"],
+    "Healthcare": ["pharmacy", "hospital", "clinic", "doctor", "dental", "medical", "cvs", "walgreens",
+                   "apollo"],
+    "Insurance": ["insurance", "premium", "lic", "geico", "allstate"],
+    "Housing": ["rent", "mortgage", "landlord", "property", "maintenance", "hoa"],
+    "Income": ["salary", "payroll", "wages", "bonus", "dividend", "interest credit", "refund", "cashback"],
+    "Transfers": ["transfer", "neft", "imps", "rtgs", "upi", "zelle", "venmo", "paypal", "wire"],
+    "Cash": ["atm", "cash withdrawal", "cash deposit"],
+    "Fees": ["fee", "fees", "charge", "charges", "penalty", "overdraft", "service charge"],
+}
+
+# Location of the trained hashing-vectorizer + linear model
+LINEAR_MODEL_PATH = os.environ.get(
+    "BFSI_LINEAR_MODEL_PATH", os.path.join(os.path.expanduser("~"), ".cache", "bfsi-ocr", "linear_classifier.joblib")
+)
+
+
+class KeywordClassifier:
+    """
+    Rule-based classifier: one compiled keyword alternation scanned over each text.
+    Needs no model and runs at hundreds of thousands of rows per second on CPU.
+    """
+    name = "keyword"
+    # Recomputing is cheaper than a persistent label cache lookup
+    cache_namespace = None
+
+    def __init__(self, keywords=None, default=DEFAULT_CATEGORY):
+        keywords = keywords or CATEGORY_KEYWORDS
+        self.default = default
+        self.lookup = {keyword.lower(): category for category, words in keywords.items() for keyword in words}
+        alternation = "|".join(re.escape(k) for k in sorted(self.lookup, key=len, reverse=True))
+        self.pattern = re.compile(rf"(?<!\w)({alternation})(?!\w)")
+
+    def predict(self, texts):
+        search = self.pattern.search
+        lookup = self.lookup
+        default = self.default
+        results = []
+        for text in texts:
+            match = search(str(text).lower())
+            results.append(lookup[match.group(1)] if match else default)
+        return results
+
+
+class LinearClassifier:
+    """
+    Hashing-vectorizer + linear model over transaction descriptions.
+    Train it once with fit() (e.g. on labels produced by BART or reviewed by hand) and save();
+    predictions are vectorized and run at CPU speed.
+    """
+    name = "linear"
+
+    def __init__(self, model_path=LINEAR_MODEL_PATH):
+        self.model_path = model_path
+        self.pipeline = None
+        # Modification time of the saved model the pipeline was loaded from; None after an unsaved fit()
+        self.model_mtime = None
+        self.fitted = False
+        self._load()
+
+    def _load(self):
+        # Picks up a model saved (or replaced) on disk after this instance was created
+        if self.fitted:
+            return
+        try:
+            mtime = os.path.getmtime(self.model_path)
+        except OSError:
+            return
+        if mtime != self.model_mtime:
+            import joblib
+            self.pipeline = joblib.load(self.model_path)
+            self.model_mtime = mtime
+
+    @property
+    def cache_namespace(self):
+        # Labels are only memoized for a model saved on disk, keyed by its modification time
+        self._load()
+        if self.fitted or self.model_mtime is None:
+            return None
+        return f"linear:{self.model_path}:{self.model_mtime}"
+
+    def fit(self, texts, labels):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.pipeline import make_pipeline
+
+        self.pipeline = make_pipeline(
+            # Letters only: amounts appended to Text_Input carry no category signal
+            HashingVectorizer(n_features=2 ** 18, ngram_range=(1, 2), alternate_sign=False,
+                              token_pattern=r"(?u)\b[^\W\d_]{2,}\b"),
+            SGDClassifier(loss="hinge", alpha=1e-5, max_iter=20, tol=None, random_state=42),
+        )
+        self.pipeline.fit(list(texts), list(labels))
+        self.fitted = True
+        self.model_mtime = None
+        return self
+
+    def save(self, model_path=None):
+        import joblib
+        model_path = model_path or self.model_path
+        os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+        joblib.dump(self.pipeline, model_path)
+        if model_path == self.model_path:
+            self.fitted = False
+            self.model_mtime = os.path.getmtime(model_path)
+
+    def predict(self, texts):
+        self._load()
+        if self.pipeline is None:
+            raise ValueError(f"No trained linear classifier found at {self.model_path}. "
+                             "Train one with LinearClassifier().fit(texts, labels).save().")
+        return list(self.pipeline.predict(list(texts)))
+
+
+class BartClassifier:
+    """
+    Generative facebook/bart-large classification; slow, highest quality.
+    The model itself is cached by bart_classification.load_bart_model, so this wrapper is cheap to create.
+    `runtime` picks fp32 PyTorch, int8-quantized PyTorch or ONNX Runtime (defaults to BFSI_BART_RUNTIME).
+    """
+    name = "bart"
+
+    def __init__(self, batch_size=None, runtime=None, max_length=None):
+        self.batch_size = batch_size
+        self.runtime = runtime
+        self.max_length = max_length
+
+    @property
+    def cache_namespace(self):
+        from unsupervised.bart_classification import BART_MODEL_NAME, BART_RUNTIME, MAX_OUTPUT_LENGTHS
+        runtime = self.runtime or BART_RUNTIME
+        namespace = f"bart:{BART_MODEL_NAME}:{self.max_length or MAX_OUTPUT_LENGTHS['classify']}"
+        # Quantized and ONNX outputs can differ slightly from fp32, so their labels are memoized apart
+        return namespace if runtime == "fp32" else f"{namespace}:{runtime}"
+
+    def predict(self, texts):
+        from unsupervised.bart_classification import classify_texts, BATCH_SIZE
+        return classify_texts(list(texts), batch_size=self.batch_size or BATCH_SIZE, runtime=self.runtime,
+                              max_length=self.max_length)
+
+
+# Backend names served by BART, with their inference runtime (None: BFSI_BART_RUNTIME)
+BART_BACKENDS = {
+    "bart": None,
+    "bart-int8": "int8",
+    "bart-onnx": "onnx",
+}
+
+CLASSIFIER_BACKENDS = {
+    "bart": BartClassifier,
+    "bart-int8": partial(BartClassifier, runtime="int8"),
+    "bart-onnx": partial(BartClassifier, runtime="onnx"),
+    "keyword": KeywordClassifier,
+    "linear": LinearClassifier,
+}
+
+_classifiers = {}
+_classifiers_lock = threading.Lock()
+
+
+def available_backends():
+    """
+    Names of the classifier backends that can run here; "linear" is left out until a
+    trained model has been saved to LINEAR_MODEL_PATH.
+    """
+    return [name for name in CLASSIFIER_BACKENDS if name != "linear" or os.path.exists(LINEAR_MODEL_PATH)]
+
+
+def get_classifier(name="bart"):
+    """
+    Returns the process-wide classifier backend registered under `name`.
+    """
+    if name not in CLASSIFIER_BACKENDS:
+        raise ValueError(f"Unknown classifier backend: {name}. Choose one of {sorted(CLASSIFIER_BACKENDS)}.")
+    with _classifiers_lock:
+        if name not in _classifiers:
+            _classifiers[name] = CLASSIFIER_BACKENDS[name]()
+        return _classifiers[name]
+
+
+def make_classifier(backend, batch_size=None):
+    """
+    Returns the classifier for a backend name; BART backends get their own micro-batch size.
+    """
+    if backend in BART_BACKENDS:
+        return BartClassifier(batch_size, runtime=BART_BACKENDS[backend])
+    return get_classifier(backend)
@@ -0,0 +1,246 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Features that can be combined for clustering
+FEATURES = ("amount", "log_amount", "day_of_week", "description")
+
+# Above this many rows the multi-feature path switches from KMeans to MiniBatchKMeans
+MINIBATCH_THRESHOLD = 100000
+# Largest exact_1d_work (distinct amounts x DP rows) that "auto" clusters with the optimal
+# 1-D DP; bigger inputs go to KMeans, which is several times faster there
+EXACT_1D_MAX_WORK = int(os.environ.get("BFSI_CLUSTER_EXACT_1D_MAX_WORK", 500000))
+MINIBATCH_SIZE = 4096
+# Hashed token dimensions used for the description feature
+DESCRIPTION_FEATURES = 64
+# Fitted results kept in memory, keyed by data hash, k, features and method
+CACHE_SIZE = 32
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _amounts(data):
+    return pd.to_numeric(data["Amount"], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+
+
+def build_features(data, features=("amount",)):
+    """
+    Builds the clustering feature matrix from transaction columns.
+
+    Every transform is fixed (no fitted scaling), so matrices built from separate
+    chunks are comparable and can be fed to MiniBatchKMeans.partial_fit.
+
+    Args:
+        data (pd.DataFrame): Transactions with Amount and, depending on the features, Date/Description.
+        features (tuple): Any of "amount", "log_amount", "day_of_week", "description".
+
+    Returns:
+        np.ndarray or scipy.sparse.csr_matrix: One row per transaction.
+    """
+    unknown = set(features) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown clustering features: {sorted(unknown)}")
+
+    columns = []
+    if "amount" in features:
+        columns.append(_amounts(data)[:, None])
+    if "log_amount" in features:
+        amount = _amounts(data)
+        columns.append((np.sign(amount) * np.log1p(np.abs(amount)))[:, None])
+    if "day_of_week" in features:
+        if "Date" not in data.columns:
+            raise ValueError("The day_of_week feature requires a Date column.")
+        day = pd.to_datetime(data["Date"], errors="coerce").dt.dayofweek.fillna(0).to_numpy(dtype=np.float64)
+        # Encode the weekday on a circle so Sunday sits next to Monday
+        columns.append(np.column_stack([np.sin(2 * np.pi * day / 7), np.cos(2 * np.pi * day / 7)]))
+    dense = np.hstack(columns) if columns else np.empty((len(data), 0))
+
+    if "description" not in features:
+        return dense
+
+    from scipy import sparse
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    vectorizer = HashingVectorizer(n_features=DESCRIPTION_FEATURES, alternate_sign=False,
+                                   token_pattern=r"(?u)\b[^\W\d_]{2,}\b")
+    hashed = vectorizer.transform(data["Description"].astype(str))
+    return sparse.hstack([sparse.csr_matrix(dense), hashed], format="csr")
+
+
+def _dp_layer(previous, weights, sums, squares, m, last, floor=None):
+    """
+    Fills one row of the k-means DP: for every i in [m, last], the cheapest split of
+    the first i points into m clusters, given `previous` for m - 1 clusters.
+
+    The best last-cluster start is monotone in i, so the row is solved by divide and
+    conquer over i; every recursion level is evaluated for all its subproblems at once.
+    `floor` (the previous row's starts) is a lower bound on each start.
+    """
+    cost = np.full(len(weights), np.inf)
+    argmin = np.zeros(len(weights), dtype=np.int64)
+    # Terms of the segment cost that only depend on the start j
+    base = previous - squares
+    # Pending subproblems: i in [lo, hi], last-cluster start searched in [opt_lo, opt_hi]
+    lo, hi = np.array([m]), np.array([last])
+    opt_lo, opt_hi = np.array([m - 1]), np.array([last - 1])
+    while len(lo):
+        mid = (lo + hi) // 2
+        first = opt_lo if floor is None else np.maximum(opt_lo, floor[mid])
+        sizes = np.minimum(mid - 1, opt_hi) - first + 1
+        offsets = np.cumsum(sizes) - sizes
+        j = np.arange(offsets[-1] + sizes[-1]) + np.repeat(first - offsets, sizes)
+        total = np.repeat(sums[mid], sizes) - sums[j]
+        candidates = base[j] + np.repeat(squares[mid], sizes) - total * total / (np.repeat(weights[mid], sizes) - weights[j])
+        best = np.minimum.reduceat(candidates, offsets)
+        # Smallest j reaching each minimum keeps the starts monotone on ties
+        hits = np.flatnonzero(candidates == np.repeat(best, sizes))
+        best_j = j[hits[np.searchsorted(hits, offsets)]]
+        cost[mid] = best
+        argmin[mid] = best_j
+
+        left = lo <= mid - 1
+        right = mid + 1 <= hi
+        lo = np.concatenate([lo[left], mid[right] + 1])
+        hi = np.concatenate([mid[left] - 1, hi[right]])
+        opt_lo = np.concatenate([opt_lo[left], best_j[right]])
+        opt_hi = np.concatenate([best_j[left], opt_hi[right]])
+    return cost, argmin
+
+
+def kmeans_1d(values, n_clusters):
+    """
+    Globally optimal k-means for one-dimensional data, by dynamic programming
+    (the Ckmeans.1d.dp algorithm).
+
+    In 1-D every optimal cluster is a contiguous run of the sorted values, so the
+    minimum within-cluster sum of squares follows from a DP over split points with
+    prefix-sum segment costs. Duplicate values are merged into weighted points, the
+    middle DP rows are solved by divide and conquer and the last one needs a single
+    scan: O(n log n) to sort, then O((k - 2) * m log m + m) for m distinct values.
+    Use exact_1d_work() to estimate the cost up front.
+
+    Returns:
+        tuple: (labels, centers) with clusters numbered by ascending center.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64), np.zeros(1)
+    points, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    n = len(points)
+    k = max(1, min(n_clusters, n))
+
+    # Centering keeps the prefix sums of squares small enough to subtract accurately
+    shift = np.median(points)
+    centered = points - shift
+    weights = np.concatenate([[0.0], np.cumsum(counts, dtype=np.float64)])
+    sums = np.concatenate([[0.0], np.cumsum(counts * centered)])
+    squares = np.concatenate([[0.0], np.cumsum(counts * centered * centered)])
+
+    # One cluster over the first i points
+    cost = np.full(n + 1, np.inf)
+    cost[1:] = squares[1:] - sums[1:] * sums[1:] / weights[1:]
+    starts = []
+    for m in range(2, k):
+        # Each later cluster needs at least one point, so row m only goes up to n - (k - m)
+        cost, argmin = _dp_layer(cost, weights, sums, squares, m, n - (k - m), starts[-1] if starts else None)
+        starts.append(argmin)
+
+    # The last row is only needed at i = n
+    bounds = [n]
+    if k > 1:
+        j = np.arange(max(k - 1, starts[-1][n - 1] if starts else 0), n)
+        total = sums[n] - sums[j]
+        last = cost[j] - squares[j] + squares[n] - total * total / (weights[n] - weights[j])
+        bounds.append(int(j[np.argmin(last)]))
+    # Walk the stored split points back from the last cluster
+    for argmin in reversed(starts):
+        bounds.append(argmin[bounds[-1]])
+    bounds = np.array([0] + bounds[::-1])
+    point_labels = np.repeat(np.arange(k), np.diff(bounds))
+    centers = (sums[bounds[1:]] - sums[bounds[:-1]]) / (weights[bounds[1:]] - weights[bounds[:-1]]) + shift
+    return point_labels[inverse.ravel()], centers
+
+
+def exact_1d_work(values, n_clusters):
+    """
+    Size of the kmeans_1d DP for `values`: distinct values times the divide-and-conquer rows.
+    """
+    return len(np.unique(values)) * max(1, n_clusters - 2)
+
+
+def partial_fit_kmeans(chunks, n_clusters, features=("log_amount",), batch_size=MINIBATCH_SIZE):
+    """
+    Fits MiniBatchKMeans incrementally over an iterable of transaction DataFrames,
+    e.g. unsupervised.streaming.iter_transaction_chunks, for data that does not fit in memory.
+    """
+    from sklearn.cluster import MiniBatchKMeans
+
+    model = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, random_state=42, n_init=3)
+    for chunk in chunks:
+        X = build_features(chunk, features)
+        if X.shape[0] >= n_clusters:
+            model.partial_fit(X)
+    return model
+
+
+def _data_key(data, features):
+    columns = ["Amount"]
+    if "day_of_week" in features:
+        columns.append("Date")
+    if "description" in features:
+        columns.append("Description")
+    hashed = pd.util.hash_pandas_object(data[columns], index=False).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+
+def fit_clusters(data, n_clusters=3, features=("amount",), method="auto"):
+    """
+    Returns cluster labels for the transactions, reusing a cached fit for identical data.
+
+    Args:
+        data (pd.DataFrame): Transaction data.
+        n_clusters (int): Number of clusters.
+        features (tuple): Features to cluster on (see build_features).
+        method (str): "1d" (optimal 1-D dynamic programming, amount only), "kmeans", "minibatch" or
+            "auto" (1d on amount alone up to EXACT_1D_MAX_WORK, otherwise KMeans or MiniBatchKMeans).
+
+    Returns:
+        np.ndarray: Cluster label per row (a copy; the cached fit is not shared).
+    """
+    features = tuple(features)
+    key = (_data_key(data, features), n_clusters, features, method)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key].copy()
+
+    if method == "auto":
+        if features == ("amount",) and exact_1d_work(_amounts(data), n_clusters) <= EXACT_1D_MAX_WORK:
+            method = "1d"
+        else:
+            method = "minibatch" if len(data) > MINIBATCH_THRESHOLD else "kmeans"
+
+    if method == "1d":
+        if features != ("amount",) and features != ("log_amount",):
+            raise ValueError("The 1d method only clusters on a single amount feature.")
+        labels, _ = kmeans_1d(np.asarray(build_features(data, features))[:, 0], n_clusters)
+    elif method == "minibatch":
+        from sklearn.cluster import MiniBatchKMeans
+        labels = MiniBatchKMeans(n_clusters=n_clusters, batch_size=MINIBATCH_SIZE, random_state=42,
+                                 n_init=3).fit_predict(build_features(data, features))
+    elif method == "kmeans":
+        from sklearn.cluster import KMeans
+        labels = KMeans(n_clusters=n_clusters, random_state=42).fit_predict(build_features(data, features))
+    else:
+        raise ValueError(f"Unknown clustering method: {method}")
+
+    with _cache_lock:
+        _cache[key] = labels
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return labels.copy()
@@ -0,0 +1,177 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+
+# Persistent description -> label memo, overridable through the environment
+LABEL_CACHE_DIR = os.environ.get(
+    "BFSI_LABEL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bfsi-ocr")
+)
+LABEL_CACHE_MAX_ENTRIES = int(os.environ.get("BFSI_LABEL_CACHE_MAX_ENTRIES", 1_000_000))
+LABEL_CACHE_ENABLED = os.environ.get("BFSI_LABEL_CACHE", "1") != "0"
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+
+def normalize_texts(texts):
+    """
+    Normalizes classifier inputs for deduplication: lowercase with collapsed whitespace.
+    """
+    return pd.Series(texts, dtype=object).astype(str).str.lower().str.split().str.join(" ")
+
+
+class LabelCache:
+    """
+    Persistent (namespace, normalized text) -> label memo backed by SQLite,
+    bounded by entry count with least recently used eviction.
+    """
+    def __init__(self, cache_dir=LABEL_CACHE_DIR, max_entries=LABEL_CACHE_MAX_ENTRIES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "label_cache.sqlite3")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS labels ("
+                "namespace TEXT NOT NULL, text TEXT NOT NULL, label TEXT NOT NULL, last_access REAL NOT NULL, "
+                "PRIMARY KEY (namespace, text))"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS labels_last_access ON labels (last_access)")
+
+    def get_many(self, namespace, texts):
+        """
+        Returns {text: label} for the texts already memoized under a namespace.
+        """
+        found = {}
+        with self.lock, self.conn:
+            for start in range(0, len(texts), _QUERY_CHUNK):
+                chunk = texts[start:start + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self.conn.execute(
+                    f"SELECT text, label FROM labels WHERE namespace = ? AND text IN ({placeholders})",
+                    [namespace, *chunk],
+                ).fetchall())
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE labels SET last_access = ? WHERE namespace = ? AND text = ?",
+                [(now, namespace, text) for text in found],
+            )
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+        return found
+
+    def put_many(self, namespace, labels):
+        """
+        Memoizes {text: label} pairs, then evicts the least recently used entries over the bound.
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO labels (namespace, text, label, last_access) VALUES (?, ?, ?, ?)",
+                [(namespace, text, str(label), now) for text, label in labels.items()],
+            )
+            excess = self.conn.execute("SELECT COUNT(*) FROM labels").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.conn.execute(
+                    "DELETE FROM labels WHERE rowid IN (SELECT rowid FROM labels ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+
+    def stats(self):
+        """
+        Returns hit/miss counters for this process along with the current entry count.
+        """
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM labels").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "max_entries": self.max_entries}
+
+    def clear(self):
+        """
+        Removes every memoized label and resets the counters.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM labels")
+            self.hits = 0
+            self.misses = 0
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_label_cache():
+    """
+    Returns the process-wide label cache, or None when memoization is disabled.
+    """
+    global _cache, _cache_pid
+    if not LABEL_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = LabelCache()
+            _cache_pid = os.getpid()
+        return _cache
+
+
+def classify_unique(texts, classifier):
+    """
+    Classifies only the unique normalized texts and broadcasts the labels back to every row.
+
+    Labels memoized by earlier uploads are reused when the classifier exposes a
+    `cache_namespace`; the first original text of each group is what the model sees.
+
+    Returns:
+        tuple: (labels in input order, dedup stats dict)
+    """
+    keys = normalize_texts(texts)
+    codes, uniques = pd.factorize(keys)
+    first_rows = np.unique(codes, return_index=True)[1]
+    unique_keys = list(uniques)
+
+    namespace = getattr(classifier, "cache_namespace", None)
+    cache = get_label_cache() if namespace else None
+    memo = {}
+    if cache is not None:
+        try:
+            memo = cache.get_many(namespace, unique_keys)
+        except sqlite3.Error as e:
+            logging.warning(f"Label cache lookup failed: {e}")
+
+    missing = [j for j, key in enumerate(unique_keys) if key not in memo]
+    if missing:
+        with instrumentation.timer("classify_seconds", backend=getattr(classifier, "name", type(classifier).__name__)):
+            predicted = classifier.predict([texts[first_rows[j]] for j in missing])
+        new_labels = {unique_keys[j]: label for j, label in zip(missing, predicted)}
+        memo.update(new_labels)
+        if cache is not None:
+            try:
+                cache.put_many(namespace, new_labels)
+            except sqlite3.Error as e:
+                logging.warning(f"Label cache write failed: {e}")
+
+    unique_labels = np.empty(len(unique_keys), dtype=object)
+    unique_labels[:] = [memo[key] for key in unique_keys]
+    labels = unique_labels[codes].tolist()
+
+    stats = {
+        "rows": len(texts),
+        "unique": len(unique_keys),
+        "cached": len(unique_keys) - len(missing),
+        "inferred": len(missing),
+        "dedup_ratio": round(1 - len(unique_keys) / len(texts), 4) if len(texts) else 0.0,
+    }
+    logging.info(f"Classified {stats['rows']} rows with {stats['inferred']} model calls "
+                 f"({stats['unique']} unique, {stats['cached']} memoized, dedup ratio {stats['dedup_ratio']})")
+    return labels, stats
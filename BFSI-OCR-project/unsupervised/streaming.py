@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from unsupervised.classifiers import make_classifier
+from unsupervised.label_cache import classify_unique
+
+REQUIRED_COLUMNS = ["Transaction_ID", "Description", "Amount", "Date"]
+OUTPUT_COLUMNS = ["Transaction_ID", "Description", "Amount", "Date", "Classification_Result"]
+
+# Explicit dtypes for streamed input; Amount is parsed separately so bad values become NaN
+INPUT_DTYPES = {"Transaction_ID": "string", "Description": "string", "Amount": "string", "Date": "string"}
+
+# Rows read, classified and written per chunk
+CHUNK_SIZE = int(os.environ.get("BFSI_CLASSIFY_CHUNK_SIZE", 50000))
+
+
+def prepare_transactions(data):
+    """
+    Validates the required columns and builds the Text_Input classifier column in place.
+    Missing values in text columns become "Unknown"; numeric columns keep their dtype.
+    """
+    for col in REQUIRED_COLUMNS:
+        if col not in data.columns:
+            raise ValueError(f"Missing required column: {col}")
+
+    # Fill missing values with placeholders, without turning numeric columns into objects
+    data.fillna({col: "Unknown" for col in data.columns if not is_numeric_dtype(data[col])}, inplace=True)
+
+    # Combine Description and Amount into a single text string for classification
+    amount_text = data["Amount"].astype(str).where(data["Amount"].notna(), "Unknown")
+    data["Text_Input"] = data["Description"].astype(str) + " - " + amount_text
+    return data
+
+
+def _is_json_lines(source):
+    """
+    Peeks at the first non-blank character: JSON Lines files start with an object, not an array.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            head = f.read(1024)
+    else:
+        position = source.tell()
+        head = source.read(1024)
+        source.seek(position)
+    if isinstance(head, str):
+        head = head.encode()
+    return head.lstrip()[:1] == b"{"
+
+
+def iter_transaction_chunks(source, chunksize=CHUNK_SIZE):
+    """
+    Yields validated transaction DataFrames of at most `chunksize` rows.
+
+    CSV and JSON Lines are read incrementally with explicit dtypes. A JSON array
+    cannot be parsed incrementally by pandas, so it is loaded once and then chunked.
+    """
+    name = os.fspath(source) if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    name = name.lower()
+    if name.endswith(".csv"):
+        reader = pd.read_csv(source, chunksize=chunksize, dtype=INPUT_DTYPES)
+    elif name.endswith((".json", ".jsonl", ".ndjson")):
+        if name.endswith((".jsonl", ".ndjson")) or _is_json_lines(source):
+            reader = pd.read_json(source, lines=True, chunksize=chunksize, dtype=INPUT_DTYPES)
+        else:
+            data = pd.read_json(source, dtype=INPUT_DTYPES)
+            reader = (data.iloc[start:start + chunksize].copy() for start in range(0, len(data), chunksize))
+    else:
+        raise ValueError("Unsupported file format. Please upload a CSV or JSON file.")
+
+    for chunk in reader:
+        for col in REQUIRED_COLUMNS:
+            if col not in chunk.columns:
+                raise ValueError(f"Missing required column: {col}")
+        chunk["Amount"] = pd.to_numeric(chunk["Amount"], errors="coerce")
+        yield prepare_transactions(chunk)
+
+
+class _CSVChunkWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetChunkWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet output requires pyarrow. Install it or write CSV instead.")
+        self.pa = pa
+        self.pq = pq
+        self.path = path
+        self.writer = None
+
+    def write(self, df):
+        table = self.pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = table.cast(self.writer.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def classify_stream(source, output_path, backend="keyword", chunksize=CHUNK_SIZE, output_format=None):
+    """
+    Classifies a transaction file chunk by chunk and appends the results to CSV/Parquet.
+    Peak memory is bounded by the chunk size, not the file size.
+
+    Args:
+        source: Path or file object of a CSV, JSON Lines or JSON file.
+        output_path (str): Destination .csv or .parquet file.
+        backend (str): Classifier backend name (see unsupervised.classifiers).
+        chunksize (int): Rows per chunk.
+        output_format (str): "csv" or "parquet" (defaults to the output file extension).
+
+    Returns:
+        dict: Totals across all chunks (rows, model calls, cache hits, chunks).
+    """
+    output_format = output_format or ("parquet" if output_path.lower().endswith(".parquet") else "csv")
+    if output_format not in ("csv", "parquet"):
+        raise ValueError(f"Unsupported output format: {output_format}")
+    writer = _ParquetChunkWriter(output_path) if output_format == "parquet" else _CSVChunkWriter(output_path)
+    classifier = make_classifier(backend)
+
+    totals = {"rows": 0, "inferred": 0, "cached": 0, "chunks": 0}
+    try:
+        for chunk in iter_transaction_chunks(source, chunksize=chunksize):
+            chunk["Classification_Result"], stats = classify_unique(chunk["Text_Input"].tolist(), classifier)
+            writer.write(chunk[OUTPUT_COLUMNS])
+            totals["rows"] += stats["rows"]
+            totals["inferred"] += stats["inferred"]
+            totals["cached"] += stats["cached"]
+            totals["chunks"] += 1
+    finally:
+        writer.close()
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify a large transaction export in streaming mode.")
+    parser.add_argument("input", help="CSV, JSON Lines or JSON transaction file")
+    parser.add_argument("output", help="Output .csv or .parquet file")
+    parser.add_argument("--backend", default="keyword", help="Classifier backend (bart, bart-int8, bart-onnx, keyword, linear)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--format", dest="output_format", choices=["csv", "parquet"], default=None)
+    args = parser.parse_args(argv)
+
+    totals = classify_stream(args.input, args.output, backend=args.backend,
+                             chunksize=args.chunksize, output_format=args.output_format)
+    print(json.dumps(totals))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Server-side aggregation and downsampling of the frames the Streamlit app plots.
+
+Charts are drawn from small aggregated frames rather than the raw rows: bar and pie
+charts get one row per category (cluster, classification or description), capped at
+the TOP_N largest plus an "Other" row; amounts are binned into a histogram; scatter
+plots are sampled down to MAX_POINTS and switch to WebGL above WEBGL_THRESHOLD rows.
+Aggregates are cached by a hash of the input columns, so Streamlit re-runs that
+plot the same data don't recompute them.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Categories shown individually in bar and pie charts; the rest are summed into OTHER_LABEL
+TOP_N = int(os.environ.get("BFSI_VIZ_TOP_N", 20))
+OTHER_LABEL = "Other"
+HISTOGRAM_BINS = int(os.environ.get("BFSI_VIZ_HISTOGRAM_BINS", 30))
+# Above this many points scatter plots are drawn with WebGL (scattergl) instead of SVG
+WEBGL_THRESHOLD = int(os.environ.get("BFSI_VIZ_WEBGL_THRESHOLD", 1000))
+# Most points sent to the browser for a scatter plot; larger frames are sampled per group
+MAX_POINTS = int(os.environ.get("BFSI_VIZ_MAX_POINTS", 20000))
+# Grouping columns, most specific first, used when a frame has them
+GROUP_COLUMNS = ("Cluster", "Classification_Result")
+# Aggregated frames kept in memory, keyed by data hash and settings
+CACHE_SIZE = 64
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _data_key(data, columns):
+    hashed = pd.util.hash_pandas_object(data[list(columns)], index=False).to_numpy()
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+
+def _cached(kind, data, columns, settings, compute):
+    key = (kind, _data_key(data, columns), tuple(columns), settings)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    result = compute()
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def chart_columns(data):
+    """
+    Picks the (label, value) columns to plot: Description/Amount for transactions and
+    line items, Field/Value for extracted fields. Returns None when neither pair exists.
+    """
+    if "Description" in data.columns and "Amount" in data.columns:
+        return "Description", "Amount"
+    if "Field" in data.columns and "Value" in data.columns:
+        return "Field", "Value"
+    return None
+
+
+def group_column(data, label_column):
+    """
+    The column bar and pie charts aggregate by: the cluster or classification when
+    the frame has one, otherwise the label column itself.
+    """
+    for column in GROUP_COLUMNS:
+        if column in data.columns:
+            return column
+    return label_column
+
+
+def _aggregate(data, group, value, top_n):
+    values = pd.to_numeric(data[value], errors="coerce")
+    frame = pd.DataFrame({group: data[group].astype(str), value: values}).dropna(subset=[value])
+    totals = frame.groupby(group, sort=False)[value].agg(["sum", "count"])
+    # Largest categories by absolute total, so big negative lines (losses, refunds) aren't folded away
+    totals = totals.loc[totals["sum"].abs().sort_values(ascending=False, kind="stable").index]
+    if len(totals) > top_n:
+        rest = totals.iloc[top_n:]
+        totals = totals.iloc[:top_n]
+        # A real category can already be called "Other" (the keyword classifier's default), so add to it
+        totals.loc[OTHER_LABEL] = totals.reindex([OTHER_LABEL]).fillna(0).iloc[0] + rest.sum()
+    totals.index.name = group
+    totals["count"] = totals["count"].astype(int)
+    return totals.rename(columns={"sum": value, "count": "Rows"}).reset_index()
+
+
+def aggregate(data, group, value, top_n=TOP_N):
+    """
+    Sums `value` per `group` and keeps the `top_n` largest groups, folding the rest
+    into one OTHER_LABEL row. Non-numeric values are dropped.
+
+    Returns:
+        pd.DataFrame: Columns group, value and Rows (rows summed per group), largest first.
+    """
+    return _cached("aggregate", data, (group, value), top_n, lambda: _aggregate(data, group, value, top_n))
+
+
+def _histogram(data, value, bins):
+    values = pd.to_numeric(data[value], errors="coerce").dropna().to_numpy(dtype=np.float64)
+    if len(values) == 0:
+        return pd.DataFrame(columns=["Bin", "Start", "End", "Rows"])
+    counts, edges = np.histogram(values, bins=bins)
+    return pd.DataFrame({
+        "Bin": (edges[:-1] + edges[1:]) / 2,
+        "Start": edges[:-1],
+        "End": edges[1:],
+        "Rows": counts,
+    })
+
+
+def histogram(data, value, bins=HISTOGRAM_BINS):
+    """
+    Bins the numeric values of a column.
+
+    Returns:
+        pd.DataFrame: One row per bin with its center (Bin), Start, End and Rows.
+    """
+    return _cached("histogram", data, (value,), bins, lambda: _histogram(data, value, bins))
+
+
+def _downsample(data, columns, group, max_points):
+    frame = data[list(columns)]
+    if len(frame) <= max_points:
+        return frame
+    if group is None:
+        return frame.sample(n=max_points, random_state=0).sort_index()
+    # Sample every group in proportion to its size, keeping at least one row of each:
+    # shuffle once, then keep each group's first quota rows
+    shuffled = frame.sample(frac=1, random_state=0)
+    quota = shuffled.groupby(group, sort=False)[group].transform("size") * (max_points / len(frame))
+    keep = shuffled.groupby(group, sort=False).cumcount() < quota.astype(int).clip(lower=1)
+    return shuffled[keep].sort_index()
+
+
+def downsample(data, columns, group=None, max_points=MAX_POINTS):
+    """
+    Returns `columns` of the frame, sampled down to about `max_points` rows (per-group
+    proportional when `group` is given) and in the original row order.
+    """
+    columns = tuple(dict.fromkeys((*columns, group) if group else columns))
+    return _cached("downsample", data, columns, (group, max_points),
+                   lambda: _downsample(data, columns, group, max_points))
+
+
+def render_mode(rows):
+    """
+    Plotly Express render_mode for a scatter plot of `rows` points.
+    """
+    return "webgl" if rows > WEBGL_THRESHOLD else "svg"
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()